@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.otp import purge_otp_attempts
+from accounts.outbox import purge_emails, send_pending_emails
+
+PURGE_INTERVAL = 3600  # seconds between deletions of old sent and failed emails and expired OTP counters
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send the emails currently due and exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between outbox checks')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Emails sent per connection (defaults to EMAIL_OUTBOX_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        last_purge = None
+        while True:
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                purged = purge_emails()
+                last_purge = time.monotonic()
+                if purged:
+                    self.stdout.write(f"Deleted {purged} old email(s)")
+                purged = purge_otp_attempts()
+                if purged:
+                    self.stdout.write(f"Deleted {purged} expired OTP counter(s)")
+            sent = send_pending_emails(batch_size=options['batch_size'])
+            if sent:
+                self.stdout.write(f"Sent {sent} email(s)")
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-19 04:33
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='customuser',
+            name='otp',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-19 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_remove_customuser_otp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OTPAttempts',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
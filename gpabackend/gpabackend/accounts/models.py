@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.utils import timezone
 from rest_framework.response import Response
 
 class CustomUserManager(BaseUserManager):
@@ -48,7 +49,6 @@ class CustomUser(AbstractUser):
     cgpa = models.FloatField(null=True, blank=True)  # Cumulative GPA up to this semester
     has_seen_increment_notification = models.BooleanField(default=False)  # Track notification status
     is_ready_for_next_semester = models.BooleanField(default=False)  # Field to track readiness
-    otp = models.IntegerField(null=True, blank=True)  # Field to store OTP
     
     groups = models.ManyToManyField(
         'auth.Group',
@@ -91,4 +91,56 @@ class Notification(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.header} - {self.recipient.email}"
\ No newline at end of file
+        return f"{self.header} - {self.recipient.email}"
+
+class EmailOutbox(models.Model):
+    """
+    Model to queue outgoing emails for the background email worker
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # Not retried before this time
+    claim_token = models.CharField(max_length=32, blank=True, default='')  # Worker batch currently sending the email
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {self.recipient} ({self.status})"
+
+
+class OTPAttempts(models.Model):
+    """
+    Checks made against the live OTP of an email. Counted in the database,
+    with UPDATE ... SET attempts = attempts + 1, so the count is atomic
+    whatever cache backend holds the OTP itself.
+    """
+    key = models.CharField(max_length=100, primary_key=True)  # Hashed key of the email (accounts/otp.py)
+    attempts = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)  # When the OTP it counts for expires
+
+    def __str__(self):
+        return f"{self.key} - {self.attempts} attempt(s)"
@@ -0,0 +1,175 @@
+"""
+One-time passwords for email verification, kept in the cache instead of
+the user table.
+
+Each email has at most one live OTP, stored as an HMAC of the code under a
+key derived from the email, with a time-to-live of OTP_TTL seconds. Every
+check counts against OTP_MAX_ATTEMPTS in an OTPAttempts row, incremented
+with an atomic UPDATE before the code is compared, so parallel guesses
+cannot share an attempt whichever cache backend is configured; once the
+limit is passed the OTP is dropped and a new one has to be requested.
+Counters of OTPs that expired unchecked are deleted by purge_otp_attempts,
+which the email worker runs. Issuing OTPs on request is throttled with token
+buckets per email and per client IP (OTP_EMAIL_RATE, OTP_IP_RATE: bucket
+size and seconds to refill one token), and so are checks
+(OTP_VERIFY_EMAIL_RATE, OTP_VERIFY_IP_RATE).
+
+Everything else lives in the OTP_CACHE cache alias. It must be shared by
+all web workers (file-based or a cache server), not local memory, in
+production. Bucket updates are read-modify-write, so concurrent requests
+can overdraw a bucket by a token or two; that is accepted for a rate limit.
+
+The client IP is REMOTE_ADDR, which behind a reverse proxy is the proxy's
+address for every client. Set OTP_CLIENT_IP_HEADER to the header the proxy
+appends the client address to (e.g. HTTP_X_FORWARDED_FOR); its last entry
+is used, since earlier ones come from the client and can be forged.
+"""
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OTPAttempts
+
+# Results of verify_otp
+VERIFIED = 'verified'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+
+
+def _cache():
+    return caches[getattr(settings, 'OTP_CACHE', 'default')]
+
+
+def _key(kind, value):
+    """Cache key for value (an email or IP), hashed so it is always a valid key and never stored in clear"""
+    digest = hashlib.sha256(str(value).strip().lower().encode()).hexdigest()
+    return f'otp:{kind}:{digest}'
+
+
+def _hash_code(email, code):
+    message = f'{email.strip().lower()}:{code}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def issue_otp(email):
+    """Create a new OTP for email, replacing any previous one, and return the code"""
+    code = secrets.randbelow(900000) + 100000
+    ttl = getattr(settings, 'OTP_TTL', 600)
+    cache = _cache()
+    cache.set(_key('code', email), {'hash': _hash_code(email, code), 'expires': time.time() + ttl}, timeout=ttl)
+    # One upsert, so a concurrent issue for the same email cannot fail on the key
+    OTPAttempts.objects.bulk_create(
+        [OTPAttempts(key=_key('attempts', email), attempts=0, expires_at=timezone.now() + timedelta(seconds=ttl))],
+        update_conflicts=True, unique_fields=['key'], update_fields=['attempts', 'expires_at'],
+    )
+    return code
+
+
+def verify_otp(email, code):
+    """
+    Check code against the live OTP of email.
+
+    Returns:
+        str: VERIFIED (the OTP is consumed), INVALID, EXPIRED (none issued or
+            timed out) or LOCKED (too many failed attempts; the OTP is dropped)
+    """
+    cache = _cache()
+    key = _key('code', email)
+    attempts_key = _key('attempts', email)
+    entry = cache.get(key)
+    remaining = entry['expires'] - time.time() if entry else 0
+    if remaining <= 0:
+        return EXPIRED
+
+    # Count the attempt before comparing. A concurrent check may increment
+    # between the UPDATE and the read, which can only make this one see more
+    # attempts than its own, so no more than OTP_MAX_ATTEMPTS codes are compared.
+    counter = OTPAttempts.objects.filter(key=attempts_key)
+    if not counter.update(attempts=F('attempts') + 1):
+        return EXPIRED  # dropped by a concurrent check
+    attempts = counter.values_list('attempts', flat=True).first()
+    if attempts is None:
+        return EXPIRED  # dropped in between
+    max_attempts = getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+    if attempts > max_attempts:
+        _drop(cache, key, counter)
+        return LOCKED
+
+    if hmac.compare_digest(entry['hash'], _hash_code(email, code)):
+        _drop(cache, key, counter)
+        return VERIFIED
+    if attempts >= max_attempts:
+        _drop(cache, key, counter)
+        return LOCKED
+    return INVALID
+
+
+def _drop(cache, key, counter):
+    """Delete an OTP and its attempt counter"""
+    cache.delete(key)
+    counter.delete()
+
+
+def purge_otp_attempts():
+    """Delete the attempt counters of expired OTPs. Returns the number deleted."""
+    deleted, _ = OTPAttempts.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
+
+
+def take_token(kind, value, rate):
+    """
+    Take a token from the bucket of value.
+
+    Args:
+        kind (str): Bucket family, e.g. 'email' or 'ip'
+        rate (tuple): (bucket size, seconds to refill one token)
+
+    Returns:
+        float: 0 if a token was taken, otherwise seconds until the next one
+    """
+    capacity, refill_seconds = rate
+    cache = _cache()
+    key = _key(f'bucket:{kind}', value)
+    now = time.time()
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) / refill_seconds)
+    if tokens < 1:
+        return (1 - tokens) * refill_seconds
+    # Kept until a full bucket would have refilled
+    cache.set(key, (tokens - 1, now), timeout=int(capacity * refill_seconds) + 1)
+    return 0
+
+
+def throttle_otp_request(email, ip):
+    """Seconds the caller has to wait before another OTP can be sent to email from ip (0 when allowed)"""
+    wait = take_token('email', email, getattr(settings, 'OTP_EMAIL_RATE', (3, 300)))
+    if not wait and ip:
+        wait = take_token('ip', ip, getattr(settings, 'OTP_IP_RATE', (10, 60)))
+    return wait
+
+
+def throttle_otp_check(email, ip):
+    """Seconds the caller has to wait before checking another OTP for email from ip (0 when allowed)"""
+    wait = take_token('verify-email', email, getattr(settings, 'OTP_VERIFY_EMAIL_RATE', (10, 60)))
+    if not wait and ip:
+        wait = take_token('verify-ip', ip, getattr(settings, 'OTP_VERIFY_IP_RATE', (30, 60)))
+    return wait
+
+
+def client_ip(request):
+    """Address of the client, taken from OTP_CLIENT_IP_HEADER when set (see the module docstring)"""
+    header = getattr(settings, 'OTP_CLIENT_IP_HEADER', '')
+    if header:
+        forwarded = request.META.get(header, '')
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-1]
+    return request.META.get('REMOTE_ADDR')
@@ -0,0 +1,143 @@
+"""
+Asynchronous email delivery.
+
+Views only enqueue an EmailOutbox row, in the same transaction as the
+change that triggered the email; the `run_email_worker` management command
+claims due emails in batches and sends each batch over a single connection
+to the email backend, so a slow SMTP server never holds a web worker.
+
+A failed email is retried with exponential backoff (EMAIL_OUTBOX_RETRY_DELAY
+doubling per attempt, capped at EMAIL_OUTBOX_MAX_RETRY_DELAY) until
+EMAIL_OUTBOX_MAX_ATTEMPTS, after which it is marked failed. Emails claimed
+by a worker that died are picked up again once EMAIL_OUTBOX_CLAIM_TIMEOUT
+has passed, so an email can be delivered twice but is never lost.
+
+Bodies carry OTPs, so they are cleared once an email is sent or given up
+on, and sent and failed rows are deleted after EMAIL_OUTBOX_RETENTION_DAYS.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(recipient, subject, body):
+    """Queue an email for the email worker and return the outbox row"""
+    return EmailOutbox.objects.create(recipient=recipient, subject=subject, body=body)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next try of an email that has failed `attempts` times"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)
+    return min(base * 2 ** (attempts - 1), cap)
+
+
+def claim_batch(limit=None):
+    """
+    Atomically mark up to limit due emails as sending and return them.
+    The conditional update makes this safe with several workers polling the table.
+    """
+    if limit is None:
+        limit = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT', 300))
+    claimable = (
+        Q(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now) |
+        Q(status=EmailOutbox.STATUS_SENDING, claimed_at__lt=stale)
+    )
+    email_ids = list(
+        EmailOutbox.objects.filter(claimable).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit]
+    )
+    if not email_ids:
+        return []
+
+    token = uuid.uuid4().hex
+    EmailOutbox.objects.filter(claimable, pk__in=email_ids).update(
+        status=EmailOutbox.STATUS_SENDING, claim_token=token, claimed_at=now
+    )
+    return list(EmailOutbox.objects.filter(claim_token=token).order_by('next_attempt_at', 'id'))
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    email.claim_token = ''
+    if email.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5):
+        email.status = EmailOutbox.STATUS_FAILED
+        email.body = ''
+        logger.error("Giving up on email %s to %s after %s attempts: %s", email.pk, email.recipient, email.attempts, error)
+    else:
+        email.status = EmailOutbox.STATUS_PENDING
+        email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+        logger.warning("Email %s to %s failed (attempt %s): %s", email.pk, email.recipient, email.attempts, error)
+    email.save(update_fields=['attempts', 'last_error', 'claim_token', 'status', 'next_attempt_at', 'body'])
+
+
+def send_batch(emails):
+    """
+    Send claimed emails over one backend connection and record each outcome.
+    Returns the number sent.
+    """
+    if not emails:
+        return 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _record_failure(email, e)
+        return 0
+
+    sent_ids = []
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject, body=email.body, from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email.recipient], connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as e:
+                _record_failure(email, e)
+            else:
+                sent_ids.append(email.pk)
+    finally:
+        connection.close()
+
+    EmailOutbox.objects.filter(pk__in=sent_ids).update(
+        status=EmailOutbox.STATUS_SENT, sent_at=timezone.now(), claim_token='', body=''
+    )
+    return len(sent_ids)
+
+
+def purge_emails(retention_days=None):
+    """Delete sent and failed emails created more than retention_days ago. Returns the number deleted."""
+    if retention_days is None:
+        retention_days = getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = EmailOutbox.objects.filter(
+        status__in=[EmailOutbox.STATUS_SENT, EmailOutbox.STATUS_FAILED], created_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def send_pending_emails(batch_size=None, max_batches=None):
+    """Send due emails batch by batch until none are left (or max_batches). Returns the number sent."""
+    sent = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        emails = claim_batch(batch_size)
+        if not emails:
+            break
+        sent += send_batch(emails)
+        batches += 1
+    return sent
@@ -1,3 +1,288 @@
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import CustomUser, EmailOutbox, OTPAttempts
+from .otp import EXPIRED, INVALID, LOCKED, VERIFIED, issue_otp, purge_otp_attempts, verify_otp
+from .outbox import claim_batch, enqueue_email, purge_emails, send_pending_emails
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """locmem backend that counts connections and bounces recipients at bounce.test"""
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(recipient.endswith('@bounce.test') for recipient in message.to):
+                raise ConnectionError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='accounts.tests.CountingEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_DELAY=30, EMAIL_OUTBOX_MAX_RETRY_DELAY=3600,
+)
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+
+    def test_signup_only_queues_the_otp_email(self):
+        response = APIClient().post('/api/signup/', {
+            'username': 'newstudent', 'email': 'new@example.com', 'password': 'pass12345', 'KTUID': 'NEW21CS001',
+            'semester': 'semester_1', 'degree': 'B.Tech', 'targeted_cgpa': 8.5,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(CustomUser.objects.get(email='new@example.com').is_active)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual((queued.recipient, queued.status), ('new@example.com', EmailOutbox.STATUS_PENDING))
+
+        self.assertEqual(send_pending_emails(), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.STATUS_SENT)
+
+    def test_sends_a_batch_over_one_connection(self):
+        for index in range(5):
+            enqueue_email(f'user{index}@example.com', 'Subject', 'Body')
+
+        self.assertEqual(send_pending_emails(batch_size=10), 5)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count(), 5)
+
+    def test_failed_email_is_retried_with_backoff_then_given_up(self):
+        bounced = enqueue_email('user@bounce.test', 'Subject', 'Body')
+        enqueue_email('user@example.com', 'Subject', 'Body')
+
+        self.assertEqual(send_pending_emails(), 1)
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), (EmailOutbox.STATUS_PENDING, 1))
+        self.assertIn('mailbox unavailable', bounced.last_error)
+        self.assertAlmostEqual(
+            (bounced.next_attempt_at - timezone.now()).total_seconds(), 30, delta=5
+        )
+        self.assertEqual(claim_batch(), [])  # not due yet
+
+        delays = []
+        for _ in range(2):
+            EmailOutbox.objects.filter(pk=bounced.pk).update(next_attempt_at=timezone.now())
+            send_pending_emails()
+            bounced.refresh_from_db()
+            delays.append(round((bounced.next_attempt_at - timezone.now()).total_seconds()))
+        self.assertEqual(delays[0], 60)
+        self.assertEqual((bounced.status, bounced.attempts), (EmailOutbox.STATUS_FAILED, 3))
+        self.assertEqual(bounced.body, '')
+
+    def test_otp_bodies_are_cleared_and_old_emails_purged(self):
+        sent = enqueue_email('user@example.com', 'Your OTP', 'Your OTP is 123456')
+        pending = enqueue_email('later@example.com', 'Your OTP', 'Your OTP is 654321')
+        EmailOutbox.objects.filter(pk=pending.pk).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(send_pending_emails(), 1)
+        self.assertEqual(EmailOutbox.objects.get(pk=sent.pk).body, '')
+
+        EmailOutbox.objects.update(created_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(purge_emails(retention_days=30), 1)
+        self.assertEqual(list(EmailOutbox.objects.values_list('pk', flat=True)), [pending.pk])  # not sent yet
+
+    def test_reclaims_emails_of_a_dead_worker(self):
+        email = enqueue_email('user@example.com', 'Subject', 'Body')
+        self.assertEqual([claimed.pk for claimed in claim_batch()], [email.pk])
+        self.assertEqual(claim_batch(), [])  # claimed by a worker that never finished
+
+        EmailOutbox.objects.filter(pk=email.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(send_pending_emails(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp-tests'},
+    },
+    OTP_TTL=600, OTP_MAX_ATTEMPTS=3, OTP_EMAIL_RATE=(2, 300), OTP_IP_RATE=(3, 60),
+    OTP_VERIFY_EMAIL_RATE=(4, 60), OTP_VERIFY_IP_RATE=(6, 60), OTP_CLIENT_IP_HEADER='',
+)
+class OTPTests(TestCase):
+    def setUp(self):
+        caches['otp'].clear()
+        self.client = APIClient()
+
+    def create_pending_user(self, email):
+        return CustomUser.objects.create_user(
+            email=email, password='pass12345', username=email.split('@')[0], is_active=False
+        )
+
+    def test_signup_then_verify_with_the_emailed_code(self):
+        response = self.client.post('/api/signup/', {
+            'username': 'newstudent', 'email': 'new@example.com', 'password': 'pass12345', 'KTUID': 'NEW21CS001',
+            'semester': 'semester_1', 'degree': 'B.Tech', 'targeted_cgpa': 8.5,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        code = EmailOutbox.objects.get().body.split()[3].rstrip('.')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/verify-otp/', {'email': 'new@example.com', 'otp': code}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(CustomUser.objects.get(email='new@example.com').is_active)
+        self.assertEqual(
+            [query['sql'].split()[0] for query in queries.captured_queries],
+            ['SELECT', 'UPDATE', 'SELECT', 'DELETE', 'UPDATE'],  # user, attempt counter, activation
+        )
+
+        response = self.client.post('/api/verify-otp/', {'email': 'new@example.com', 'otp': code}, format='json')
+        self.assertEqual(response.status_code, 400)  # consumed
+
+    def test_only_a_hash_of_the_code_is_cached(self):
+        code = issue_otp('user@example.com')
+        cache = caches['otp']
+        stored = [cache.get(key) for key in cache._cache]
+        self.assertNotIn(str(code), repr(stored))
+        self.assertNotIn('user@example.com', repr(list(cache._cache)))
+
+    def test_attempts_are_limited(self):
+        code = issue_otp('user@example.com')
+        self.assertEqual(verify_otp('user@example.com', code + 1), INVALID)
+        self.assertEqual(verify_otp('user@example.com', code + 2), INVALID)
+        self.assertEqual(verify_otp('user@example.com', code + 3), LOCKED)
+        self.assertEqual(verify_otp('user@example.com', code), EXPIRED)
+
+    def test_counters_of_expired_otps_are_purged(self):
+        issue_otp('user@example.com')
+        issue_otp('later@example.com')
+        OTPAttempts.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        issue_otp('later@example.com')
+
+        self.assertEqual(purge_otp_attempts(), 1)
+        self.assertEqual(verify_otp('user@example.com', 1), EXPIRED)
+        self.assertEqual(verify_otp('later@example.com', 1), INVALID)
+
+    def test_verification_is_throttled(self):
+        self.create_pending_user('pending@example.com')
+        data = {'email': 'pending@example.com', 'otp': '1'}
+        statuses = [self.client.post('/api/verify-otp/', data, format='json').status_code for _ in range(5)]
+        self.assertEqual(statuses, [400, 400, 400, 400, 429])
+
+        for index in range(2):  # the IP bucket has 2 of its 6 tokens left
+            self.create_pending_user(f'other{index}@example.com')
+            response = self.client.post(
+                '/api/verify-otp/', {'email': f'other{index}@example.com', 'otp': '1'}, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/verify-otp/', {'email': 'other0@example.com', 'otp': '1'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_otp_expires(self):
+        code = issue_otp('user@example.com')
+        self.assertEqual(verify_otp('User@Example.com ', code), VERIFIED)
+
+        code = issue_otp('user@example.com')
+        with mock.patch('accounts.otp.time.time', return_value=time.time() + 601):
+            self.assertEqual(verify_otp('user@example.com', code), EXPIRED)
+
+    def test_resend_is_throttled_per_email(self):
+        self.create_pending_user('pending@example.com')
+        statuses = [
+            self.client.post('/api/resend-otp/', {'email': 'pending@example.com'}, format='json').status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+        response = self.client.post('/api/resend-otp/', {'email': 'pending@example.com'}, format='json')
+        self.assertGreater(int(response['Retry-After']), 0)
+        with mock.patch('accounts.otp.time.time', return_value=time.time() + 301):
+            response = self.client.post('/api/resend-otp/', {'email': 'pending@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_resend_is_throttled_per_ip(self):
+        statuses = []
+        for index in range(4):
+            self.create_pending_user(f'pending{index}@example.com')
+            statuses.append(self.client.post(
+                '/api/resend-otp/', {'email': f'pending{index}@example.com'}, format='json', REMOTE_ADDR='10.0.0.1'
+            ).status_code)
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        response = self.client.post(
+            '/api/resend-otp/', {'email': 'pending3@example.com'}, format='json', REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(OTP_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_client_ip_comes_from_the_proxy_header(self):
+        def resend(email, forwarded_for):
+            return self.client.post(
+                '/api/resend-otp/', {'email': email}, format='json',
+                REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR=forwarded_for,
+            ).status_code
+
+        statuses = []
+        for index in range(4):
+            self.create_pending_user(f'pending{index}@example.com')
+            # The first entry is set by the client and ignored
+            statuses.append(resend(f'pending{index}@example.com', f'192.0.2.{index}, 203.0.113.1'))
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(resend('pending3@example.com', '203.0.113.2'), 200)  # another client, same proxy
+
+
+class ConfiguredOTPCacheTests(TransactionTestCase):
+    """verify_otp with the 'otp' cache of settings.py, its files kept in a temporary directory"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        otp_cache = dict(settings.CACHES['otp'], LOCATION=tmpdir.name)
+        override = override_settings(CACHES=dict(settings.CACHES, otp=otp_cache))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_attempts_are_limited(self):
+        max_attempts = settings.OTP_MAX_ATTEMPTS
+        code = issue_otp('user@example.com')
+        results = [verify_otp('user@example.com', code + offset) for offset in range(1, max_attempts + 1)]
+        self.assertEqual(results, [INVALID] * (max_attempts - 1) + [LOCKED])
+        self.assertEqual(verify_otp('user@example.com', code), EXPIRED)
+
+        code = issue_otp('user@example.com')
+        self.assertEqual(verify_otp('user@example.com', code), VERIFIED)
+
+    def test_parallel_guesses_share_the_attempt_limit(self):
+        code = issue_otp('user@example.com')
+        barrier = threading.Barrier(20)
+        results = []
+
+        def guess(offset):
+            barrier.wait()
+            try:
+                results.append(verify_otp('user@example.com', code + offset))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=guess, args=(offset,)) for offset in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 20)
+        # Only OTP_MAX_ATTEMPTS guesses were compared, the last of them locking the OTP
+        self.assertLessEqual(results.count(INVALID), settings.OTP_MAX_ATTEMPTS - 1)
+        self.assertIn(LOCKED, results)
+        self.assertEqual(verify_otp('user@example.com', code), EXPIRED)
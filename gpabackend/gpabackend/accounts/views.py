@@ -12,12 +12,16 @@ from django.db import models
 from django.db.models import Q
 from django.core.exceptions import ValidationError
 from rest_framework.decorators import api_view, permission_classes
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
-import random
 import logging
+import math
 from django.contrib.auth import get_user_model
 from .authentication import InactiveUserJWTAuthentication
+from .otp import (
+    EXPIRED, LOCKED, VERIFIED, client_ip, issue_otp, throttle_otp_check, throttle_otp_request, verify_otp,
+)
+from .outbox import enqueue_email
 
 logger = logging.getLogger(__name__)
 
@@ -34,67 +38,56 @@ class SignUpView(APIView):
 
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            user.is_active = False
-            user.has_seen_increment_notification=True  # Deactivate user until OTP is verified
-            user.save()
+            # The OTP email is queued with the user, so a rolled-back signup never sends one
+            with transaction.atomic():
+                user = serializer.save()
+                user.is_active = False
+                user.has_seen_increment_notification=True  # Deactivate user until OTP is verified
+                user.save()
 
-            # Generate OTP
-            otp = random.randint(100000, 999999)
-            user.otp = otp  # Assuming `otp` is a field in the `CustomUser` model
-            user.save()
+                # Generate OTP (kept in the cache, see accounts/otp.py)
+                otp = issue_otp(user.email)
+
+                # Delivered by the email worker (run_email_worker)
+                enqueue_email(
+                    user.email,
+                    "Your OTP for Email Verification",
+                    f"Your OTP is {otp}. Please use this to verify your email.",
+                )
 
             # Generate a temporary token
             token = RefreshToken.for_user(user).access_token
 
-            # Try to send OTP via email, but don't fail if it doesn't work
-            try:
-                send_mail(
-                    subject="Your OTP for Email Verification",
-                    message=f"Your OTP is {otp}. Please use this to verify your email.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                )
-                email_sent = True
-                message = 'User created. OTP sent to email.'
-            except Exception as email_error:
-                print(f"Email sending failed: {email_error}")
-                # For development, we can skip email verification
-                user.is_active = True  # Activate user immediately if email fails
-                user.save()
-                email_sent = False
-                message = 'User created. Email service unavailable, account activated automatically.'
-
             return Response({
-                'message': message,
-                'email_sent': email_sent,
+                'message': 'User created. OTP sent to email.',
+                'email_sent': True,  # Queued for delivery
                 'token': str(token)  # Send the token to the frontend
             }, status=status.HTTP_201_CREATED)
         else:
             # Log serializer validation errors to assist debugging
-            print("SignUp serializer errors:", serializer.errors)
+            logger.debug("SignUp serializer errors: %s", serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class LoginView(APIView):
+    permission_classes = [AllowAny]
+
     def post(self, request):
-        print("\n===== NEW LOGIN REQUEST =====")
-        print("Request data:", request.data)
-        print("Request headers:", request.headers)
+        logger.debug("New login request")
+        logger.debug("Request data: %s", request.data)
+        logger.debug("Request headers: %s", request.headers)
         
         email = request.data.get('email')
         password = request.data.get('password')
-        print(f"Attempting login for email: {email}")
+        logger.debug("Attempting login for email: %s", email)
 
         user = authenticate(request, email=email, password=password)
         
         if user is not None:
-            print(f"\nUSER FOUND - Details:")
-            print(f"Email: {user.email}")
-            print(f"Username: {user.username}")
-            print(f"is_faculty: {user.is_faculty}")
-            print(f"is_active: {user.is_active}")
-            print(f"Last login: {user.last_login}")
+            logger.debug(
+                "User found - email: %s, username: %s, is_faculty: %s, is_active: %s, last login: %s",
+                user.email, user.username, user.is_faculty, user.is_active, user.last_login,
+            )
             
             refresh = RefreshToken.for_user(user)
             response_data = {
@@ -105,12 +98,11 @@ class LoginView(APIView):
                 'user_id': user.id,
                 'email': user.email,
             }
-            print("\nRESPONSE DATA BEING SENT:")
-            print(response_data)
+            logger.debug("Response data: %s", response_data)
             
             return Response(response_data, status=status.HTTP_200_OK)
         else:
-            print("\nAUTHENTICATION FAILED")
+            logger.debug("Authentication failed for email: %s", email)
             return Response({'error': 'Invalid credentials'}, 
                           status=status.HTTP_401_UNAUTHORIZED)
 
@@ -118,26 +110,26 @@ class FacultySignUpView(APIView):
     permission_classes = [AllowAny]  # Allow anyone to access this endpoint
 
     def post(self, request):
-        print("Faculty signup request received:", request.data)  # Log request data
+        logger.debug("Faculty signup request received: %s", request.data)
 
         required_fields = ['username', 'email', 'password','KTUID', 'college_code']
         missing_fields = [field for field in required_fields if field not in request.data]
         if missing_fields:
             response_data = {'error': f'Missing required fields: {", ".join(missing_fields)}'}
-            print("Faculty signup response data:", response_data)  # Log response data
+            logger.debug("Faculty signup response data: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         # Validate email uniqueness
         if CustomUser.objects.filter(email=request.data['email']).exists():
             response_data = {'error': 'Email is already in use'}
-            print("Faculty signup response data:", response_data)  # Log response data
+            logger.debug("Faculty signup response data: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         # Validate college code
         college_code = request.data.get('college_code')
         if not college_code or len(college_code) != 3:  # Updated validation for 3-character codes
             response_data = {'error': 'Invalid college code'}
-            print("Faculty signup response data:", response_data)  # Log response data
+            logger.debug("Faculty signup response data: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         # Create the faculty user
@@ -158,11 +150,11 @@ class FacultySignUpView(APIView):
                 'access': str(refresh.access_token),
                 'refresh': str(refresh)
             }
-            print("Faculty signup response data:", response_data)  # Log response data
+            logger.debug("Faculty signup response data: %s", response_data)
             return Response(response_data, status=status.HTTP_201_CREATED)
         except Exception as e:
             response_data = {'error': str(e)}
-            print("Faculty signup response data:", response_data)  # Log response data
+            logger.exception("Faculty signup failed")
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
 class IsFacultyView(APIView):
@@ -170,14 +162,14 @@ class IsFacultyView(APIView):
 
     def get(self, request):
         user = request.user  # Get the authenticated user
-        print(f"Fetching is_faculty status for user: {user.email}")  # Log user details
+        logger.debug("Fetching is_faculty status for user: %s", user.email)
 
         response_data = {
             'user_id': user.id,
             'email': user.email,
             'is_faculty': user.is_faculty,  # Return the is_faculty status
         }
-        print("Response data:", response_data)  # Log the response
+        logger.debug("Response data: %s", response_data)
         return Response(response_data, status=status.HTTP_200_OK)
 
 
@@ -186,14 +178,14 @@ class IsAdminView(APIView):
 
     def get(self, request):
         user = request.user  # Get the authenticated user
-        print(f"Fetching is_faculty status for user: {user.email}")  # Log user details
+        logger.debug("Fetching is_faculty status for user: %s", user.email)
 
         response_data = {
             'user_id': user.id,
             'email': user.email,
             'is_superuser': user.is_superuser,  # Return the is_faculty status
         }
-        print("Response data:", response_data)  # Log the response
+        logger.debug("Response data: %s", response_data)
         return Response(response_data, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
@@ -373,6 +365,13 @@ def update_honor_status(request):
 
 
 
+def too_many_requests(message, wait):
+    """429 response asking the client to retry after wait seconds"""
+    response = Response({'error': message}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
 class VerifyOTPView(APIView):
     permission_classes = [AllowAny]  # Allow access without authentication
 
@@ -384,23 +383,31 @@ class VerifyOTPView(APIView):
         if not email or not otp:
             return Response({'error': 'Email and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
+        wait = throttle_otp_check(email, client_ip(request))
+        if wait:
+            return too_many_requests('Too many verification attempts. Please try again later.', wait)
+
         # Find the user by email
         user = User.objects.filter(email=email).first()
         if not user:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Check if the OTP matches
         try:
-            if user.otp == int(otp):
-                user.is_active = True  # Activate the user
-                user.otp = None  # Clear the OTP after successful verification
-                user.save()
-                return Response({'message': 'Email verified successfully!'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
-        except ValueError:
+            otp = int(otp)
+        except (TypeError, ValueError):
             return Response({'error': 'Invalid OTP format'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Check if the OTP matches; a successful check consumes it
+        result = verify_otp(user.email, otp)
+        if result == VERIFIED:
+            User.objects.filter(pk=user.pk).update(is_active=True)  # Activate the user
+            return Response({'message': 'Email verified successfully!'}, status=status.HTTP_200_OK)
+        if result == EXPIRED:
+            return Response({'error': 'OTP expired or not requested. Please request a new one.'}, status=status.HTTP_400_BAD_REQUEST)
+        if result == LOCKED:
+            return Response({'error': 'Too many invalid attempts. Please request a new OTP.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class ResendOTPView(APIView):
     permission_classes = [AllowAny]
@@ -415,24 +422,16 @@ class ResendOTPView(APIView):
         if user.is_active:
             return Response({'error': 'User is already verified'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Generate a new OTP
-        otp = random.randint(100000, 999999)
-        user.otp = otp
-        user.save()
+        wait = throttle_otp_request(user.email, client_ip(request))
+        if wait:
+            return too_many_requests('Too many OTP requests. Please try again later.', wait)
 
-        # Try to send the new OTP via email
-        try:
-            send_mail(
-                subject="Your OTP for Email Verification",
-                message=f"Your new OTP is {otp}. Please use this to verify your email.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-            )
-            return Response({'message': 'A new OTP has been sent to your email.'}, status=status.HTTP_200_OK)
-        except Exception as email_error:
-            print(f"Email sending failed: {email_error}")
-            # For development, activate the user if email fails
-            user.is_active = True
-            user.save()
-            return Response({'message': 'Email service unavailable. Account activated automatically.'}, status=status.HTTP_200_OK)
+        # Generate a new OTP, replacing the previous one
+        otp = issue_otp(user.email)
+        enqueue_email(
+            user.email,
+            "Your OTP for Email Verification",
+            f"Your new OTP is {otp}. Please use this to verify your email.",
+        )
+        return Response({'message': 'A new OTP has been sent to your email.'}, status=status.HTTP_200_OK)
 
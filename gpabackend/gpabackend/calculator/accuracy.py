@@ -0,0 +1,124 @@
+"""
+Online accuracy tracking for the CGPA model.
+
+The model predicts a student's final CGPA, so a prediction can be scored once
+the student has a GPA recorded for the final semester. score_predictions
+works through unscored predictions of such students in primary-key batches:
+
+  1. one UPDATE copies CustomUser.cgpa into actual_cgpa through a correlated
+     subquery and stamps scored_at, claiming the batch;
+  2. one grouped aggregate over the claimed rows sums their errors per model
+     version and cohort;
+  3. each group's sums are added to its ModelAccuracy row with F() increments.
+
+Every prediction is counted exactly once and no step rescans the history, so
+the cost of a run depends only on the number of newly scorable predictions.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Abs, Power
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from .models import CGPAPrediction, ModelAccuracy, Semester
+
+FINAL_SEMESTER = 'semester_8'
+
+
+def finished_students():
+    """Ids of students with a GPA recorded for the final semester, whose CGPA is final"""
+    return Semester.objects.filter(semester=FINAL_SEMESTER, gpa__isnull=False).values('user_id')
+
+
+def scorable_predictions():
+    """Unscored predictions of students whose final CGPA is known"""
+    return CGPAPrediction.objects.filter(
+        scored_at__isnull=True, user_id__in=finished_students(), user__cgpa__isnull=False
+    )
+
+
+def score_batch(prediction_ids):
+    """
+    Backfill actual_cgpa for the given predictions and add their errors to
+    ModelAccuracy. Returns the number of predictions scored.
+    """
+    # The timestamp doubles as a claim token: rows scored concurrently by
+    # another run keep their own scored_at and are not counted twice
+    scored_at = timezone.now()
+    with transaction.atomic():
+        claimed = CGPAPrediction.objects.filter(pk__in=prediction_ids, scored_at__isnull=True).update(
+            actual_cgpa=Subquery(CustomUser.objects.filter(pk=OuterRef('user_id')).values('cgpa')[:1]),
+            scored_at=scored_at,
+        )
+        if not claimed:
+            return 0
+
+        error = F('predicted_cgpa') - F('actual_cgpa')
+        groups = CGPAPrediction.objects.filter(pk__in=prediction_ids, scored_at=scored_at).values(
+            'model_version', 'user__degree'
+        ).annotate(
+            n=Count('id'),
+            sum_error=Sum(error),
+            sum_abs_error=Sum(Abs(error)),
+            sum_squared_error=Sum(Power(error, 2)),
+        ).order_by()
+
+        for group in groups:
+            accuracy, _ = ModelAccuracy.objects.get_or_create(
+                model_version=group['model_version'], cohort=group['user__degree'] or ''
+            )
+            ModelAccuracy.objects.filter(pk=accuracy.pk).update(
+                count=F('count') + group['n'],
+                sum_error=F('sum_error') + group['sum_error'],
+                sum_abs_error=F('sum_abs_error') + group['sum_abs_error'],
+                sum_squared_error=F('sum_squared_error') + group['sum_squared_error'],
+                updated_at=scored_at,
+            )
+    return claimed
+
+
+def score_predictions(batch_size=1000):
+    """Score every currently scorable prediction. Returns the number scored."""
+    scored = 0
+    while True:
+        prediction_ids = list(scorable_predictions().order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not prediction_ids:
+            return scored
+        scored += score_batch(prediction_ids)
+
+
+def _summary(count, sum_error, sum_abs_error, sum_squared_error):
+    if not count:
+        return {'count': 0, 'mae': None, 'rmse': None, 'bias': None}
+    return {
+        'count': count,
+        'mae': round(sum_abs_error / count, 4),
+        'rmse': round((sum_squared_error / count) ** 0.5, 4),
+        'bias': round(sum_error / count, 4),
+    }
+
+
+def accuracy_report(registry=None):
+    """
+    Live error of each model version, overall and per cohort. With a model
+    registry, each version's live MAE is compared to the MAE it was trained with.
+    """
+    versions = {}
+    for row in ModelAccuracy.objects.all():
+        totals = versions.setdefault(row.model_version, {'sums': [0, 0.0, 0.0, 0.0], 'cohorts': []})
+        for index, value in enumerate((row.count, row.sum_error, row.sum_abs_error, row.sum_squared_error)):
+            totals['sums'][index] += value
+        totals['cohorts'].append(dict(
+            _summary(row.count, row.sum_error, row.sum_abs_error, row.sum_squared_error), cohort=row.cohort
+        ))
+
+    report = []
+    for version, totals in versions.items():
+        entry = dict(_summary(*totals['sums']), model_version=version or None, cohorts=totals['cohorts'])
+        training_mae = None
+        if registry is not None and version:
+            training_mae = registry.metadata(version).get('metrics', {}).get('mae')
+        entry['training_mae'] = training_mae
+        entry['mae_drift'] = round(entry['mae'] - training_mae, 4) if training_mae is not None else None
+        report.append(entry)
+    return report
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CalculatorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calculator'
+
+    def ready(self):
+        # The predictor is preloaded by the WSGI/ASGI entry points, not here, so
+        # migrate and other management commands never load the prediction stack
+        from . import signals  # noqa: F401  Connect the UserFeatures update handlers
@@ -0,0 +1,55 @@
+"""
+Timing helpers shared by the benchmark management commands.
+"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+from django.conf import settings
+
+
+def time_calls(func, iterations):
+    """Run func repeatedly and return per-call latencies in milliseconds"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def percentiles(timings, points=(50, 95, 99)):
+    """Map e.g. 'p50' to the latency percentile of timings"""
+    return {f'p{p}': float(v) for p, v in zip(points, np.percentile(timings, points))}
+
+
+# Python statement that loads Django and the full URLconf, as a web worker does on startup
+URLCONF_IMPORT = 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns'
+
+
+def import_profile(statement=URLCONF_IMPORT, settings_module='gpabackend.settings'):
+    """
+    Run statement in a fresh interpreter under `python -X importtime`.
+
+    Returns:
+        dict: module name -> {'self_us', 'cumulative_us', 'depth'}, where depth 0
+            marks modules imported directly rather than by another import
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = {
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        }
+    return modules
@@ -1,178 +1,525 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+import logging
 import pickle
 import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
 from django.conf import settings
 
+from .datasets import FeatureDataset
+from .feature_store import grade_distributions
+from .features import FEATURE_COLUMNS
+from .model_registry import ModelRegistry
+from .predictor_backends import DEFAULT_BACKEND, compile_evaluator, make_estimator
+from .synthetic import SyntheticStudents
+
+logger = logging.getLogger(__name__)
+
+# The model being served, swapped as a whole so a request never mixes two versions
+ActiveModel = namedtuple('ActiveModel', ['model', 'evaluator', 'version'])
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a per-entry time-to-live, used to reuse
+    predictions for identical feature vectors
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
+
+
 class CGPAPredictor:
     def __init__(self):
-        self.model = None
-        self.feature_columns = [
-            'num_S', 'num_A', 'num_B', 'num_C', 'num_D', 'num_F', 
-            'study_hours_per_week', 'participated_in_events', 'project_count', 
-            'internship_experience', 'travel_time_minutes', 'lives_in_pg_or_hostel', 
-            'previous_board_cgpa'
-        ]
-        self.model_path = os.path.join(settings.BASE_DIR, 'calculator', 'cgpa_model.pkl')
+        self.active = ActiveModel(None, None, None)
+        self.cache = PredictionCache(
+            maxsize=getattr(settings, 'CGPA_PREDICTION_CACHE_SIZE', 1024),
+            ttl=getattr(settings, 'CGPA_PREDICTION_CACHE_TTL', 300),
+        )
+        self.feature_columns = list(FEATURE_COLUMNS)
+        self.registry = ModelRegistry(getattr(
+            settings, 'CGPA_MODEL_REGISTRY_DIR',
+            os.path.join(settings.BASE_DIR, 'calculator', 'model_registry')
+        ))
+        # Model bundled with the repository, imported as the first registry version
+        self.legacy_model_path = os.path.join(settings.BASE_DIR, 'calculator', 'cgpa_model.pkl')
+        self.model_metadata = {}
+        self._pointer_stamp = None
         
-    def create_synthetic_dataset(self, n_students=500):
+    @property
+    def model(self):
+        return self.active.model
+
+    @property
+    def model_version(self):
+        return self.active.version
+
+    @property
+    def evaluator(self):
+        """Fast evaluator compiled from self.model, when supported"""
+        return self.active.evaluator
+
+    def current_model(self):
+        """
+        Hot-swap if needed and return the ActiveModel to serve a request with.
+        Pass it to the predict methods and record its version, so everything a
+        request returns and stores comes from the same model even if another
+        thread swaps in a new one meanwhile.
+        """
+        self.refresh_if_stale()
+        return self.active
+
+    def create_synthetic_dataset(self, n_students=500, seed=42):
         """Create synthetic dataset for training the model"""
-        np.random.seed(42)
-        data = {
-            'num_S': np.random.randint(0, 10, n_students),
-            'num_A': np.random.randint(0, 10, n_students),
-            'num_B': np.random.randint(0, 10, n_students),
-            'num_C': np.random.randint(0, 8, n_students),
-            'num_D': np.random.randint(0, 5, n_students),
-            'num_F': np.random.randint(0, 3, n_students),
-            'study_hours_per_week': np.random.normal(12, 4, n_students).clip(2, 25),
-            'participated_in_events': np.random.choice([0, 1], n_students),
-            'project_count': np.random.randint(0, 5, n_students),
-            'internship_experience': np.random.choice([0, 1], n_students, p=[0.6, 0.4]),
-            'travel_time_minutes': np.random.randint(10, 120, n_students),
-            'lives_in_pg_or_hostel': np.random.choice([0, 1], n_students),
-            'previous_board_cgpa': np.random.normal(8, 0.8, n_students).clip(5.0, 10.0),
-        }
+        return pd.DataFrame(SyntheticStudents(seed).features(n_students))
+
+    def feature_dataset(self):
+        """On-disk dataset of real student features built by build_feature_dataset"""
+        return FeatureDataset(getattr(
+            settings, 'CGPA_FEATURE_DATASET_DIR',
+            os.path.join(settings.BASE_DIR, 'calculator', 'feature_dataset')
+        ))
+
+    def training_source(self):
+        """
+        'dataset' once enough real students have been extracted, otherwise 'synthetic'
+        """
+        min_rows = getattr(settings, 'CGPA_MIN_TRAINING_ROWS', 200)
+        dataset = self.feature_dataset()
+        # Real-student datasets can hold several rows per student (see feature_pipeline)
+        rows = dataset.count_distinct('user_id') if 'user_id' in dataset.columns else dataset.rows
+        return 'dataset' if rows >= min_rows else 'synthetic'
 
-        df = pd.DataFrame(data)
-
-        # Final CGPA calculation (mock formula)
-        df['final_cgpa'] = (
-            0.9 * df['num_S'] +
-            0.6 * df['num_A'] +
-            0.5 * df['num_B'] +
-            0.6 * df['num_C'] -
-            0.9 * df['num_F'] +
-            0.03 * df['project_count'] +
-            0.1 * df['internship_experience'] +
-            0.02 * df['study_hours_per_week'] +
-            0.02 * df['participated_in_events'] -
-            0.05 * df['travel_time_minutes'] +
-            0.15 * df['previous_board_cgpa']
-        ).clip(5, 10)
-
-        return df
-
-    def train_model(self):
-        """Train the CGPA prediction model"""
-        # Create synthetic dataset
-        df = self.create_synthetic_dataset()
+    def training_data(self, source=None):
+        """Return the (X, y) training set from the given or the default source"""
+        source = source or self.training_source()
+        if source == 'dataset':
+            dataset = self.feature_dataset()
+            latest_by = 'user_id' if 'user_id' in dataset.columns else None  # latest row of re-extracted students
+            df = pd.DataFrame(dataset.load(self.feature_columns + ['final_cgpa'], latest_by=latest_by))
+        else:
+            # Create synthetic dataset
+            df = self.create_synthetic_dataset()
         
         # Define input features and target
         X = df[self.feature_columns]
         y = df['final_cgpa']
+        return X, y
+
+    def train_model(self, backend=None):
+        """
+        Train the CGPA prediction model
+        
+        Args:
+            backend (str): Model family from predictor_backends.BACKENDS,
+                defaulting to the CGPA_PREDICTOR_BACKEND setting
+        """
+        backend = backend or getattr(settings, 'CGPA_PREDICTOR_BACKEND', DEFAULT_BACKEND)
+        source = self.training_source()
+        X, y = self.training_data(source)
 
         # Split into training and test sets
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
 
-        # Train Random Forest Regressor (best performing model from notebook)
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.model.fit(X_train, y_train)
+        model = make_estimator(backend)
+        model.fit(X_train, y_train)
 
         # Evaluate model
-        y_pred = self.model.predict(X_test)
+        y_pred = model.predict(X_test)
         mae = mean_absolute_error(y_test, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test, y_pred))
         r2 = r2_score(y_test, y_pred)
 
-        print(f"Model Performance:")
-        print(f"MAE: {mae:.4f}")
-        print(f"RMSE: {rmse:.4f}")
-        print(f"R²: {r2:.4f}")
+        logger.info("Model performance - MAE: %.4f RMSE: %.4f R²: %.4f", mae, rmse, r2)
 
-        # Save the trained model
-        self.save_model()
-        
-        return {
+        metrics = {
             'mae': mae,
             'rmse': rmse,
             'r2': r2
         }
 
-    def save_model(self):
-        """Save the trained model to disk"""
+        # Publish the trained model, then serve it
+        self.publish_model(model, metrics=metrics, training_size=len(X_train), backend=backend, data_source=source)
+        
+        return metrics
+
+    def search_model(self, budget_seconds, backends=None, folds=5, max_workers=None):
+        """
+        Run a cross-validated hyperparameter search across a process pool,
+        refit the best candidate on the full training set and publish it
+        together with the complete results table
+        
+        Args:
+            budget_seconds (float): Wall-clock time allowed for starting candidates
+            backends (list): Model families to search, defaulting to all of model_search.SEARCH_SPACE
+            folds (int): Cross-validation folds per candidate
+            max_workers (int): Worker processes, defaulting to the number of CPUs
+        """
+        from .model_search import run_search
+
+        source = self.training_source()
+        X, y = self.training_data(source)
+        search = run_search(X, y, budget_seconds, backends=backends, folds=folds, max_workers=max_workers)
+        if not search['results']:
+            raise RuntimeError("No search candidate finished within the budget")
+
+        best = search['results'][0]
+        model = make_estimator(best['backend'], **best['params'])
+        model.fit(X, y)
+
+        logger.info(
+            "Search evaluated %d candidates (%d skipped) in %.1fs",
+            len(search['results']), search['skipped'], search['elapsed_seconds'],
+        )
+        logger.info("Best: %s %s MAE: %.4f R²: %.4f", best['backend'], best['params'], best['mae'], best['r2'])
+
+        metrics = {'mae': best['mae'], 'rmse': best['rmse'], 'r2': best['r2']}
+        self.publish_model(
+            model, metrics=metrics, training_size=len(X), backend=best['backend'], data_source=source,
+            params=best['params'], search=dict(search, budget_seconds=budget_seconds, folds=folds),
+        )
+        return metrics
+
+    def save_model(self, metrics=None, training_size=None, backend=None, data_source=None, **extra_metadata):
+        """
+        Publish the model in memory as a new registry version (see publish_model)
+        """
         if self.model:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(self.model, f)
-            print(f"Model saved to {self.model_path}")
-
-    def load_model(self):
-        """Load the trained model from disk"""
-        if os.path.exists(self.model_path):
-            with open(self.model_path, 'rb') as f:
-                self.model = pickle.load(f)
-            print("Model loaded successfully")
-            return True
-        else:
-            print("No saved model found. Training new model...")
-            self.train_model()
-            return True
+            return self.publish_model(
+                self.model, metrics=metrics, training_size=training_size, backend=backend,
+                data_source=data_source, **extra_metadata
+            )
+
+    def publish_model(self, model, metrics=None, training_size=None, backend=None, data_source=None,
+                      **extra_metadata):
+        """
+        Publish a trained model as a new registry version, make it current and
+        only then start serving it, so no prediction is made or cached without
+        a version. Other workers notice the new `current` pointer and swap it in
+        on their next prediction.
+        """
+        metadata = {
+            'model_class': type(model).__name__,
+            'backend': backend,
+            'feature_columns': self.feature_columns,
+            'metrics': {name: float(value) for name, value in (metrics or {}).items()},
+            'training_size': training_size,
+            'data_source': data_source,
+            **extra_metadata,
+        }
+        version = self.registry.publish(model, metadata)
+        self.set_model(model, version=version)
+        self.model_metadata = self.registry.metadata(version)
+        self._pointer_stamp = self.registry.pointer_stamp()
+        logger.info("Model version %s saved to %s", version, self.registry.root)
+        return version
+
+    def refresh_if_stale(self):
+        """
+        Hot-swap the model when another process has published a new current version.
+        Costs one stat() call when nothing changed.
+        """
+        if self.model is None:
+            return self.load_model()
+        stamp = self.registry.pointer_stamp()
+        if stamp is None or stamp == self._pointer_stamp:
+            return False
+        self._pointer_stamp = stamp
+        if self.registry.current_version() == self.model_version:
+            return False
+        return self.load_model()
+
+    def load_model(self, version=None):
+        """Load the current (or the given) model version from the registry"""
+        if version is None and self.registry.current_version() is None:
+            if os.path.exists(self.legacy_model_path):
+                # Seed the registry with the model shipped in the repository
+                logger.info("Importing legacy model into the registry...")
+                with open(self.legacy_model_path, 'rb') as f:
+                    model = pickle.load(f)
+                self.registry.publish(model, {
+                    'model_class': type(model).__name__,
+                    'feature_columns': self.feature_columns,
+                    'source': os.path.basename(self.legacy_model_path),
+                })
+            else:
+                logger.info("No saved model found. Training new model...")
+                self.train_model()
+                return True
+
+        stamp = self.registry.pointer_stamp()
+        model, metadata = self.registry.load(version)
+        self.set_model(model, version=metadata['version'])
+        self.model_metadata = metadata
+        self._pointer_stamp = stamp
+        logger.info("Model version %s loaded successfully", self.model_version)
+        return True
+
+    def set_model(self, model, version=None):
+        """
+        Install a fitted model and drop every cached prediction made by the previous one
+        """
+        self.active = ActiveModel(model, compile_evaluator(model), version)
+        self.model_metadata = {'version': version} if version else {}
+        self.cache.clear()
+
+    def predict_raw(self, matrix, active=None):
+        """
+        Unclipped model output for a feature matrix.
+        Uses the flattened forest when available, which skips sklearn's
+        per-call validation and joblib dispatch.
+        """
+        active = active or self.active
+        if active.evaluator is not None:
+            return active.evaluator.predict(matrix)
+        return active.model.predict(np.asarray(matrix, dtype=float))
+
+    def canonical_features(self, input_features):
+        """
+        Return the feature vector as a hashable tuple in feature_columns order,
+        so equivalent inputs (e.g. 1, 1.0 and True) share one cache entry
+        """
+        values = []
+        for feature in self.feature_columns:
+            if feature not in input_features:
+                raise ValueError(f"Missing required feature: {feature}")
+            values.append(round(float(input_features[feature]), 6))
+        return tuple(values)
 
-    def predict_cgpa(self, input_features):
+    def predict_cgpa(self, input_features, active=None):
         """
         Predict CGPA based on input features
-        
+
         Args:
             input_features (dict): Dictionary containing all required features
-            
+            active (ActiveModel): Model to use, from current_model() (the current one by default)
+
         Returns:
             float: Predicted CGPA
         """
-        if self.model is None:
-            self.load_model()
+        active = active or self.current_model()
 
         # Ensure all required features are present
-        feature_values = []
-        for feature in self.feature_columns:
-            if feature not in input_features:
-                raise ValueError(f"Missing required feature: {feature}")
-            feature_values.append(input_features[feature])
+        feature_values = self.canonical_features(input_features)
+
+        cache_key = (active.version, feature_values)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         # Make prediction
-        prediction = self.model.predict([feature_values])[0]
+        prediction = self.predict_raw([feature_values], active)[0]
         
         # Ensure prediction is within valid range (5.0 - 10.0)
-        prediction = max(5.0, min(10.0, prediction))
-        
-        return round(prediction, 2)
+        prediction = round(float(max(5.0, min(10.0, prediction))), 2)
+
+        self.cache.set(cache_key, prediction)
+        return prediction
 
-    def calculate_grade_distribution(self, user_semesters):
+    def explain(self, input_features, active=None):
         """
-        Calculate grade distribution from user's semester data
-        
+        Per-feature contributions to the model output for one input
+            
         Args:
-            user_semesters: QuerySet of user's semesters
+            input_features (dict): Dictionary containing all required features
+            active (ActiveModel): Model to use (see predict_cgpa)
             
         Returns:
-            dict: Grade distribution counts
+            dict: 'base_value' (the model's average output) and 'contributions'
+                mapping each feature to how much it moved the prediction; together
+                they add up to the unclipped model output
+        """
+        active = active or self.current_model()
+        if active.evaluator is None or not hasattr(active.evaluator, 'contributions'):
+            raise ValueError(f"Explanations are not available for {type(active.model).__name__} models")
+
+        feature_values = self.canonical_features(input_features)
+        cache_key = (active.version, 'explain', feature_values)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        bias, contributions = active.evaluator.contributions([feature_values])
+        explanation = {
+            'base_value': round(float(bias), 4),
+            'contributions': {
+                feature: round(float(value), 4)
+                for feature, value in zip(self.feature_columns, contributions[0])
+            },
+        }
+        self.cache.set(cache_key, explanation)
+        return explanation
+
+    def _predict_with_interval(self, matrix, active):
+        if not hasattr(active.evaluator, 'predict_with_interval'):
+            raise ValueError(f"Prediction intervals are not available for {type(active.model).__name__} models")
+        coverage = getattr(settings, 'CGPA_PREDICTION_INTERVAL_COVERAGE', 0.9)
+        predictions, lower, upper = active.evaluator.predict_with_interval(matrix, coverage)
+        predictions = [round(float(p), 2) for p in np.clip(predictions, 5.0, 10.0)]
+        intervals = [
+            {'lower': round(float(lo), 2), 'upper': round(float(hi), 2), 'coverage': coverage}
+            for lo, hi in zip(np.clip(lower, 5.0, 10.0), np.clip(upper, 5.0, 10.0))
+        ]
+        return predictions, intervals
+
+    def prediction_interval(self, input_features, active=None):
+        """
+        Range covering the central CGPA_PREDICTION_INTERVAL_COVERAGE share of the
+        forest's individual tree predictions for one input
+
+        Args:
+            input_features (dict): Dictionary containing all required features
+            active (ActiveModel): Model to use (see predict_cgpa)
+
+        Returns:
+            dict: 'lower', 'upper' and 'coverage'
         """
-        grade_counts = {'S': 0, 'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
+        active = active or self.current_model()
+        feature_values = self.canonical_features(input_features)
+        cache_key = (active.version, 'interval', feature_values)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        _, intervals = self._predict_with_interval([feature_values], active)
+        self.cache.set(cache_key, intervals[0])
+        return intervals[0]
+
+    def predict_many_with_intervals(self, rows, active=None):
+        """
+        Batch predictions and their intervals from a single pass over the trees
+
+        Args:
+            rows: List of feature dicts or a columnar dict (see feature_matrix)
+            active (ActiveModel): Model to use (see predict_cgpa)
+
+        Returns:
+            tuple: (predictions, intervals) lists, in input order
+        """
+        active = active or self.current_model()
+
+        matrix = self.feature_matrix(rows)
+        if len(matrix) == 0:
+            return [], []
+        return self._predict_with_interval(matrix, active)
+
+    def feature_matrix(self, rows):
+        """
+        Build a validated feature matrix from a batch of inputs
         
-        for semester in user_semesters:
-            for subject in semester.subjects.all():
-                if hasattr(subject, 'grade') and subject.grade:
-                    grade = subject.grade.grade
-                    # Map grades to simplified categories
-                    if grade in ['S']:
-                        grade_counts['S'] += 1
-                    elif grade in ['A+', 'A']:
-                        grade_counts['A'] += 1
-                    elif grade in ['B+', 'B']:
-                        grade_counts['B'] += 1
-                    elif grade in ['C+', 'C']:
-                        grade_counts['C'] += 1
-                    elif grade in ['D+', 'P']:
-                        grade_counts['D'] += 1
-                    elif grade in ['F']:
-                        grade_counts['F'] += 1
+        Args:
+            rows: Either a list of feature dicts, or a columnar dict mapping
+                each feature name to a list of values
+            
+        Returns:
+            np.ndarray: Array of shape (n_rows, n_features)
+        """
+        if isinstance(rows, dict):
+            missing = [f for f in self.feature_columns if f not in rows]
+            if missing:
+                raise ValueError(f"Missing required feature: {missing[0]}")
+            lengths = {len(rows[f]) for f in self.feature_columns}
+            if len(lengths) != 1:
+                raise ValueError("All feature columns must have the same length")
+            columns = [rows[f] for f in self.feature_columns]
+            matrix = np.column_stack([np.asarray(c, dtype=float) for c in columns])
+        else:
+            values = []
+            for index, row in enumerate(rows):
+                for feature in self.feature_columns:
+                    if feature not in row:
+                        raise ValueError(f"Row {index}: missing required feature: {feature}")
+                values.append([row[f] for f in self.feature_columns])
+            matrix = np.asarray(values, dtype=float).reshape(-1, len(self.feature_columns))
+
+        if not np.isfinite(matrix).all():
+            raise ValueError("Feature values must be finite numbers")
+        return matrix
+
+    def predict_many(self, rows, active=None):
+        """
+        Predict CGPA for a batch of inputs with a single model call
+
+        Args:
+            rows: List of feature dicts or a columnar dict (see feature_matrix)
+            active (ActiveModel): Model to use (see predict_cgpa)
+
+        Returns:
+            list: Predicted CGPAs, in input order
+        """
+        active = active or self.current_model()
+
+        matrix = self.feature_matrix(rows)
+        if len(matrix) == 0:
+            return []
+
+        predictions = np.clip(self.predict_raw(matrix, active), 5.0, 10.0)
+        return [round(float(p), 2) for p in predictions]
+
+    def calculate_grade_distribution(self, users):
+        """
+        Calculate grade distribution from users' recorded grades
         
-        return grade_counts
+        Args:
+            users: A user (or user id), or a list of user ids
+            
+        Returns:
+            dict: Grade distribution counts for a single user, or a dict
+                mapping each user id to its counts when given a list
+        """
+        if isinstance(users, (list, tuple, set)):
+            return grade_distributions(users)
+        user_id = getattr(users, 'pk', users)
+        return grade_distributions([user_id])[user_id]
 
 # Initialize the predictor instance
 cgpa_predictor = CGPAPredictor()
\ No newline at end of file
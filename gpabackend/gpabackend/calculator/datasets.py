@@ -0,0 +1,124 @@
+"""
+Append-only columnar dataset stored as .npy files.
+
+Layout:
+    <root>/manifest.json                  column names and the list of parts
+    <root>/part-00000/<column>.npy        one array per column
+
+Each append writes a new part directory and then atomically replaces the
+manifest, so readers never see a half-written part. Columns are loaded with
+np.load(mmap_mode='r') by default, so scanning a large dataset does not
+require reading it all into memory.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+class FeatureDataset:
+    MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, root):
+        self.root = str(root)
+        self.manifest_path = os.path.join(self.root, self.MANIFEST_FILE)
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'columns': [], 'parts': []}
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    @property
+    def columns(self):
+        return self.manifest()['columns']
+
+    @property
+    def rows(self):
+        return sum(part['rows'] for part in self.manifest()['parts'])
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def append(self, columns, **part_meta):
+        """
+        Write one part. columns maps column name to a 1-D array; every column
+        must have the same length and match the columns already in the dataset.
+        Extra keyword arguments are stored with the part in the manifest.
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+        n_rows = lengths.pop()
+        if n_rows == 0:
+            return None
+
+        manifest = self.manifest()
+        if manifest['columns'] and sorted(manifest['columns']) != sorted(columns):
+            raise ValueError("Columns do not match the existing dataset")
+
+        name = f"part-{len(manifest['parts']):05d}"
+        part_dir = os.path.join(self.root, name)
+        tmp_dir = os.path.join(self.root, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), np.asarray(values))
+        os.rename(tmp_dir, part_dir)
+
+        manifest['columns'] = manifest['columns'] or list(columns)
+        manifest['parts'].append(dict(part_meta, name=name, rows=n_rows))
+        self._write_manifest(manifest)
+        return name
+
+    def iter_parts(self, columns=None, mmap_mode='r'):
+        """Yield one dict of column arrays per part"""
+        manifest = self.manifest()
+        columns = columns or manifest['columns']
+        for part in manifest['parts']:
+            part_dir = os.path.join(self.root, part['name'])
+            yield {
+                column: np.load(os.path.join(part_dir, f"{column}.npy"), mmap_mode=mmap_mode)
+                for column in columns
+            }
+
+    def load(self, columns=None, latest_by=None):
+        """
+        Concatenate all parts into one array per column.
+        With latest_by, only the last row written for each value of that column is kept.
+        """
+        columns = columns or self.columns
+        read = columns if latest_by is None or latest_by in columns else columns + [latest_by]
+        parts = list(self.iter_parts(read))
+        if not parts:
+            return {column: np.empty(0) for column in columns}
+        data = {column: np.concatenate([part[column] for part in parts]) for column in read}
+        if latest_by is not None:
+            # First occurrence in the reversed arrays is the last one written
+            _, index = np.unique(data[latest_by][::-1], return_index=True)
+            keep = np.sort(len(data[latest_by]) - 1 - index)
+            data = {column: values[keep] for column, values in data.items()}
+        return {column: data[column] for column in columns}
+
+    def count_distinct(self, column):
+        """Number of distinct values of column across all parts"""
+        if not self.exists():
+            return 0
+        return len(np.unique(self.load([column])[column]))
+
+    def part_meta(self, key, default=None):
+        """Values of a manifest key across all parts"""
+        return [part.get(key, default) for part in self.manifest()['parts']]
+
+    def clear(self):
+        """Remove every part and the manifest"""
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,127 @@
+"""
+Build the CGPA training set from real student records.
+
+Students are streamed in primary-key order with .iterator(chunk_size=...).
+Each chunk needs three queries: one grouped aggregate for the grade
+distributions, one to locate each student's latest prediction, and one to load
+those predictions. Their self-reported inputs supply the lifestyle features.
+Chunks are appended to a FeatureDataset as they are built, so memory stays
+bounded by the chunk size.
+
+Only finished students are used (see students_queryset), since the target
+is the final CGPA.
+
+Runs are incremental. A student is (re)extracted when they are not in the
+dataset yet, their CGPA differs from the one stored, or their UserFeatures row
+(grades, credits, lifestyle answers) changed since the previous run started.
+A re-extracted student gets a new row in a later part, and readers keep only
+the newest row per user_id (FeatureDataset.load(latest_by='user_id')).
+Students without a UserFeatures row are only picked up by their CGPA; run
+rebuild_user_features first after loading data with signals disabled.
+"""
+import numpy as np
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import CustomUser
+from .accuracy import finished_students
+from .datasets import FeatureDataset
+from .feature_store import grade_distributions
+from .features import FEATURE_COLUMNS, FEATURE_DEFAULTS, GRADE_FEATURES, LIFESTYLE_FEATURES
+from .models import CGPAPrediction
+
+TARGET_COLUMN = 'final_cgpa'
+
+
+def latest_lifestyle_features(user_ids):
+    """Lifestyle inputs from each user's most recent prediction"""
+    latest = CustomUser.objects.filter(pk__in=user_ids).annotate(
+        latest_prediction_id=Subquery(
+            CGPAPrediction.objects.filter(user=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+        )
+    ).values_list('pk', 'latest_prediction_id')
+    prediction_ids = {prediction_id: user_id for user_id, prediction_id in latest if prediction_id}
+    rows = CGPAPrediction.objects.filter(pk__in=prediction_ids).values(
+        'id', **{name: F(f'inputs__{name}') for name in LIFESTYLE_FEATURES}
+    )
+    return {prediction_ids[row['id']]: row for row in rows}
+
+
+def students_queryset():
+    """
+    Finished students (final semester GPA recorded, as for accuracy scoring)
+    with a known CGPA, in primary-key order. The CGPA of a student still
+    studying is not the final CGPA the model learns to predict.
+    """
+    return CustomUser.objects.filter(
+        is_faculty=False, cgpa__isnull=False, pk__in=finished_students()
+    ).order_by('pk')
+
+
+def build_chunk(students):
+    """Turn a list of (user_id, cgpa) pairs into a dict of dataset columns"""
+    user_ids = [user_id for user_id, _ in students]
+    distributions = grade_distributions(user_ids)
+    lifestyle = latest_lifestyle_features(user_ids)
+
+    columns = {column: np.empty(len(students), dtype=np.float32) for column in FEATURE_COLUMNS + [TARGET_COLUMN]}
+    columns['user_id'] = np.asarray(user_ids, dtype=np.int64)
+    for i, (user_id, cgpa) in enumerate(students):
+        distribution = distributions[user_id]
+        answers = lifestyle.get(user_id, {})
+        for feature in GRADE_FEATURES:
+            columns[feature][i] = distribution[feature[len('num_'):]]
+        for feature in LIFESTYLE_FEATURES:
+            columns[feature][i] = float(answers.get(feature, FEATURE_DEFAULTS[feature]))
+        columns[TARGET_COLUMN][i] = cgpa
+    return columns
+
+
+def iter_feature_chunks(chunk_size=2000, stored=None, changed_since=None):
+    """
+    Stream students and yield one dict of column arrays per chunk.
+
+    Args:
+        stored (dict): user_id -> CGPA already in the dataset; students in it
+            are skipped unless their CGPA differs or their features changed
+        changed_since (datetime): Start of the previous run
+    """
+    stored = stored or {}
+    chunk = []
+    students = students_queryset().values_list('pk', 'cgpa', 'prediction_features__updated_at')
+    for user_id, cgpa, updated_at in students.iterator(chunk_size=chunk_size):
+        if user_id in stored and stored[user_id] == np.float32(cgpa) and not (
+            changed_since is not None and updated_at is not None and updated_at >= changed_since
+        ):
+            continue
+        chunk.append((user_id, cgpa))
+        if len(chunk) >= chunk_size:
+            yield build_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield build_chunk(chunk)
+
+
+def build_feature_dataset(path, chunk_size=2000, rebuild=False):
+    """
+    Append features for students that are new or changed since the last run.
+    Returns the number of rows written.
+    """
+    dataset = FeatureDataset(path)
+    if rebuild:
+        dataset.clear()
+
+    started_at = timezone.now()
+    stored = {}
+    if dataset.exists():
+        current = dataset.load(['user_id', TARGET_COLUMN], latest_by='user_id')
+        stored = dict(zip(current['user_id'].tolist(), current[TARGET_COLUMN]))
+    runs = [parse_datetime(value) for value in dataset.part_meta('run_started_at') if value]
+    changed_since = max(runs) if runs else None
+
+    written = 0
+    for columns in iter_feature_chunks(chunk_size=chunk_size, stored=stored, changed_since=changed_since):
+        dataset.append(columns, run_started_at=started_at.isoformat())
+        written += len(columns['user_id'])
+    return written
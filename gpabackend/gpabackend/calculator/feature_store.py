@@ -0,0 +1,177 @@
+"""
+Per-user store of CGPA prediction inputs.
+
+UserFeatures holds each student's grade bucket counts, credit totals, latest
+SGPA and last-submitted lifestyle answers. The signal handlers in signals.py
+keep it current: a changed grade moves one count between buckets with an
+UPDATE ... SET num_X = num_X + 1, and a saved semester recomputes the credit
+totals. Prediction views then read everything with one primary-key lookup.
+
+Rows that do not exist yet (users created before the store, or data loaded
+with signals disabled) are rebuilt from the raw tables on first access, or in
+bulk with the rebuild_user_features command.
+"""
+from django.utils import timezone
+from django.db.models import Case, CharField, Count, F, OuterRef, Subquery, Sum, Value, When
+
+from accounts.models import CustomUser
+from .features import FEATURE_COLUMNS, GRADE_BUCKETS, LIFESTYLE_FEATURES
+from .models import Grade, Semester, Subject, UserFeatures
+
+# Recorded grade -> bucket letter
+BUCKET_OF_GRADE = {grade: bucket for bucket, grades in GRADE_BUCKETS.items() for grade in grades}
+
+ACADEMIC_FIELDS = [f'num_{bucket}' for bucket in GRADE_BUCKETS] + ['total_credits', 'earned_credits', 'latest_sgpa']
+
+BOOLEAN_FEATURES = {'participated_in_events', 'internship_experience', 'lives_in_pg_or_hostel'}
+
+
+def grade_distributions(user_ids):
+    """
+    Grade bucket counts ({'S': n, 'A': n, ...}) for each user id.
+    Grades are mapped to buckets with CASE/WHEN and counted with a single
+    GROUP BY query, so the cost is one round trip however many users,
+    semesters and subjects are involved.
+    """
+    user_ids = list(user_ids)
+    distributions = {user_id: {bucket: 0 for bucket in GRADE_BUCKETS} for user_id in user_ids}
+    if not user_ids:
+        return distributions
+
+    rows = Grade.objects.filter(
+        subject__semester__user_id__in=user_ids
+    ).annotate(
+        bucket=Case(
+            *[When(grade__in=grades, then=Value(bucket)) for bucket, grades in GRADE_BUCKETS.items()],
+            default=Value(''),
+            output_field=CharField(),
+        )
+    ).exclude(bucket='').values('subject__semester__user_id', 'bucket').annotate(
+        count=Count('id')
+    ).order_by()
+
+    for row in rows:
+        distributions[row['subject__semester__user_id']][row['bucket']] = row['count']
+    return distributions
+
+
+def _latest_sgpa_subquery():
+    return Subquery(
+        Semester.objects.filter(user=OuterRef('pk'), gpa__isnull=False).order_by('-semester').values('gpa')[:1]
+    )
+
+
+def academic_totals(user_ids):
+    """Credit totals and latest SGPA for each user id, in two queries"""
+    totals = {
+        row['user_id']: row
+        for row in Semester.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            total=Sum('total_credits'), earned=Sum('earn_credits')
+        ).order_by()
+    }
+    latest = dict(
+        CustomUser.objects.filter(pk__in=user_ids).annotate(
+            latest_sgpa=_latest_sgpa_subquery()
+        ).values_list('pk', 'latest_sgpa')
+    )
+    return {
+        user_id: {
+            'total_credits': (totals.get(user_id) or {}).get('total') or 0,
+            'earned_credits': (totals.get(user_id) or {}).get('earned') or 0,
+            'latest_sgpa': latest.get(user_id),
+        }
+        for user_id in user_ids
+    }
+
+
+def rebuild_user_features(user_ids):
+    """
+    Recompute the academic fields of UserFeatures for the given users from the
+    raw tables and upsert them. Lifestyle answers on existing rows are kept.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    distributions = grade_distributions(user_ids)
+    totals = academic_totals(user_ids)
+    rows = [
+        UserFeatures(
+            user_id=user_id,
+            **{f'num_{bucket}': count for bucket, count in distributions[user_id].items()},
+            **totals[user_id]
+        )
+        for user_id in user_ids
+        if user_id in totals
+    ]
+    UserFeatures.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user'], update_fields=ACADEMIC_FIELDS + ['updated_at']
+    )
+    return len(rows)
+
+
+def get_user_features(user):
+    """Return the user's UserFeatures row, building it on first access"""
+    features = UserFeatures.objects.filter(pk=user.pk).first()
+    if features is None:
+        rebuild_user_features([user.pk])
+        features = UserFeatures.objects.get(pk=user.pk)
+    return features
+
+
+def stored_grade_distribution(features):
+    """Grade distribution in the {'S': n, ...} shape returned by the API"""
+    return {bucket: getattr(features, f'num_{bucket}') for bucket in GRADE_BUCKETS}
+
+
+def feature_values(features):
+    """All model inputs from a UserFeatures row, keyed by feature name"""
+    values = {}
+    for name in FEATURE_COLUMNS:
+        value = getattr(features, name)
+        values[name] = int(value) if name in BOOLEAN_FEATURES else value
+    return values
+
+
+def grade_owner_id(grade):
+    """User id owning a Grade, avoiding a query when the relations are already loaded"""
+    if Grade.subject.is_cached(grade) and Subject.semester.is_cached(grade.subject):
+        return grade.subject.semester.user_id
+    return Subject.objects.filter(pk=grade.subject_id).values_list('semester__user_id', flat=True).first()
+
+
+def apply_grade_change(user_id, old_grade, new_grade):
+    """
+    Move one count from old_grade's bucket to new_grade's bucket.
+    Returns False when the user has no UserFeatures row to update.
+    """
+    old_bucket = BUCKET_OF_GRADE.get(old_grade)
+    new_bucket = BUCKET_OF_GRADE.get(new_grade)
+    if old_bucket == new_bucket:
+        return True
+    updates = {}
+    if old_bucket:
+        updates[f'num_{old_bucket}'] = F(f'num_{old_bucket}') - 1
+    if new_bucket:
+        updates[f'num_{new_bucket}'] = F(f'num_{new_bucket}') + 1
+    return UserFeatures.objects.filter(pk=user_id).update(updated_at=timezone.now(), **updates) > 0
+
+
+def refresh_academic_totals(user_id):
+    """
+    Recompute credit totals and latest SGPA for one user.
+    Returns False when the user has no UserFeatures row to update.
+    """
+    totals = academic_totals([user_id])[user_id]
+    return UserFeatures.objects.filter(pk=user_id).update(updated_at=timezone.now(), **totals) > 0
+
+
+def record_lifestyle_features(user, features):
+    """Store the lifestyle answers the user just submitted for a prediction"""
+    values = {
+        name: bool(features[name]) if name in BOOLEAN_FEATURES else features[name]
+        for name in LIFESTYLE_FEATURES
+    }
+    values['updated_at'] = timezone.now()  # update() skips auto_now
+    if not UserFeatures.objects.filter(pk=user.pk).update(**values):
+        rebuild_user_features([user.pk])
+        UserFeatures.objects.filter(pk=user.pk).update(**values)
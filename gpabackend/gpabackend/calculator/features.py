@@ -0,0 +1,51 @@
+"""
+Input schema of the CGPA prediction model.
+
+Kept free of pandas/sklearn so views, signals and data pipelines can use it
+without loading the training stack.
+"""
+
+# Model inputs, in the column order the model is trained with
+FEATURE_COLUMNS = [
+    'num_S', 'num_A', 'num_B', 'num_C', 'num_D', 'num_F',
+    'study_hours_per_week', 'participated_in_events', 'project_count',
+    'internship_experience', 'travel_time_minutes', 'lives_in_pg_or_hostel',
+    'previous_board_cgpa'
+]
+
+# Grade-count features derived from the student's academic record
+GRADE_FEATURES = ['num_S', 'num_A', 'num_B', 'num_C', 'num_D', 'num_F']
+
+# Self-reported features, collected through the prediction form
+LIFESTYLE_FEATURES = [
+    'study_hours_per_week', 'participated_in_events', 'project_count',
+    'internship_experience', 'travel_time_minutes', 'lives_in_pg_or_hostel',
+    'previous_board_cgpa'
+]
+
+# Defaults for features missing from a prediction request
+FEATURE_DEFAULTS = {
+    'num_S': 0,
+    'num_A': 0,
+    'num_B': 0,
+    'num_C': 0,
+    'num_D': 0,
+    'num_F': 0,
+    'study_hours_per_week': 12,
+    'participated_in_events': 0,
+    'project_count': 0,
+    'internship_experience': 0,
+    'travel_time_minutes': 30,
+    'lives_in_pg_or_hostel': 0,
+    'previous_board_cgpa': 8.0
+}
+
+# Simplified grade buckets used by the model, and the recorded grades each one covers
+GRADE_BUCKETS = {
+    'S': ['S'],
+    'A': ['A+', 'A'],
+    'B': ['B+', 'B'],
+    'C': ['C+', 'C'],
+    'D': ['D+', 'P'],
+    'F': ['F'],
+}
@@ -0,0 +1,191 @@
+"""
+Flat-array evaluator for tree ensembles.
+
+sklearn's predict() spends most of a single-row call on input validation and
+joblib dispatch. FlatForest copies every tree of a fitted forest (or gradient
+boosted ensemble) into shared contiguous node arrays and walks all trees at
+once, one tree level per step, with a handful of NumPy operations.
+
+Leaves point back at themselves, so after `max_depth` steps every walk has
+reached its leaf and no per-tree termination checks are needed.
+
+The same walk gives Saabas-style feature attributions: every split on the
+path moves the node value by value[child] - value[node], and that change is
+credited to the split feature. The root values plus all credited changes add
+up exactly to the prediction.
+"""
+import numpy as np
+
+
+class FlatForest:
+    FOREST_TYPES = ('RandomForestRegressor', 'ExtraTreesRegressor')
+    BOOSTING_TYPES = ('GradientBoostingRegressor',)
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, n_features,
+                 offset=0.0, scale=None, averaging=True):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        # Ensemble output is offset + scale * sum(tree outputs); a forest averages
+        self.offset = offset
+        self.scale = 1.0 / len(roots) if scale is None else scale
+        # True for forests, whose trees each predict the target on their own
+        self.averaging = averaging
+
+    @classmethod
+    def supports(cls, model):
+        """True when model is a fitted tree ensemble we can flatten"""
+        name = type(model).__name__
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None or getattr(model, 'n_outputs_', 1) != 1:
+            return False
+        if name in cls.FOREST_TYPES:
+            return all(hasattr(est, 'tree_') for est in estimators)
+        if name in cls.BOOSTING_TYPES:
+            # Only constant initial predictions (the default) can be folded into the offset
+            init = getattr(model, 'init_', None)
+            return (
+                (init == 'zero' or type(init).__name__ == 'DummyRegressor')
+                and all(hasattr(est, 'tree_') for est in estimators.ravel())
+            )
+        return False
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestRegressor, ExtraTreesRegressor or GradientBoostingRegressor"""
+        if not cls.supports(model):
+            raise ValueError(f"Cannot flatten model of type {type(model).__name__}")
+
+        if type(model).__name__ in cls.BOOSTING_TYPES:
+            estimators = model.estimators_.ravel()
+            init = model.init_
+            offset = 0.0 if init == 'zero' else float(np.ravel(init.constant_)[0])
+            scale = model.learning_rate
+            averaging = False
+        else:
+            estimators = model.estimators_
+            offset, scale = 0.0, None
+            averaging = True
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        node_offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int64) + node_offset
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + node_offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + node_offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(node_offset)
+
+            node_offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+            offset=offset,
+            scale=scale,
+            averaging=averaging,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _as_matrix(self, X):
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X.astype(np.float64)
+
+    def leaf_indices(self, X):
+        """Leaf node reached in every tree, shape (n_rows, n_trees)"""
+        X = self._as_matrix(X)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def contributions(self, X):
+        """
+        Per-feature attribution of each prediction.
+
+        Returns:
+            tuple: (bias, contributions) where bias is the ensemble output at the
+                tree roots and contributions has shape (n_rows, n_features), so
+                bias + contributions.sum(axis=1) equals predict(X)
+        """
+        X = self._as_matrix(X)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        # Flat index of (row, feature) cells, accumulated with one bincount per level
+        row_base = rows * self.n_features
+        totals = np.zeros(n_rows * self.n_features)
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            split_feature = self.feature[nodes]
+            go_left = X[rows, split_feature] <= self.threshold[nodes]
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            # Leaves loop to themselves, so finished walks add zero
+            totals += np.bincount(
+                (row_base + split_feature).ravel(),
+                weights=(self.value[children] - self.value[nodes]).ravel(),
+                minlength=totals.size,
+            )
+            nodes = children
+        bias = self.offset + self.scale * self.value[self.roots].sum()
+        return bias, self.scale * totals.reshape(n_rows, self.n_features)
+
+    def tree_outputs(self, X):
+        """Prediction of every tree, shape (n_rows, n_trees)"""
+        return self.value[self.leaf_indices(X)]
+
+    def predict_with_interval(self, X, coverage=0.9):
+        """
+        Predictions plus the central `coverage` range of the individual tree
+        outputs, all from one walk of the trees. The spread reflects how much
+        the trees disagree, so it widens for inputs unlike the training data.
+        Only forests have per-tree outputs on the target scale; boosted stages do not.
+
+        Returns:
+            tuple: (predictions, lower, upper), each of shape (n_rows,)
+        """
+        if not self.averaging:
+            raise ValueError("Prediction intervals need a forest; boosted trees are not independent estimates")
+        if not 0 < coverage < 1:
+            raise ValueError("coverage must be between 0 and 1")
+        outputs = self.tree_outputs(X)
+        tail = (1 - coverage) / 2 * 100
+        lower, upper = np.percentile(outputs, [tail, 100 - tail], axis=1)
+        return self.offset + self.scale * outputs.sum(axis=1), lower, upper
+
+    @property
+    def nbytes(self):
+        """Memory held by the node arrays"""
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.roots))
+
+    def predict(self, X):
+        """Ensemble prediction for each row, equal to the sklearn model's predict()"""
+        return self.offset + self.scale * self.tree_outputs(X).sum(axis=1)
@@ -0,0 +1,333 @@
+"""
+End-to-end HTTP load benchmark.
+
+The app is served in-process by a threaded WSGI server against the configured
+database (normally one filled by seed_benchmark_data), and driven by
+concurrent asyncio clients speaking plain HTTP/1.1 over keep-alive-free
+connections, so a run needs nothing beyond the standard library.
+
+Every client logs in as a seeded student or faculty account, then picks
+operations at random by weight until the run ends:
+
+  students: get_subjects, calculate_gpa, Summary, predict_cgpa
+  faculty:  fetch_students_by_faculty
+
+Latencies are measured by the clients. Database queries are counted on the
+server by wrapping each request in connection.execute_wrapper. Results are
+per endpoint (requests, errors, throughput, p50/p95/p99 latency, queries
+per request) and are written as JSON so runs can be compared across commits.
+"""
+import asyncio
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .benchmarking import percentiles
+
+# Operation -> relative weight for student sessions
+STUDENT_WORKLOAD = {
+    'get_subjects': 30,
+    'summary': 30,
+    'calculate_gpa': 20,
+    'predict_cgpa': 20,
+}
+
+# Distinct error messages kept per endpoint
+MAX_ERROR_SAMPLES = 5
+
+# Ranges of the lifestyle features sent with predict_cgpa
+PREDICTION_RANGES = {
+    'num_S': (0, 10), 'num_A': (0, 10), 'num_B': (0, 10), 'num_C': (0, 8), 'num_D': (0, 5), 'num_F': (0, 3),
+    'study_hours_per_week': (2, 25), 'participated_in_events': (0, 1), 'project_count': (0, 5),
+    'internship_experience': (0, 1), 'travel_time_minutes': (10, 120), 'lives_in_pg_or_hostel': (0, 1),
+}
+
+
+class QueryCountingApp:
+    """WSGI wrapper recording the number and total time of DB queries per request path"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {'queries': [], 'db_ms': []})
+
+    def __call__(self, environ, start_response):
+        counts = [0, 0.0]
+
+        def count(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                counts[0] += 1
+                counts[1] += (time.perf_counter() - start) * 1000
+
+        with connection.execute_wrapper(count):
+            response = self.app(environ, start_response)
+            try:
+                body = list(response)
+            finally:
+                # Fires request_finished, which closes the thread's connection
+                if hasattr(response, 'close'):
+                    response.close()
+
+        with self.lock:
+            stats = self.stats[environ['PATH_INFO']]
+            stats['queries'].append(counts[0])
+            stats['db_ms'].append(counts[1])
+        return body
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(app, host='127.0.0.1', port=0):
+    """Serve app from a background thread. Returns (server, base_url)."""
+    server = make_server(host, port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+
+async def http_request(base_url, method, path, payload=None, token=None):
+    """
+    Send one request on a fresh connection.
+
+    Returns:
+        tuple: (status code, decoded JSON body or None, latency in ms)
+    """
+    url = urlsplit(base_url)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    headers = [
+        f'{method} {path} HTTP/1.1',
+        f'Host: {url.netloc}',
+        'Connection: close',
+        'Accept: application/json',
+        f'Content-Length: {len(body)}',
+    ]
+    if payload is not None:
+        headers.append('Content-Type: application/json')
+    if token:
+        headers.append(f'Authorization: Bearer {token}')
+
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    try:
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    head, _, content = raw.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    try:
+        data = json.loads(content) if content else None
+    except ValueError:
+        data = None
+    return status, data, elapsed
+
+
+class LoadClient:
+    """One simulated user: logs in, then runs weighted random operations until the deadline"""
+
+    def __init__(self, base_url, email, password, is_faculty, rng, record):
+        self.base_url = base_url
+        self.email = email
+        self.password = password
+        self.is_faculty = is_faculty
+        self.rng = rng
+        self.record = record
+        self.token = None
+        self.subjects = None
+
+    async def call(self, name, method, path, payload=None):
+        status, data, elapsed = await http_request(self.base_url, method, path, payload, self.token)
+        error = None
+        if status >= 400:
+            error = str(data.get('error') or data.get('detail') or data) if isinstance(data, dict) else f'HTTP {status}'
+        self.record(name, path, status, elapsed, error)
+        return status, data
+
+    async def login(self):
+        status, data = await self.call('login', 'POST', '/api/login/', {'email': self.email, 'password': self.password})
+        if status == 200:
+            self.token = data['access']
+        return status == 200
+
+    async def get_subjects(self):
+        status, data = await self.call('get_subjects', 'GET', '/get_subjects/')
+        if status == 200:
+            self.subjects = data
+
+    async def summary(self):
+        await self.call('summary', 'GET', '/Summary/')
+
+    async def calculate_gpa(self):
+        if self.subjects is None:
+            await self.get_subjects()
+            if self.subjects is None:
+                return
+        semester = self.rng.choice(list(self.subjects))
+        grades = {
+            self.rng.choice(list(courses)): self.rng.choice(['S', 'A+', 'A', 'B+', 'B', 'C+', 'C'])
+            for courses in self.subjects[semester].values()
+        }
+        await self.call('calculate_gpa', 'POST', '/calculate_gpa/', {'semester': semester, 'grades': grades})
+
+    async def predict_cgpa(self):
+        features = {name: self.rng.randint(low, high) for name, (low, high) in PREDICTION_RANGES.items()}
+        features['previous_board_cgpa'] = round(self.rng.uniform(5.0, 10.0), 2)
+        await self.call('predict_cgpa', 'POST', '/predict_cgpa/', features)
+
+    async def fetch_students(self):
+        await self.call('fetch_students_by_faculty', 'GET', '/fetch_students_by_faculty/')
+
+    async def run(self, deadline, workload):
+        operations = list(workload)
+        weights = [workload[name] for name in operations]
+        while time.monotonic() < deadline:
+            if self.is_faculty:
+                await self.fetch_students()
+            else:
+                await getattr(self, self.rng.choices(operations, weights)[0])()
+
+
+async def _drive(base_url, accounts, password, clients, duration, workload, seed, record):
+    """Log every client in, then run them all for duration seconds. Returns the length of both phases."""
+    sessions = []
+    for index in range(clients):
+        email, is_faculty = accounts[index % len(accounts)]
+        sessions.append(LoadClient(base_url, email, password, is_faculty, random.Random(seed + index), record))
+
+    start = time.monotonic()
+    logged_in = await asyncio.gather(*(session.login() for session in sessions))
+    login_seconds = time.monotonic() - start
+
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(session.run(deadline, workload) for session, ok in zip(sessions, logged_in) if ok))
+    return login_seconds, time.monotonic() - start
+
+
+def summarize(samples, server_stats, elapsed, login_seconds):
+    """
+    Per-endpoint results from client samples and server-side query stats.
+    Login throughput is over the login phase; everything else, and the
+    totals, over the elapsed seconds after it.
+    """
+    endpoints = {}
+    for name, rows in sorted(samples.items()):
+        seconds = login_seconds if name == 'login' else elapsed
+        latencies = np.array([latency for _, _, latency in rows])
+        path = rows[0][0]
+        queries = server_stats.get(path, {}).get('queries') or [0]
+        db_ms = server_stats.get(path, {}).get('db_ms') or [0.0]
+        endpoints[name] = {
+            'path': path,
+            'requests': len(rows),
+            'errors': sum(1 for _, status, _ in rows if status >= 400),
+            'throughput_rps': round(len(rows) / seconds, 2) if seconds else 0.0,
+            'latency_ms': dict(
+                {key: round(value, 2) for key, value in percentiles(latencies).items()},
+                mean=round(float(latencies.mean()), 2), max=round(float(latencies.max()), 2),
+            ),
+            'queries_per_request': {
+                'mean': round(float(np.mean(queries)), 2), 'max': int(np.max(queries)),
+            },
+            'db_ms_per_request': round(float(np.mean(db_ms)), 2),
+        }
+    measured = [entry for name, entry in endpoints.items() if name != 'login']
+    total = sum(entry['requests'] for entry in measured)
+    return {
+        'login_seconds': round(login_seconds, 2),
+        'duration_seconds': round(elapsed, 2),
+        'requests': total,
+        'errors': sum(entry['errors'] for entry in endpoints.values()),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(accounts, password, clients=20, duration=30.0, workload=None, seed=42, app=None):
+    """
+    Serve the app in-process and drive it with concurrent clients.
+
+    Args:
+        accounts (list): (email, is_faculty) pairs the clients log in as, round-robin
+        password (str): Password shared by the accounts
+        clients (int): Number of concurrent clients
+        duration (float): Seconds to run once every client has logged in
+        workload (dict): Operation -> weight for students (defaults to STUDENT_WORKLOAD)
+        seed (int): Seed for the clients' random choices
+        app: WSGI application (defaults to the project's)
+
+    Returns:
+        dict: Run metadata and per-endpoint results (see summarize)
+    """
+    if not accounts:
+        raise ValueError("No accounts to log in as; run seed_benchmark_data first")
+    if app is None:
+        from django.core.wsgi import get_wsgi_application
+        app = get_wsgi_application()
+    counting_app = QueryCountingApp(app)
+    server, base_url = start_server(counting_app)
+    samples = defaultdict(list)
+    errors = defaultdict(set)
+
+    def record(name, path, status, elapsed, error):
+        samples[name].append((path, status, elapsed))
+        if error and len(errors[name]) < MAX_ERROR_SAMPLES:
+            errors[name].add(error[:200])
+
+    try:
+        login_seconds, elapsed = asyncio.run(_drive(
+            base_url, accounts, password, clients, duration, workload or STUDENT_WORKLOAD, seed, record
+        ))
+    finally:
+        server.shutdown()
+        server.server_close()
+        close_old_connections()
+
+    result = summarize(samples, counting_app.stats, elapsed, login_seconds)
+    for name, messages in errors.items():
+        result['endpoints'][name]['error_samples'] = sorted(messages)
+    result.update({
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'database': connection.vendor,
+        'clients': clients,
+        'accounts': len(accounts),
+    })
+    return result
@@ -0,0 +1,93 @@
+"""
+Logging helpers used by the LOGGING setting.
+
+Views log through module loggers (logging.getLogger(__name__)) with
+%-style arguments, so request and response dicts are only turned into
+strings when the logger's level lets the record through. Levels are set per
+module with CGPA_LOG_LEVELS.
+
+QueueStreamHandler hands records to a background thread that writes them
+out, so a request never waits on stdout. RedactFilter runs on the handler,
+before a record is formatted, and masks passwords, OTPs and tokens in its
+arguments and message.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+from collections.abc import Mapping
+
+REDACTED = '[REDACTED]'
+
+# Keys whose values never reach the logs (compared case-insensitively)
+SENSITIVE_KEYS = frozenset({
+    'password', 'password1', 'password2', 'new_password', 'old_password',
+    'otp', 'token', 'access', 'refresh', 'authorization', 'cookie', 'secret',
+})
+
+# Sensitive values written out inline, e.g. a raw JSON body or a header dump
+_SENSITIVE_TEXT = re.compile(
+    r'''(?P<key>["']?\b(?:%s)\b["']?\s*[:=]\s*)(?P<quote>["']?)(?P<value>(?:Bearer\s+)?[^"',}\s]+)''' % '|'.join(sorted(SENSITIVE_KEYS)),
+    re.IGNORECASE,
+)
+_BEARER = re.compile(r'(Bearer\s+)[\w.~+/=-]+', re.IGNORECASE)
+
+
+def redact_text(text):
+    text = _SENSITIVE_TEXT.sub(lambda m: f'{m["key"]}{m["quote"]}{REDACTED}', text)
+    return _BEARER.sub(rf'\g<1>{REDACTED}', text)
+
+
+def redact(value):
+    """Copy of value with sensitive mapping entries masked, recursing into mappings and sequences"""
+    if isinstance(value, Mapping):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    if isinstance(value, bytes):
+        return redact_text(value.decode('utf-8', 'replace'))
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+class RedactFilter(logging.Filter):
+    """Mask passwords, OTPs and tokens in a record's arguments and message"""
+
+    def filter(self, record):
+        if record.args:
+            if isinstance(record.args, Mapping):
+                record.args = redact(record.args)
+            else:
+                record.args = tuple(redact(arg) for arg in record.args)
+        if isinstance(record.msg, str):
+            record.msg = redact_text(record.msg)
+        return True
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """
+    Write records to a stream from a background thread.
+
+    The calling thread only formats the record (once its level and filters
+    have let it through) and puts it on an unbounded queue; a QueueListener
+    writes it to the stream.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.stream_handler = logging.StreamHandler(stream)
+        self.listener = logging.handlers.QueueListener(self.queue, self.stream_handler)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()  # writes out whatever is still queued
+            self.listener = None
+            self.stream_handler.close()
+        super().close()
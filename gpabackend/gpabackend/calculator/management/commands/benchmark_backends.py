@@ -0,0 +1,80 @@
+import json
+import pickle
+import time
+import warnings
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from calculator.benchmarking import percentiles, time_calls
+from calculator.cgpa_predictor import cgpa_predictor
+from calculator.predictor_backends import BACKENDS, compile_evaluator, make_estimator
+
+
+class Command(BaseCommand):
+    help = 'Report fit time, predict latency, memory footprint and accuracy for each predictor backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(BACKENDS),
+                            help='Comma-separated backends to compare')
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Number of timed single-row and batch predictions')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per timed batch prediction')
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        names = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in BACKENDS]
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(unknown)}")
+
+        X, y = cgpa_predictor.training_data()
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        row = X_test[:1]
+        batch = X_test[np.arange(options['batch_size']) % len(X_test)]
+
+        results = {}
+        for name in names:
+            model = make_estimator(name)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            # Time the path production uses: the compiled evaluator when there is one
+            evaluator = compile_evaluator(model)
+            predict = evaluator.predict if evaluator is not None else model.predict
+            y_pred = predict(X_test)
+
+            results[name] = {
+                'fit_seconds': fit_seconds,
+                'single_row_ms': percentiles(time_calls(lambda: predict(row), options['iterations'])),
+                'batch_ms': percentiles(time_calls(lambda: predict(batch), max(1, options['iterations'] // 10))),
+                'batch_size': len(batch),
+                'pickled_bytes': len(pickle.dumps(model)),
+                'evaluator_bytes': evaluator.nbytes if evaluator is not None else 0,
+                'mae': float(mean_absolute_error(y_test, y_pred)),
+                'r2': float(r2_score(y_test, y_pred)),
+            }
+
+        self.stdout.write(
+            f"{'backend':<8} {'fit s':>7} {'1-row p50':>10} {'1-row p99':>10} "
+            f"{'batch p50':>10} {'model KB':>9} {'MAE':>7} {'R²':>7}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<8} {r['fit_seconds']:>7.2f} {r['single_row_ms']['p50']:>8.3f}ms "
+                f"{r['single_row_ms']['p99']:>8.3f}ms {r['batch_ms']['p50']:>8.3f}ms "
+                f"{(r['pickled_bytes'] + r['evaluator_bytes']) / 1024:>9.1f} "
+                f"{r['mae']:>7.4f} {r['r2']:>7.4f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from calculator.http_benchmark import run_benchmark
+from calculator.prediction_service import preload
+from calculator.seeding import DEFAULT_EMAIL_DOMAIN, DEFAULT_PASSWORD
+
+
+class Command(BaseCommand):
+    help = 'Drive the app with concurrent HTTP clients against the seeded database and report latency per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help='Number of concurrent clients')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+        parser.add_argument('--accounts', type=int, default=200,
+                            help='Number of seeded student accounts the clients log in as')
+        parser.add_argument('--faculty-share', type=float, default=0.1,
+                            help='Fraction of clients logged in as faculty')
+        parser.add_argument('--email-domain', default=DEFAULT_EMAIL_DOMAIN,
+                            help='Email domain of the seeded accounts')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of the seeded accounts')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the clients\' random choices')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        seeded = CustomUser.objects.filter(email__endswith=f"@{options['email_domain']}").order_by('pk')
+        students = list(seeded.filter(is_faculty=False).values_list('email', flat=True)[:options['accounts']])
+        faculty = list(seeded.filter(is_faculty=True).values_list('email', flat=True))
+        if not students:
+            raise CommandError("No seeded students found; run seed_benchmark_data first")
+
+        # Spread faculty clients evenly over the client slots
+        clients = options['clients']
+        n_faculty = min(len(faculty), round(clients * options['faculty_share']))
+        accounts = [(email, False) for email in students[:clients - n_faculty] or students]
+        step = clients // n_faculty if n_faculty else 0
+        for index, email in enumerate(faculty[:n_faculty]):
+            accounts.insert(min(index * step, len(accounts)), (email, True))
+
+        # Load the model up front so the first predictions do not pay for it
+        preload()
+
+        self.stdout.write(f"Running {clients} clients for {options['duration']:.0f}s...")
+        result = run_benchmark(
+            accounts, options['password'], clients=clients, duration=options['duration'], seed=options['seed']
+        )
+
+        self.stdout.write(f"{'endpoint':<28}{'reqs':>7}{'err':>5}{'rps':>8}"
+                          f"{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+        for name, entry in result['endpoints'].items():
+            latency = entry['latency_ms']
+            self.stdout.write(
+                f"{name:<28}{entry['requests']:>7}{entry['errors']:>5}{entry['throughput_rps']:>8.1f}"
+                f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+                f"{entry['queries_per_request']['mean']:>9.1f}"
+            )
+        self.stdout.write(f"Total: {result['requests']} requests, {result['errors']} errors, "
+                          f"{result['throughput_rps']:.1f} req/s (latencies in ms)")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
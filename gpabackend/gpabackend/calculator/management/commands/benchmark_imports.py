@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.benchmarking import URLCONF_IMPORT, import_profile
+from calculator.prediction_service import HEAVY_MODULES
+
+
+class Command(BaseCommand):
+    help = 'Profile the imports needed to load the URLconf with python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--statement', default=URLCONF_IMPORT,
+                            help='Python statement to profile (defaults to loading the URLconf)')
+        parser.add_argument('--top', type=int, default=15,
+                            help='Number of slowest top-level imports to list')
+        parser.add_argument('--check', action='store_true',
+                            help=f"Fail if any of {', '.join(HEAVY_MODULES)} is imported")
+        parser.add_argument('--output', help='Also write the per-module timings as JSON to this file')
+
+    def handle(self, *args, **options):
+        modules = import_profile(options['statement'])
+        top_level = sorted(
+            ((name, m['cumulative_us']) for name, m in modules.items() if m['depth'] == 0),
+            key=lambda item: item[1], reverse=True,
+        )
+        total_ms = sum(us for _, us in top_level) / 1000
+        heavy = sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+
+        self.stdout.write(f"{len(modules)} modules imported in {total_ms:.1f} ms")
+        for name, us in top_level[:options['top']]:
+            self.stdout.write(f"{us / 1000:>9.1f} ms  {name}")
+        self.stdout.write(f"Heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'total_ms': total_ms, 'heavy_modules': heavy, 'modules': modules}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['check'] and heavy:
+            raise CommandError(f"Profiled statement imported {', '.join(heavy)}")
@@ -0,0 +1,49 @@
+import warnings
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from calculator.benchmarking import percentiles, time_calls
+from calculator.cgpa_predictor import cgpa_predictor
+from calculator.forest_eval import FlatForest
+
+
+class Command(BaseCommand):
+    help = 'Compare sklearn and flattened-forest prediction and explanation latency for the current CGPA model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Number of single-row predictions to time')
+        parser.add_argument('--rows', type=int, default=1000,
+                            help='Number of synthetic rows used for the accuracy check')
+
+    def handle(self, *args, **options):
+        # Models fitted on a DataFrame warn on every ndarray predict call
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        cgpa_predictor.refresh_if_stale()
+        model = cgpa_predictor.model
+        if not FlatForest.supports(model):
+            self.stderr.write(f"Model type {type(model).__name__} cannot be flattened")
+            return
+
+        evaluator = FlatForest.from_sklearn(model)
+        df = cgpa_predictor.create_synthetic_dataset(n_students=options['rows'])
+        X = df[cgpa_predictor.feature_columns].to_numpy(dtype=float)
+
+        max_diff = float(np.abs(evaluator.predict(X) - model.predict(X)).max())
+        self.stdout.write(f"Model version: {cgpa_predictor.model_version}")
+        self.stdout.write(f"Trees: {evaluator.n_trees}, nodes: {len(evaluator.value)}, max depth: {evaluator.max_depth}")
+        self.stdout.write(f"Max |flat - sklearn| over {len(X)} rows: {max_diff:.2e}")
+
+        row = X[:1]
+        results = {
+            'sklearn': time_calls(lambda: model.predict(row), options['iterations']),
+            'flat': time_calls(lambda: evaluator.predict(row), options['iterations']),
+            'explain': time_calls(lambda: evaluator.contributions(row), options['iterations']),
+        }
+        for name, timings in results.items():
+            p = percentiles(timings)
+            self.stdout.write(f"{name:>8}: p50 {p['p50']:.3f} ms  p95 {p['p95']:.3f} ms  p99 {p['p99']:.3f} ms")
+
+        speedup = np.median(results['sklearn']) / np.median(results['flat'])
+        self.stdout.write(f"Single-row p50 speedup: {speedup:.1f}x")
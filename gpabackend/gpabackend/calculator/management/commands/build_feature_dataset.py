@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from calculator.cgpa_predictor import cgpa_predictor
+from calculator.feature_pipeline import build_feature_dataset
+
+
+class Command(BaseCommand):
+    help = 'Extract CGPA training features from student records into the on-disk feature dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Dataset directory (defaults to CGPA_FEATURE_DATASET_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Students fetched and written per chunk')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Discard the existing dataset instead of appending new and changed students')
+
+    def handle(self, *args, **options):
+        path = options['path'] or cgpa_predictor.feature_dataset().root
+        written = build_feature_dataset(path, chunk_size=options['chunk_size'], rebuild=options['rebuild'])
+        self.stdout.write(f"Wrote {written} rows to {path}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from calculator.retention import compact_predictions
+
+
+class Command(BaseCommand):
+    help = 'Fold scored CGPA predictions older than the retention window into monthly summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int,
+                            help='Keep predictions newer than this in full (defaults to CGPA_PREDICTION_RETENTION_DAYS)')
+        parser.add_argument('--unscored-retention-days', type=int,
+                            help='Keep unscored predictions newer than this in full '
+                                 '(defaults to CGPA_UNSCORED_PREDICTION_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Predictions compacted and deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to wait between batches')
+        parser.add_argument('--max-batches', type=int,
+                            help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        compacted = compact_predictions(
+            retention_days=options['retention_days'],
+            unscored_retention_days=options['unscored_retention_days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(f"Compacted {compacted} predictions")
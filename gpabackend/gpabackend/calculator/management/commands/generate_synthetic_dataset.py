@@ -0,0 +1,39 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.cgpa_predictor import cgpa_predictor
+from calculator.synthetic import SyntheticStudents
+
+
+class Command(BaseCommand):
+    help = 'Write synthetic students to a columnar feature dataset for training benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1_000_000,
+                            help='Number of synthetic students to generate')
+        parser.add_argument('--chunk-size', type=int, default=100_000,
+                            help='Students generated and written per dataset part')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Seed for the random generator')
+        parser.add_argument('--path', help='Dataset directory (defaults to CGPA_BENCHMARK_DATASET_DIR)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Discard the existing dataset instead of appending')
+        parser.add_argument('--into-training-dataset', action='store_true',
+                            help='Allow writing into CGPA_FEATURE_DATASET_DIR, which training reads')
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.CGPA_BENCHMARK_DATASET_DIR
+        training_root = cgpa_predictor.feature_dataset().root
+        if os.path.realpath(path) == os.path.realpath(training_root) and not options['into_training_dataset']:
+            raise CommandError(
+                f'{path} is the training dataset; synthetic rows would be trained on as real students. '
+                'Pass --into-training-dataset to write there anyway.'
+            )
+        start = time.perf_counter()
+        written = SyntheticStudents(options['seed']).write_feature_dataset(
+            path, options['students'], chunk_size=options['chunk_size'], rebuild=options['rebuild']
+        )
+        self.stdout.write(f"Wrote {written} synthetic rows to {path} in {time.perf_counter() - start:.1f}s")
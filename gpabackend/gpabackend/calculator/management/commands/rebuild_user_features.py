@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from calculator.feature_store import rebuild_user_features
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user prediction feature store from grade and semester records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users recomputed per upsert')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        rebuilt = 0
+        for user_id in CustomUser.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                rebuilt += rebuild_user_features(batch)
+                batch = []
+        rebuilt += rebuild_user_features(batch)
+        self.stdout.write(f"Rebuilt features for {rebuilt} users")
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from calculator.training_jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued CGPA model training jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the jobs currently queued and exit')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to wait between queue checks')
+
+    def handle(self, *args, **options):
+        while True:
+            for job in run_pending_jobs():
+                self.stdout.write(f"Training job {job.pk}: {job.status}")
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
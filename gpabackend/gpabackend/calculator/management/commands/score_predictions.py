@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from calculator.accuracy import score_predictions
+
+
+class Command(BaseCommand):
+    help = 'Backfill actual CGPAs for finished students and update per-model accuracy totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Predictions scored per transaction')
+
+    def handle(self, *args, **options):
+        scored = score_predictions(batch_size=options['batch_size'])
+        self.stdout.write(f"Scored {scored} predictions")
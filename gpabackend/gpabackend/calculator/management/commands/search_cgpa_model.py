@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.cgpa_predictor import cgpa_predictor
+from calculator.model_search import SEARCH_SPACE
+
+
+class Command(BaseCommand):
+    help = 'Cross-validated hyperparameter search for the CGPA model; publishes the best candidate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=600,
+                            help='Wall-clock seconds allowed for starting candidates')
+        parser.add_argument('--backends', default=','.join(SEARCH_SPACE),
+                            help='Comma-separated model families to search')
+        parser.add_argument('--folds', type=int, default=5,
+                            help='Cross-validation folds per candidate')
+        parser.add_argument('--workers', type=int,
+                            help='Worker processes (defaults to the number of CPUs)')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Rows of the results table to print')
+
+    def handle(self, *args, **options):
+        backends = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        unknown = [name for name in backends if name not in SEARCH_SPACE]
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(unknown)}")
+
+        cgpa_predictor.search_model(
+            options['budget'], backends=backends, folds=options['folds'], max_workers=options['workers']
+        )
+        search = cgpa_predictor.model_metadata['search']
+
+        self.stdout.write(f"{'backend':<12} {'MAE':>7} {'±':>6} {'R²':>7} {'fit s':>7}  params")
+        for row in search['results'][:options['top']]:
+            self.stdout.write(
+                f"{row['backend']:<12} {row['mae']:>7.4f} {row['mae_std']:>6.3f} {row['r2']:>7.4f} "
+                f"{row['fit_seconds']:>7.2f}  {json.dumps(row['params'])}"
+            )
+        self.stdout.write(f"Published model version {cgpa_predictor.model_version}")
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from calculator.seeding import (
+    DEFAULT_EMAIL_DOMAIN, DEFAULT_PASSWORD, clear_benchmark_data, seed_benchmark_data,
+)
+
+
+class Command(BaseCommand):
+    help = 'Populate the database with colleges, faculty and students with full histories for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colleges', type=int, default=10, help='Number of colleges')
+        parser.add_argument('--faculty-per-college', type=int, default=5, help='Faculty accounts per college')
+        parser.add_argument('--students', type=int, default=10_000, help='Total number of students')
+        parser.add_argument('--semesters', type=int, default=8,
+                            help='Semesters of history per student')
+        parser.add_argument('--minor-share', type=float, default=0.2,
+                            help='Fraction of students taking a minor')
+        parser.add_argument('--honor-share', type=float, default=0.1,
+                            help='Fraction of students taking honours')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Students written per transaction')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the random generator')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every seeded account')
+        parser.add_argument('--email-domain', default=DEFAULT_EMAIL_DOMAIN,
+                            help='Email domain of the seeded accounts')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete previously seeded accounts under the email domain first')
+
+    def handle(self, *args, **options):
+        domain = options['email_domain']
+        if options['flush']:
+            deleted = clear_benchmark_data(domain)
+            self.stdout.write(f"Deleted {deleted} seeded accounts")
+        elif CustomUser.objects.filter(email__endswith=f'@{domain}').exists():
+            raise CommandError(f"Accounts under @{domain} already exist; pass --flush to replace them")
+
+        start = time.perf_counter()
+
+        def progress(written):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"  {written}/{options['students']} students ({written / elapsed:.0f}/s)")
+
+        created = seed_benchmark_data(
+            colleges=options['colleges'],
+            faculty_per_college=options['faculty_per_college'],
+            students=options['students'],
+            semesters=options['semesters'],
+            minor_share=options['minor_share'],
+            honor_share=options['honor_share'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            password=options['password'],
+            email_domain=domain,
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created['colleges']} colleges, {created['faculty']} faculty and "
+            f"{created['students']} students in {time.perf_counter() - start:.1f}s"
+        ))
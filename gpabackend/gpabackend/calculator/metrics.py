@@ -0,0 +1,374 @@
+"""
+Per-view request metrics, aggregated across worker processes.
+
+MetricsMiddleware records, for each resolved view: requests by method and
+status code, a latency histogram, DB queries and time (counted with
+connection.execute_wrapper) and response bytes.
+
+Counters live in per-thread accumulators. Only the owning thread writes to
+an accumulator, so recording a request takes no lock. Readers take a copy
+and may be one request behind. When a thread exits, its accumulator is
+folded into the process totals of exited threads, so servers that start a
+thread per request do not grow the registry.
+
+Each process writes its totals to its own JSON file in CGPA_METRICS_DIR,
+at most once per CGPA_METRICS_FLUSH_INTERVAL seconds. The file is named
+after the pid and the time the process first used the registry, so a
+restarted worker that gets a recycled pid does not overwrite the totals of
+the one before it. /metrics adds up every file, with the serving process's
+live totals in place of its own file, and renders the result in the
+Prometheus text format.
+
+Before adding up, /metrics folds the files of processes that are no longer
+running into exited.json and deletes them, so counters never go backwards
+and the directory holds one file per live worker. Liveness is checked by
+pid, so the directory must not be shared between hosts.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import itertools
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.db import connection
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+PREFIX = 'gpabackend'
+
+# Totals of exited processes, and the lock taken while folding files into it
+EXITED_FILE = 'exited.json'
+PRUNE_LOCK_FILE = 'prune.lock'
+
+
+def metrics_dir():
+    return getattr(settings, 'CGPA_METRICS_DIR', None) or os.path.join(tempfile.gettempdir(), 'gpabackend-metrics')
+
+
+def view_label(request):
+    """Dotted path of the view that handled the request"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    func = match.func
+    view = getattr(func, 'view_class', func)  # as_view() and @api_view wrap the real view in a class
+    return f'{func.__module__}.{view.__name__}'
+
+
+def _empty_view_stats():
+    return {
+        'requests': {},  # "METHOD STATUS" -> count
+        'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),  # the last bucket is +Inf
+        'latency_sum': 0.0,
+        'db_queries': 0,
+        'db_seconds': 0.0,
+        'response_bytes': 0,
+    }
+
+
+def _merge(into, stats):
+    for key, count in stats['requests'].items():
+        into['requests'][key] = into['requests'].get(key, 0) + count
+    into['latency_buckets'] = [a + b for a, b in zip(into['latency_buckets'], stats['latency_buckets'])]
+    for name in ('latency_sum', 'db_queries', 'db_seconds', 'response_bytes'):
+        into[name] += stats[name]
+
+
+def _file_pid(name):
+    """Process id of a metrics-<pid>-<start>.json file (or its .tmp), None for other files"""
+    stem = name.split('.', 1)[0]
+    if not stem.startswith('metrics-'):
+        return None
+    pid = stem[len('metrics-'):].split('-', 1)[0]
+    return int(pid) if pid.isdigit() else None
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # running, as another user
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # gone, being replaced, or left half-written by a killed worker
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class _ThreadToken:
+    """Held only by a thread's local storage, so it is freed when the thread exits"""
+
+
+class MetricsRegistry:
+    """Per-process request metrics"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._accumulators = {}  # registration number -> accumulator of a live thread
+        self._exited = {}  # totals of threads that have exited
+        self._numbers = itertools.count()
+        self._register_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._process = None  # (pid, start time) naming this process's file
+
+    def _accumulator(self):
+        views = getattr(self._local, 'views', None)
+        if views is None:
+            views = self._local.views = {}
+            self._local.token = token = _ThreadToken()
+            number = next(self._numbers)
+            with self._register_lock:  # once per thread
+                self._accumulators[number] = views
+            weakref.finalize(token, self._retire, number)
+        return views
+
+    def _retire(self, number):
+        """Fold the accumulator of an exited thread into the exited-thread totals"""
+        with self._register_lock:
+            views = self._accumulators.pop(number)
+            for view, stats in views.items():
+                _merge(self._exited.setdefault(view, _empty_view_stats()), stats)
+
+    def record(self, view, method, status, seconds, db_queries, db_seconds, response_bytes):
+        views = self._accumulator()
+        stats = views.get(view)
+        if stats is None:
+            stats = views[view] = _empty_view_stats()
+        key = f'{method} {status}'
+        stats['requests'][key] = stats['requests'].get(key, 0) + 1
+        bucket = len(LATENCY_BUCKETS)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                bucket = index
+                break
+        stats['latency_buckets'][bucket] += 1
+        stats['latency_sum'] += seconds
+        stats['db_queries'] += db_queries
+        stats['db_seconds'] += db_seconds
+        stats['response_bytes'] += response_bytes
+
+    def snapshot(self):
+        """Totals of every thread in this process, with the prediction cache counters when loaded"""
+        totals = {}
+        with self._register_lock:  # a thread exiting meanwhile would be counted twice or not at all
+            for views in [self._exited, *self._accumulators.values()]:
+                for view, stats in list(views.items()):
+                    copy = {
+                        'requests': dict(stats['requests']),
+                        'latency_buckets': list(stats['latency_buckets']),
+                        **{name: stats[name] for name in ('latency_sum', 'db_queries', 'db_seconds', 'response_bytes')},
+                    }
+                    _merge(totals.setdefault(view, _empty_view_stats()), copy)
+        return {'views': totals, 'prediction_cache': prediction_cache_stats()}
+
+    def path(self):
+        pid = os.getpid()
+        if self._process is None or self._process[0] != pid:  # first use, or forked since
+            self._process = (pid, time.time_ns())
+        return os.path.join(metrics_dir(), f'metrics-{pid}-{self._process[1]}.json')
+
+    def flush(self, force=False):
+        """Write this process's totals to its file, unless another thread is already doing it"""
+        interval = getattr(settings, 'CGPA_METRICS_FLUSH_INTERVAL', 1.0)
+        if not force and time.monotonic() - self._last_flush < interval:
+            return False
+        if not self._flush_lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_flush = time.monotonic()
+            path = self.path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_json(path, self.snapshot())
+            return True
+        finally:
+            self._flush_lock.release()
+
+    def prune_exited(self):
+        """
+        Fold the files of processes that are no longer running into
+        exited.json and delete them. Returns the number of files folded in.
+        """
+        directory = metrics_dir()
+        if not os.path.isdir(directory):
+            return 0
+        with open(os.path.join(directory, PRUNE_LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file is closed
+            names = os.listdir(directory)
+            exited = _read_json(os.path.join(directory, EXITED_FILE)) or {'views': {}, 'prediction_cache': {}}
+            # Names are kept until the file is gone, so a crash before unlinking cannot count it twice
+            absorbed = set(exited.get('absorbed', [])) & set(names)
+            dead = []
+            for name in names:
+                pid = _file_pid(name)
+                if pid is not None and name not in absorbed and not _is_running(pid):
+                    dead.append(name)
+            if not dead:
+                return 0
+
+            folded = 0
+            for name in dead:
+                snapshot = _read_json(os.path.join(directory, name)) if name.endswith('.json') else None
+                if snapshot is None:
+                    continue  # a .tmp left by a killed worker; its last complete totals are in the .json
+                for view, stats in snapshot.get('views', {}).items():
+                    _merge(exited['views'].setdefault(view, _empty_view_stats()), stats)
+                for key in ('hits', 'misses'):  # the cache size of an exited process is no longer there
+                    value = (snapshot.get('prediction_cache') or {}).get(key, 0)
+                    exited['prediction_cache'][key] = exited['prediction_cache'].get(key, 0) + value
+                absorbed.add(name)
+                folded += 1
+            exited['absorbed'] = sorted(absorbed)
+            _write_json(os.path.join(directory, EXITED_FILE), exited)
+            for name in dead:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+            return folded
+
+    def aggregate(self):
+        """Totals across every process that has written to CGPA_METRICS_DIR"""
+        self.prune_exited()
+        own = self.path()
+        directory = metrics_dir()
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        others = {}
+        for name in names:
+            path = os.path.join(directory, name)
+            if _file_pid(name) is None or not name.endswith('.json') or path == own:
+                continue
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                others[name] = snapshot
+        # Read last: a file folded in by another process meanwhile is counted once, here
+        exited = _read_json(os.path.join(directory, EXITED_FILE)) or {}
+        for name in exited.get('absorbed', []):
+            others.pop(name, None)
+        snapshots = [self.snapshot(), *others.values()]
+
+        views = {}
+        cache = {}
+        for snapshot in snapshots + [exited]:
+            for view, stats in snapshot.get('views', {}).items():
+                _merge(views.setdefault(view, _empty_view_stats()), stats)
+            for name, value in (snapshot.get('prediction_cache') or {}).items():
+                cache[name] = cache.get(name, 0) + value
+        return {'views': views, 'prediction_cache': cache, 'processes': len(snapshots)}
+
+
+def prediction_cache_stats():
+    """Hit/miss counters of this process's prediction cache, without importing the prediction stack"""
+    from .prediction_service import get_predictor, is_loaded
+    if not is_loaded():
+        return {}
+    stats = get_predictor().cache.stats()
+    return {name: stats[name] for name in ('hits', 'misses', 'size')}
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Record latency, DB queries, response size and status of every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counts = [0, 0.0]
+
+        def count_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                counts[0] += 1
+                counts[1] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        size = 0 if response.streaming else len(response.content)
+        registry.record(
+            view_label(request), request.method, response.status_code, elapsed, counts[0], counts[1], size
+        )
+        registry.flush()
+        return response
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(totals):
+    """Render aggregate() output in the Prometheus text exposition format"""
+    lines = []
+
+    def metric(name, kind, help_text):
+        lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+    views = sorted(totals['views'].items())
+
+    metric('http_requests_total', 'counter', 'Requests by view, method and status code')
+    for view, stats in views:
+        for key, count in sorted(stats['requests'].items()):
+            method, status = key.split(' ', 1)
+            lines.append(
+                f'{PREFIX}_http_requests_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {count}'
+            )
+
+    metric('http_request_duration_seconds', 'histogram', 'Request latency by view')
+    for view, stats in views:
+        label = f'view="{_escape(view)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), stats['latency_buckets']):
+            cumulative += count
+            lines.append(f'{PREFIX}_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_http_request_duration_seconds_sum{{{label}}} {stats["latency_sum"]:.6f}')
+        lines.append(f'{PREFIX}_http_request_duration_seconds_count{{{label}}} {cumulative}')
+
+    for name, key, help_text in (
+        ('db_queries_total', 'db_queries', 'Database queries by view'),
+        ('db_query_duration_seconds_total', 'db_seconds', 'Time spent in database queries by view'),
+        ('http_response_bytes_total', 'response_bytes', 'Response body bytes by view'),
+    ):
+        metric(name, 'counter', help_text)
+        for view, stats in views:
+            lines.append(f'{PREFIX}_{name}{{view="{_escape(view)}"}} {stats[key]}')
+
+    cache = totals.get('prediction_cache') or {}
+    if cache:
+        metric('prediction_cache_hits_total', 'counter', 'CGPA prediction cache hits')
+        lines.append(f'{PREFIX}_prediction_cache_hits_total {cache.get("hits", 0)}')
+        metric('prediction_cache_misses_total', 'counter', 'CGPA prediction cache misses')
+        lines.append(f'{PREFIX}_prediction_cache_misses_total {cache.get("misses", 0)}')
+        metric('prediction_cache_entries', 'gauge', 'Cached CGPA predictions')
+        lines.append(f'{PREFIX}_prediction_cache_entries {cache.get("size", 0)}')
+
+    metric('metrics_processes', 'gauge', 'Worker processes whose metrics are included')
+    lines.append(f'{PREFIX}_metrics_processes {totals["processes"]}')
+    return '\n'.join(lines) + '\n'
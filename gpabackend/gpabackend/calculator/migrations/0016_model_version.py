@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0015_trainingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cgpaprediction',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='trainingjob',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
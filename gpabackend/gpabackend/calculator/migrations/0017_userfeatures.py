@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-19 03:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_customuser_has_seen_increment_notification_and_more'),
+        ('calculator', '0016_model_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserFeatures',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='prediction_features', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('num_S', models.IntegerField(default=0)),
+                ('num_A', models.IntegerField(default=0)),
+                ('num_B', models.IntegerField(default=0)),
+                ('num_C', models.IntegerField(default=0)),
+                ('num_D', models.IntegerField(default=0)),
+                ('num_F', models.IntegerField(default=0)),
+                ('total_credits', models.IntegerField(default=0)),
+                ('earned_credits', models.IntegerField(default=0)),
+                ('latest_sgpa', models.FloatField(blank=True, null=True)),
+                ('study_hours_per_week', models.FloatField(default=12.0)),
+                ('participated_in_events', models.BooleanField(default=False)),
+                ('project_count', models.IntegerField(default=0)),
+                ('internship_experience', models.BooleanField(default=False)),
+                ('travel_time_minutes', models.IntegerField(default=30)),
+                ('lives_in_pg_or_hostel', models.BooleanField(default=False)),
+                ('previous_board_cgpa', models.FloatField(default=8.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0017_userfeatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingjob',
+            name='search_budget',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-19 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0018_trainingjob_search_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cgpaprediction',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ModelAccuracy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_version', models.CharField(blank=True, default='', max_length=64)),
+                ('cohort', models.CharField(blank=True, default='', max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('sum_error', models.FloatField(default=0.0)),
+                ('sum_abs_error', models.FloatField(default=0.0)),
+                ('sum_squared_error', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['model_version', 'cohort'],
+                'unique_together': {('model_version', 'cohort')},
+            },
+        ),
+    ]
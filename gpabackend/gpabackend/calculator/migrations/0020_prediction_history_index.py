@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-19 04:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0019_prediction_accuracy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cgpaprediction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='prediction_history_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.1 on 2026-10-19 04:20
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FEATURE_COLUMNS = [
+    'num_S', 'num_A', 'num_B', 'num_C', 'num_D', 'num_F',
+    'study_hours_per_week', 'participated_in_events', 'project_count',
+    'internship_experience', 'travel_time_minutes', 'lives_in_pg_or_hostel',
+    'previous_board_cgpa'
+]
+
+
+def move_inputs(apps, schema_editor):
+    """Store every distinct input vector once and point each prediction at it"""
+    CGPAPrediction = apps.get_model('calculator', 'CGPAPrediction')
+    PredictionInput = apps.get_model('calculator', 'PredictionInput')
+
+    rows = CGPAPrediction.objects.order_by('pk').values('pk', *FEATURE_COLUMNS)
+    batch = []
+
+    def flush():
+        inputs = {}
+        updates = []
+        for row in batch:
+            values = {name: row[name] for name in FEATURE_COLUMNS}
+            canonical = json.dumps([round(float(values[name]), 6) for name in FEATURE_COLUMNS])
+            digest = hashlib.sha256(canonical.encode()).hexdigest()
+            inputs[digest] = PredictionInput(digest=digest, **values)
+            updates.append(CGPAPrediction(pk=row['pk'], inputs_id=digest))
+        PredictionInput.objects.bulk_create(inputs.values(), ignore_conflicts=True)
+        CGPAPrediction.objects.bulk_update(updates, ['inputs'])
+        batch.clear()
+
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(row)
+        if len(batch) >= 2000:
+            flush()
+    if batch:
+        flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0021_predictionmonthlysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionInput',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('num_S', models.IntegerField(default=0)),
+                ('num_A', models.IntegerField(default=0)),
+                ('num_B', models.IntegerField(default=0)),
+                ('num_C', models.IntegerField(default=0)),
+                ('num_D', models.IntegerField(default=0)),
+                ('num_F', models.IntegerField(default=0)),
+                ('study_hours_per_week', models.FloatField(default=12.0)),
+                ('participated_in_events', models.BooleanField(default=False)),
+                ('project_count', models.IntegerField(default=0)),
+                ('internship_experience', models.BooleanField(default=False)),
+                ('travel_time_minutes', models.IntegerField(default=30)),
+                ('lives_in_pg_or_hostel', models.BooleanField(default=False)),
+                ('previous_board_cgpa', models.FloatField(default=8.0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cgpaprediction',
+            name='inputs',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='predictions', to='calculator.predictioninput'),
+        ),
+        migrations.RunPython(move_inputs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cgpaprediction',
+            name='inputs',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='predictions', to='calculator.predictioninput'),
+        ),
+        migrations.RemoveField(model_name='cgpaprediction', name='num_S'),
+        migrations.RemoveField(model_name='cgpaprediction', name='num_A'),
+        migrations.RemoveField(model_name='cgpaprediction', name='num_B'),
+        migrations.RemoveField(model_name='cgpaprediction', name='num_C'),
+        migrations.RemoveField(model_name='cgpaprediction', name='num_D'),
+        migrations.RemoveField(model_name='cgpaprediction', name='num_F'),
+        migrations.RemoveField(model_name='cgpaprediction', name='study_hours_per_week'),
+        migrations.RemoveField(model_name='cgpaprediction', name='participated_in_events'),
+        migrations.RemoveField(model_name='cgpaprediction', name='project_count'),
+        migrations.RemoveField(model_name='cgpaprediction', name='internship_experience'),
+        migrations.RemoveField(model_name='cgpaprediction', name='travel_time_minutes'),
+        migrations.RemoveField(model_name='cgpaprediction', name='lives_in_pg_or_hostel'),
+        migrations.RemoveField(model_name='cgpaprediction', name='previous_board_cgpa'),
+    ]
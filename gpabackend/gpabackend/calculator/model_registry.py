@@ -0,0 +1,115 @@
+"""
+On-disk registry of trained CGPA models.
+
+Layout:
+    <root>/versions/<version>/model.pkl      pickled estimator
+    <root>/versions/<version>/metadata.json  metrics, training size, feature schema
+    <root>/current                           name of the active version
+
+Versions are written to a temporary directory and renamed into place, and the
+`current` pointer is replaced with os.replace, so readers in other processes
+only ever see complete artifacts. Workers compare the pointer's mtime to decide
+whether they need to reload.
+"""
+import json
+import os
+import pickle
+import secrets
+import shutil
+import time
+
+
+class ModelRegistry:
+    MODEL_FILE = 'model.pkl'
+    METADATA_FILE = 'metadata.json'
+    POINTER_FILE = 'current'
+
+    def __init__(self, root):
+        self.root = str(root)
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.pointer_path = os.path.join(self.root, self.POINTER_FILE)
+
+    def _version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def new_version(self):
+        """Sortable, unique version identifier"""
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(3)}"
+
+    def publish(self, model, metadata=None, activate=True):
+        """
+        Store a model as a new version and, by default, make it current.
+        Returns the version identifier.
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version = self.new_version()
+        metadata = dict(metadata or {}, version=version, created_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+
+        tmp_dir = self._version_dir(f".{version}.tmp")
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, self.MODEL_FILE), 'wb') as f:
+                pickle.dump(model, f)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(os.path.join(tmp_dir, self.METADATA_FILE), 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            os.rename(tmp_dir, self._version_dir(version))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Point `current` at an existing version (also used for rollbacks)"""
+        if not os.path.isdir(self._version_dir(version)):
+            raise ValueError(f"Unknown model version: {version}")
+        tmp_pointer = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_pointer, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, self.pointer_path)
+
+    def pointer_stamp(self):
+        """Cheap change marker for the `current` pointer, or None when nothing is published"""
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    def current_version(self):
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None):
+        """Return (model, metadata) for a version, defaulting to the current one"""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError("No model version has been published")
+        with open(os.path.join(self._version_dir(version), self.MODEL_FILE), 'rb') as f:
+            model = pickle.load(f)
+        return model, self.metadata(version)
+
+    def metadata(self, version):
+        path = os.path.join(self._version_dir(version), self.METADATA_FILE)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': version}
+
+    def list_versions(self):
+        """Published versions, oldest first"""
+        try:
+            names = os.listdir(self.versions_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if not name.startswith('.'))
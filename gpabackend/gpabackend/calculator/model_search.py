@@ -0,0 +1,138 @@
+"""
+Hyperparameter search for the CGPA model.
+
+Candidates (a backend plus parameter overrides) are scored with k-fold
+cross-validation in a pool of worker processes, one candidate per process, so
+every core on the training box is busy. The training set is sent to each
+worker once through the pool initializer rather than with every task.
+
+The search runs against a wall-clock budget: candidates are submitted only
+while time remains, and once the budget is spent the remaining ones are
+skipped. Candidates already running are allowed to finish, so the search can
+overrun the budget by at most one cross-validation run.
+"""
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.model_selection import KFold, cross_validate
+
+from .predictor_backends import make_estimator
+
+logger = logging.getLogger(__name__)
+
+# Parameter grid per backend; every combination is one candidate
+SEARCH_SPACE = {
+    'linear': {},
+    'gbt': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [2, 3, 4],
+        'learning_rate': [0.05, 0.1],
+        'min_samples_leaf': [1, 5],
+    },
+    'forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [None, 8, 16],
+        'min_samples_leaf': [1, 3, 5],
+        'max_features': [1.0, 0.5],
+    },
+    'extra_trees': {
+        'n_estimators': [100, 200],
+        'max_depth': [None, 12],
+        'min_samples_leaf': [1, 3, 5],
+    },
+}
+
+# Set in each worker process by _init_worker
+_training_set = None
+
+
+def candidates(backends=None, seed=42):
+    """
+    Expand SEARCH_SPACE into (backend, params) pairs in a shuffled but
+    reproducible order, so a short budget still samples every family
+    """
+    backends = backends or list(SEARCH_SPACE)
+    pairs = []
+    for backend in backends:
+        if backend not in SEARCH_SPACE:
+            raise ValueError(f"No search space for backend: {backend}. Choose from {', '.join(SEARCH_SPACE)}")
+        grid = SEARCH_SPACE[backend]
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            pairs.append((backend, dict(zip(names, values))))
+    random.Random(seed).shuffle(pairs)
+    return pairs
+
+
+def _init_worker(X, y):
+    global _training_set
+    _training_set = (X, y)
+
+
+def evaluate_candidate(backend, params, folds=5, X=None, y=None):
+    """Cross-validate one candidate and return its row of the results table"""
+    if X is None:
+        X, y = _training_set
+    estimator = make_estimator(backend, **params)
+    start = time.perf_counter()
+    scores = cross_validate(
+        estimator, X, y,
+        cv=KFold(n_splits=folds, shuffle=True, random_state=42),
+        scoring=('neg_mean_absolute_error', 'neg_root_mean_squared_error', 'r2'),
+    )
+    return {
+        'backend': backend,
+        'params': params,
+        'mae': float(-scores['test_neg_mean_absolute_error'].mean()),
+        'mae_std': float(scores['test_neg_mean_absolute_error'].std()),
+        'rmse': float(-scores['test_neg_root_mean_squared_error'].mean()),
+        'r2': float(scores['test_r2'].mean()),
+        'fit_seconds': float(scores['fit_time'].mean()),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run_search(X, y, budget_seconds, backends=None, folds=5, max_workers=None):
+    """
+    Score candidates in parallel until they are exhausted or the budget is spent.
+
+    Returns:
+        dict: 'results' (rows sorted by cross-validated MAE, best first),
+            'skipped' (candidates never started), 'elapsed_seconds' and 'workers'
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    queue = candidates(backends)
+    max_workers = max_workers or os.cpu_count() or 1
+    deadline = time.monotonic() + budget_seconds
+    start = time.monotonic()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        running = set()
+        while queue or running:
+            # Keep one candidate queued per worker while there is time left
+            while queue and len(running) < max_workers and time.monotonic() < deadline:
+                backend, params = queue.pop(0)
+                running.add(pool.submit(evaluate_candidate, backend, params, folds))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.warning("Search candidate failed: %s", e)
+
+    results.sort(key=lambda row: row['mae'])
+    return {
+        'results': results,
+        'skipped': len(queue),
+        'elapsed_seconds': time.monotonic() - start,
+        'workers': max_workers,
+    }
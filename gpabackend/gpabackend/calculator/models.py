@@ -1,5 +1,9 @@
+import hashlib
+import json
+
 from django.db import models
 from accounts.models import CustomUser  # Import the CustomUser model from accounts
+from .features import FEATURE_COLUMNS
 
 class Semester(models.Model):
     """
@@ -67,15 +71,12 @@ class GradeDetail(models.Model):
     def __str__(self):
         return f"{self.subject.name} - Marks: {self.marks}, Grade: {self.grade}"
 
-class CGPAPrediction(models.Model):
+class PredictionInput(models.Model):
     """
-    Model to store CGPA prediction history
+    Model to store each distinct CGPA prediction input vector once,
+    keyed by a hash of its canonical values
     """
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='cgpa_predictions')
-    predicted_cgpa = models.FloatField()
-    actual_cgpa = models.FloatField(null=True, blank=True)  # To compare with actual results later
-    
-    # Input features used for prediction
+    digest = models.CharField(max_length=64, primary_key=True)
     num_S = models.IntegerField(default=0)
     num_A = models.IntegerField(default=0)
     num_B = models.IntegerField(default=0)
@@ -89,14 +90,174 @@ class CGPAPrediction(models.Model):
     travel_time_minutes = models.IntegerField(default=30)
     lives_in_pg_or_hostel = models.BooleanField(default=False)
     previous_board_cgpa = models.FloatField(default=8.0)
+
+    def __str__(self):
+        return f"Prediction input {self.digest[:12]}"
+
+    @classmethod
+    def from_features(cls, features):
+        """
+        Unsaved instance for a feature dict, with values coerced to the column
+        types and the digest set. Flags are stored as bool(value), so any
+        non-zero number counts as true.
+        """
+        values = {
+            field.name: bool(features[field.name]) if isinstance(field, models.BooleanField)
+            else field.to_python(features[field.name])
+            for field in cls._meta.fields if field.name != 'digest'
+        }
+        canonical = json.dumps([round(float(values[name]), 6) for name in FEATURE_COLUMNS])
+        return cls(digest=hashlib.sha256(canonical.encode()).hexdigest(), **values)
+
+
+class CGPAPrediction(models.Model):
+    """
+    Model to store CGPA prediction history
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='cgpa_predictions')
+    predicted_cgpa = models.FloatField()
+    actual_cgpa = models.FloatField(null=True, blank=True)  # To compare with actual results later
+    
+    # Input features used for prediction, shared by every prediction made with the same values
+    inputs = models.ForeignKey(PredictionInput, on_delete=models.PROTECT, related_name='predictions')
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     prediction_type = models.CharField(max_length=50, default='manual')  # 'manual' or 'from_user_data'
+    model_version = models.CharField(max_length=64, blank=True, default='')  # Registry version that made the prediction
+    scored_at = models.DateTimeField(null=True, blank=True, db_index=True)  # When actual_cgpa was backfilled and counted in ModelAccuracy
     
     def __str__(self):
         return f"{self.user.username} - Predicted CGPA: {self.predicted_cgpa} ({self.created_at})"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's history (see calculator.pagination)
+            models.Index(fields=['user', '-created_at', '-id'], name='prediction_history_idx'),
+        ]
+
+
+class TrainingJob(models.Model):
+    """
+    Model to queue CGPA model training runs for the background training worker
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='training_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    search_budget = models.FloatField(null=True, blank=True)  # Seconds for a hyperparameter search; plain training when empty
+    metrics = models.JSONField(null=True, blank=True)  # Evaluation metrics of the trained model
+    model_version = models.CharField(max_length=64, blank=True, default='')  # Registry version published by this job
+    error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Training job {self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+
+class UserFeatures(models.Model):
+    """
+    Model to store each user's current prediction inputs, kept up to date as
+    grades and semesters change so predictions need a single lookup
+    """
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='prediction_features')
+
+    # Grade bucket counts across all recorded subjects
+    num_S = models.IntegerField(default=0)
+    num_A = models.IntegerField(default=0)
+    num_B = models.IntegerField(default=0)
+    num_C = models.IntegerField(default=0)
+    num_D = models.IntegerField(default=0)
+    num_F = models.IntegerField(default=0)
+
+    # Academic totals
+    total_credits = models.IntegerField(default=0)
+    earned_credits = models.IntegerField(default=0)
+    latest_sgpa = models.FloatField(null=True, blank=True)
+
+    # Lifestyle features last submitted through the prediction form
+    study_hours_per_week = models.FloatField(default=12.0)
+    participated_in_events = models.BooleanField(default=False)
+    project_count = models.IntegerField(default=0)
+    internship_experience = models.BooleanField(default=False)
+    travel_time_minutes = models.IntegerField(default=30)
+    lives_in_pg_or_hostel = models.BooleanField(default=False)
+    previous_board_cgpa = models.FloatField(default=8.0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - prediction features"
+
+
+class ModelAccuracy(models.Model):
+    """
+    Running error totals of scored predictions for one model version and cohort (degree).
+    Updated incrementally by score_predictions, so reports never rescan CGPAPrediction.
+    """
+    model_version = models.CharField(max_length=64, blank=True, default='')
+    cohort = models.CharField(max_length=10, blank=True, default='')
+    count = models.IntegerField(default=0)
+    sum_error = models.FloatField(default=0.0)  # predicted - actual, for bias
+    sum_abs_error = models.FloatField(default=0.0)
+    sum_squared_error = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('model_version', 'cohort')
+        ordering = ['model_version', 'cohort']
+
+    def __str__(self):
+        return f"{self.model_version or 'unversioned'} / {self.cohort or 'unknown'}: {self.count} scored"
+
+    @property
+    def mae(self):
+        return self.sum_abs_error / self.count if self.count else None
+
+    @property
+    def rmse(self):
+        return (self.sum_squared_error / self.count) ** 0.5 if self.count else None
+
+    @property
+    def bias(self):
+        return self.sum_error / self.count if self.count else None
+
+
+class PredictionMonthlySummary(models.Model):
+    """
+    Compacted CGPA prediction history: one row per user and month, replacing
+    individual CGPAPrediction rows older than the retention window
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='prediction_summaries')
+    month = models.DateField()  # First day of the month
+    prediction_count = models.IntegerField(default=0)
+    sum_predicted_cgpa = models.FloatField(default=0.0)
+    min_predicted_cgpa = models.FloatField(null=True, blank=True)
+    max_predicted_cgpa = models.FloatField(null=True, blank=True)
+    last_predicted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('user', 'month')
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m}: {self.prediction_count} predictions"
 
+    @property
+    def average_predicted_cgpa(self):
+        return self.sum_predicted_cgpa / self.prediction_count if self.prediction_count else None
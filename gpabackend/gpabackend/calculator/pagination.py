@@ -0,0 +1,47 @@
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+A page is fetched with WHERE (created_at, id) < (cursor) ORDER BY created_at
+DESC, id DESC LIMIT n + 1, which an index on (user, created_at, id) answers
+without skipping over earlier rows, so page 100 costs the same as page 1.
+The extra row only tells whether another page exists.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(created_at, pk):
+    raw = json.dumps([created_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, pk) from a cursor string; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def keyset_page(queryset, cursor=None, page_size=10):
+    """
+    One page of queryset (a values() queryset including 'created_at' and 'id'),
+    newest first.
+
+    Returns:
+        tuple: (rows, next_cursor), with next_cursor None on the last page
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
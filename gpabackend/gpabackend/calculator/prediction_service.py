@@ -0,0 +1,49 @@
+"""
+Lazy entry point to the CGPA prediction stack.
+
+cgpa_predictor pulls in pandas and scikit-learn, which add over a second and
+tens of MB to process startup. Views and other light modules call
+get_predictor() instead of importing it, so URLconf loading, migrations and
+unrelated management commands never pay for it. The stack is imported on the
+first prediction request, or up front by the WSGI/ASGI entry points when
+CGPA_PRELOAD_PREDICTOR is set (e.g. with gunicorn --preload, so forked
+workers share the loaded pages).
+"""
+import sys
+
+from django.conf import settings
+
+PREDICTOR_MODULE = 'calculator.cgpa_predictor'
+
+# Modules that must not be imported just by loading the URLconf
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy')
+
+
+def get_predictor():
+    """Return the shared CGPAPredictor, importing the prediction stack on first use"""
+    from .cgpa_predictor import cgpa_predictor
+    return cgpa_predictor
+
+
+def is_loaded():
+    return PREDICTOR_MODULE in sys.modules
+
+
+def loaded_model_version():
+    """Version of the model in memory, without importing the stack when it is not loaded"""
+    if not is_loaded():
+        return None
+    return get_predictor().model_version
+
+
+def preload():
+    """Import the prediction stack and load the current model"""
+    predictor = get_predictor()
+    predictor.refresh_if_stale()
+    return predictor
+
+
+def preload_for_serving():
+    """Preload when CGPA_PRELOAD_PREDICTOR is set; called only by the processes that serve requests"""
+    if getattr(settings, 'CGPA_PRELOAD_PREDICTOR', False):
+        preload()
@@ -0,0 +1,89 @@
+"""
+Model families the CGPA predictor can be trained with.
+
+The backend used by train_model is chosen with the CGPA_PREDICTOR_BACKEND
+setting. Serving always uses whatever version is current in the model
+registry, so switching backends takes effect after the next training run.
+"""
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from .forest_eval import FlatForest
+
+
+def make_linear():
+    return LinearRegression()
+
+
+def make_gbt():
+    # Small boosted ensemble: far fewer nodes than the forest, similar accuracy on our features
+    return GradientBoostingRegressor(n_estimators=100, max_depth=3, learning_rate=0.1, random_state=42)
+
+
+def make_forest():
+    # Random Forest Regressor (best performing model from notebook)
+    return RandomForestRegressor(n_estimators=100, random_state=42)
+
+
+def make_extra_trees():
+    return ExtraTreesRegressor(n_estimators=100, random_state=42)
+
+
+BACKENDS = {
+    'linear': make_linear,
+    'gbt': make_gbt,
+    'forest': make_forest,
+    'extra_trees': make_extra_trees,
+}
+
+DEFAULT_BACKEND = 'forest'
+
+
+def make_estimator(name, **params):
+    """Return an unfitted estimator for the named backend, with params overriding its defaults"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown predictor backend: {name}. Choose from {', '.join(BACKENDS)}")
+    estimator = BACKENDS[name]()
+    if params:
+        estimator.set_params(**params)
+    return estimator
+
+
+class LinearEvaluator:
+    """Evaluates a fitted linear model as a dot product, bypassing sklearn's input checks"""
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.ravel(intercept)[0]) if np.ndim(intercept) else float(intercept)
+
+    @classmethod
+    def supports(cls, model):
+        return type(model).__name__ in ('LinearRegression', 'Ridge', 'Lasso') and hasattr(model, 'coef_')
+
+    @classmethod
+    def from_sklearn(cls, model):
+        return cls(model.coef_, model.intercept_)
+
+    @property
+    def nbytes(self):
+        return self.coef.nbytes
+
+    def _as_matrix(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def predict(self, X):
+        return self._as_matrix(X) @ self.coef + self.intercept
+
+    def contributions(self, X):
+        """(bias, per-feature contributions) with the same meaning as FlatForest.contributions"""
+        return self.intercept, self._as_matrix(X) * self.coef
+
+
+def compile_evaluator(model):
+    """Fast evaluator for a fitted model, or None when it must go through model.predict"""
+    for evaluator in (FlatForest, LinearEvaluator):
+        if evaluator.supports(model):
+            return evaluator.from_sklearn(model)
+    return None
@@ -0,0 +1,151 @@
+"""
+Retention policy for CGPAPrediction.
+
+Predictions newer than CGPA_PREDICTION_RETENTION_DAYS are kept in full. Older
+ones are folded into PredictionMonthlySummary rows and deleted, a small batch
+per transaction, so no run holds long locks on the prediction table:
+
+  1. select the ids of the oldest expired predictions (up to batch_size);
+  2. aggregate them per user and month in one grouped query;
+  3. add the aggregates to the monthly summaries and delete the batch;
+  4. in a separate transaction, delete the PredictionInput rows the batch was
+     the last user of.
+
+Step 4 can race with a request reusing one of those inputs: its INSERT of
+the input is skipped because the row exists, then its prediction references
+the row compaction is deleting, so one of the two fails on the foreign key.
+If it is the request, save_predictions (views.py) retries its transaction,
+which inserts the input again. If it is the cleanup, the batch's inputs are
+kept and retried once at the end of the run, again batch_size at a time;
+those in use by then are left alone.
+
+Scorable predictions are scored first (see accuracy.py), and only scored
+predictions are compacted after CGPA_PREDICTION_RETENTION_DAYS. Unscored ones
+belong to students who have not finished yet; they are kept in full so they
+can be scored later, until CGPA_UNSCORED_PREDICTION_RETENTION_DAYS (longer
+than any student takes to finish) when they are compacted too. Run one
+compaction process at a time.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, ProtectedError, DateField, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Greatest, Least, TruncMonth
+from django.utils import timezone
+
+from .accuracy import score_predictions
+from .models import CGPAPrediction, PredictionInput, PredictionMonthlySummary
+
+
+def retention_cutoff(retention_days=None):
+    if retention_days is None:
+        retention_days = getattr(settings, 'CGPA_PREDICTION_RETENTION_DAYS', 180)
+    return timezone.now() - timedelta(days=retention_days)
+
+
+def expired_predictions(retention_days=None, unscored_retention_days=None):
+    """Predictions due for compaction, oldest first"""
+    if unscored_retention_days is None:
+        unscored_retention_days = getattr(settings, 'CGPA_UNSCORED_PREDICTION_RETENTION_DAYS', 2190)
+    cutoff = retention_cutoff(retention_days)
+    unscored_cutoff = min(cutoff, retention_cutoff(unscored_retention_days))
+    return CGPAPrediction.objects.filter(
+        Q(scored_at__isnull=False, created_at__lt=cutoff) | Q(created_at__lt=unscored_cutoff)
+    ).order_by('created_at', 'id')
+
+
+def compact_batch(prediction_ids):
+    """
+    Fold the given predictions into monthly summaries and delete them, then
+    their unused inputs. Returns the number of predictions deleted and the
+    digests of the inputs left because a request reused one meanwhile.
+    """
+    with transaction.atomic():
+        groups = CGPAPrediction.objects.filter(pk__in=prediction_ids).annotate(
+            month=TruncMonth('created_at', output_field=DateField())
+        ).values('user_id', 'month').annotate(
+            n=Count('id'),
+            total=Sum('predicted_cgpa'),
+            lowest=Min('predicted_cgpa'),
+            highest=Max('predicted_cgpa'),
+            latest=Max('created_at'),
+        ).order_by()
+
+        for group in groups:
+            summary, created = PredictionMonthlySummary.objects.get_or_create(
+                user_id=group['user_id'], month=group['month'],
+                defaults={
+                    'prediction_count': group['n'],
+                    'sum_predicted_cgpa': group['total'],
+                    'min_predicted_cgpa': group['lowest'],
+                    'max_predicted_cgpa': group['highest'],
+                    'last_predicted_at': group['latest'],
+                },
+            )
+            if not created:
+                PredictionMonthlySummary.objects.filter(pk=summary.pk).update(
+                    prediction_count=F('prediction_count') + group['n'],
+                    sum_predicted_cgpa=F('sum_predicted_cgpa') + group['total'],
+                    min_predicted_cgpa=Least('min_predicted_cgpa', Value(group['lowest'])),
+                    max_predicted_cgpa=Greatest('max_predicted_cgpa', Value(group['highest'])),
+                    last_predicted_at=Greatest('last_predicted_at', Value(group['latest'])),
+                )
+
+        digests = set(CGPAPrediction.objects.filter(pk__in=prediction_ids).values_list('inputs_id', flat=True))
+        deleted, _ = CGPAPrediction.objects.filter(pk__in=prediction_ids).delete()
+
+    kept = set() if delete_unused_inputs(digests) else digests
+    return deleted, kept
+
+
+def delete_unused_inputs(digests):
+    """
+    Delete the input vectors among digests that no prediction references.
+    Returns False if a concurrent prediction started using one of them again,
+    in which case nothing is deleted.
+    """
+    try:
+        with transaction.atomic():
+            PredictionInput.objects.filter(pk__in=digests, predictions__isnull=True).delete()
+    except (IntegrityError, ProtectedError):
+        return False
+    return True
+
+
+def compact_predictions(retention_days=None, batch_size=500, pause=0.0, max_batches=None,
+                        unscored_retention_days=None):
+    """
+    Compact every scored prediction older than the retention window, and
+    unscored ones older than the unscored retention window.
+
+    Args:
+        retention_days (int): Defaults to the CGPA_PREDICTION_RETENTION_DAYS setting
+        unscored_retention_days (int): Defaults to CGPA_UNSCORED_PREDICTION_RETENTION_DAYS
+        batch_size (int): Predictions folded and deleted per transaction
+        pause (float): Seconds to sleep between batches, leaving room for other writers
+        max_batches (int): Stop after this many batches (None for no limit)
+
+    Returns:
+        int: Number of predictions compacted
+    """
+    score_predictions()
+    expired = expired_predictions(retention_days, unscored_retention_days)
+
+    compacted = 0
+    batches = 0
+    kept = []  # inputs a batch could not delete because of a concurrent prediction
+    while max_batches is None or batches < max_batches:
+        prediction_ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not prediction_ids:
+            break
+        deleted, batch_kept = compact_batch(prediction_ids)
+        compacted += deleted
+        kept.extend(batch_kept)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    for start in range(0, len(kept), batch_size):
+        delete_unused_inputs(kept[start:start + batch_size])
+    return compacted
@@ -0,0 +1,184 @@
+"""
+Benchmark-scale fixture data.
+
+seed_benchmark_data fills the database with colleges of faculty and students,
+each student with a full 8-semester history from SyntheticStudents. It is
+built for volume rather than realism of individual rows:
+
+  - one password is hashed up front and shared by every seeded account;
+  - users and semesters are written with bulk_create, relying on it
+    returning primary keys (SQLite 3.35+, PostgreSQL); subjects and grades,
+    over 95% of the rows, with plain multi-row INSERTs, since bulk_create
+    spends most of its time preparing each model instance;
+  - one transaction per batch of students;
+  - the feature-store signals are disconnected during the load and
+    UserFeatures is rebuilt once per batch instead.
+
+Seeded accounts share an email domain, which is how clear_benchmark_data
+finds them again.
+"""
+import itertools
+import string
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from accounts.models import CustomUser
+from .courses import CREDITS
+from .feature_store import rebuild_user_features
+from .models import Grade, Semester, Subject
+from .signals import feature_store_signals_disabled
+from .synthetic import PROGRAMS, SyntheticStudents
+
+DEFAULT_EMAIL_DOMAIN = 'benchmark.test'
+DEFAULT_PASSWORD = 'benchmark-password'
+ADMISSION_YEAR = 21
+
+
+def college_codes(count):
+    """count distinct three-letter college codes: AAA, AAB, ..."""
+    codes = (''.join(letters) for letters in itertools.product(string.ascii_uppercase, repeat=3))
+    return list(itertools.islice(codes, count))
+
+
+def clear_benchmark_data(email_domain=DEFAULT_EMAIL_DOMAIN):
+    """Delete every account under email_domain along with its history. Returns the number of users deleted."""
+    users = CustomUser.objects.filter(email__endswith=f'@{email_domain}')
+    user_ids = users.values('pk')
+    with feature_store_signals_disabled(), transaction.atomic():
+        # Child tables first, so each step is a single DELETE
+        Grade.objects.filter(subject__semester__user_id__in=user_ids).delete()
+        Subject.objects.filter(semester__user_id__in=user_ids).delete()
+        Semester.objects.filter(user_id__in=user_ids).delete()
+        deleted = users.count()
+        users.delete()
+    return deleted
+
+
+def _insert_rows(model, columns, rows):
+    """INSERT rows (tuples of column values) into model's table, many rows per statement"""
+    quote = connection.ops.quote_name
+    statement = 'INSERT INTO {} ({}) VALUES '.format(
+        quote(model._meta.db_table), ', '.join(quote(column) for column in columns)
+    )
+    placeholder = '({})'.format(', '.join(['%s'] * len(columns)))
+    size = max(1, min(connection.ops.bulk_batch_size(columns, rows), 1000))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            cursor.execute(statement + ', '.join([placeholder] * len(chunk)), [value for row in chunk for value in row])
+
+
+def _load_students(batch):
+    """Write one batch of (CustomUser, record) pairs and their histories"""
+    users = CustomUser.objects.bulk_create([user for user, _ in batch])
+
+    semesters = []
+    for user, (_, record) in zip(users, batch):
+        for history in record['semesters']:
+            semesters.append(Semester(
+                user_id=user.pk,
+                semester=history['semester'],
+                gpa=history['gpa'],
+                minor_gpa=history['minor_gpa'],
+                total_credits=history['total_credits'],
+                total_points=history['total_points'],
+                earn_credits=history['earn_credits'],
+                complete_courses=history['complete_courses'],
+            ))
+    semesters = Semester.objects.bulk_create(semesters)
+
+    subjects = []
+    grades = {}
+    histories = (history for _, record in batch for history in record['semesters'])
+    for semester, history in zip(semesters, histories):
+        for name, credits, grade in history['subjects']:
+            subjects.append((semester.pk, name, credits))
+            grades[semester.pk, name] = grade
+    _insert_rows(Subject, ['semester_id', 'name', 'credits'], subjects)
+
+    subject_ids = Subject.objects.filter(
+        semester_id__in=[semester.pk for semester in semesters]
+    ).values_list('pk', 'semester_id', 'name')
+    _insert_rows(Grade, ['subject_id', 'grade'], [
+        (pk, grades[semester_id, name]) for pk, semester_id, name in subject_ids
+    ])
+
+    rebuild_user_features(user.pk for user in users)
+    return len(users)
+
+
+def seed_benchmark_data(colleges=10, faculty_per_college=5, students=1000, semesters=8, minor_share=0.2,
+                        honor_share=0.1, batch_size=1000, seed=42, password=DEFAULT_PASSWORD,
+                        email_domain=DEFAULT_EMAIL_DOMAIN, progress=None):
+    """
+    Create colleges of faculty and students with academic histories.
+
+    Students are spread round-robin over the colleges; each KTUID starts with
+    its college code, which is how faculty find their students.
+
+    Args:
+        colleges (int): Number of colleges
+        faculty_per_college (int): Faculty accounts per college
+        students (int): Total number of students
+        semesters (int): Semesters of history per student; the last one is their current semester
+        minor_share (float): Fraction of students taking a minor
+        honor_share (float): Fraction of students taking honours (where the degree offers it)
+        batch_size (int): Students written per transaction
+        seed (int): Seed for the random generator
+        password (str): Password of every seeded account
+        email_domain (str): Email domain of every seeded account
+        progress (callable): Called with the number of students written after each batch
+
+    Returns:
+        dict: Number of colleges, faculty and students created
+    """
+    if colleges < 1:
+        raise ValueError("At least one college is required")
+    generator = SyntheticStudents(seed)
+    hashed_password = make_password(password)
+    codes = college_codes(colleges)
+
+    with feature_store_signals_disabled():
+        CustomUser.objects.bulk_create(
+            [
+                CustomUser(
+                    email=f'faculty{index}.{code.lower()}@{email_domain}',
+                    username=f'faculty{index}.{code.lower()}',
+                    password=hashed_password,
+                    is_faculty=True,
+                    college_code=code,
+                )
+                for code in codes
+                for index in range(faculty_per_college)
+            ],
+            batch_size=batch_size,
+        )
+
+        written = 0
+        while written < students:
+            batch = []
+            for number in range(written, min(written + batch_size, students)):
+                draw = generator.rng.random()
+                program = 'Minor' if draw < minor_share else 'Honor' if draw < minor_share + honor_share else None
+                degree = str(generator.rng.choice(list(PROGRAMS[program]) if program else list(CREDITS)))
+                record = generator.academic_record(degree, semesters, program=program)
+                code = codes[number % colleges]
+                user = CustomUser(
+                    email=f'student{number}@{email_domain}',
+                    username=f'student{number}',
+                    password=hashed_password,
+                    KTUID=f'{code}{ADMISSION_YEAR}{degree[:2]}{number:06d}',
+                    semester=record['semesters'][-1]['semester'],
+                    degree=degree,
+                    is_minor=program == 'Minor',
+                    is_honors=program == 'Honor',
+                    cgpa=record['cgpa'],
+                )
+                batch.append((user, record))
+            with transaction.atomic():
+                written += _load_students(batch)
+            if progress:
+                progress(written)
+
+    return {'colleges': colleges, 'faculty': colleges * faculty_per_college, 'students': written}
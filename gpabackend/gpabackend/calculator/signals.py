@@ -0,0 +1,75 @@
+"""
+Keep UserFeatures in step with Grade and Semester changes.
+Connected in CalculatorConfig.ready().
+"""
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .feature_store import apply_grade_change, grade_owner_id, rebuild_user_features, refresh_academic_totals
+from .models import Grade, Semester
+
+
+@receiver(post_init, sender=Grade)
+def remember_original_grade(sender, instance, **kwargs):
+    # Lets post_save tell which bucket the grade is moving out of
+    instance._original_grade = instance.grade
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_grade = None if created else instance._original_grade
+    if old_grade == instance.grade:
+        return
+    user_id = grade_owner_id(instance)
+    if user_id is not None and not apply_grade_change(user_id, old_grade, instance.grade):
+        rebuild_user_features([user_id])
+    instance._original_grade = instance.grade
+
+
+@receiver(post_delete, sender=Grade)
+def grade_deleted(sender, instance, **kwargs):
+    user_id = grade_owner_id(instance)
+    if user_id is not None:
+        apply_grade_change(user_id, instance._original_grade, None)
+
+
+@receiver(post_save, sender=Semester)
+def semester_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if not refresh_academic_totals(instance.user_id):
+        rebuild_user_features([instance.user_id])
+
+
+@receiver(post_delete, sender=Semester)
+def semester_deleted(sender, instance, **kwargs):
+    refresh_academic_totals(instance.user_id)
+
+
+RECEIVERS = [
+    (post_init, remember_original_grade, Grade),
+    (post_save, grade_saved, Grade),
+    (post_delete, grade_deleted, Grade),
+    (post_save, semester_saved, Semester),
+    (post_delete, semester_deleted, Semester),
+]
+
+
+@contextmanager
+def feature_store_signals_disabled():
+    """
+    Disconnect the handlers above for bulk loads and deletes. Lets Django take
+    its fast delete path, and skips per-row work; call rebuild_user_features
+    for the affected users afterwards. Affects every thread in the process.
+    """
+    for signal, handler, sender in RECEIVERS:
+        signal.disconnect(handler, sender=sender)
+    try:
+        yield
+    finally:
+        for signal, handler, sender in RECEIVERS:
+            signal.connect(handler, sender=sender)
@@ -0,0 +1,189 @@
+"""
+Synthetic students for training and load benchmarks.
+
+SyntheticStudents draws from its own np.random.Generator, so runs are
+reproducible without touching NumPy's global random state, and produces
+students in fixed-size chunks of column arrays. That keeps memory flat when
+generating millions of students, which are appended to a FeatureDataset one
+chunk at a time.
+
+It also generates full academic histories: for each semester of the chosen
+degree in CREDITS, one course per slot and a grade drawn around a per-student
+ability, with semester totals and GPA computed the way calculate_gpa does.
+Minor and honours students also take every course of a MINOR/HONOR bucket,
+added to the semester the way calculate_minor does. seed_benchmark_data turns
+these into Semester/Subject/Grade rows.
+"""
+import numpy as np
+
+from .courses import CREDITS
+from .datasets import FeatureDataset
+from .features import GRADE_BUCKETS
+from .minor import HONOR, MINOR
+
+# Best to worst, with the grade points used by calculate_gpa (views.GRADE_VALUES)
+GRADE_SCALE = ['S', 'A+', 'A', 'B+', 'B', 'C+', 'C', 'D+', 'P', 'F']
+GRADE_POINTS = {'S': 10, 'A+': 9, 'A': 8.5, 'B+': 8, 'B': 7.5, 'C+': 7, 'C': 6.5, 'D+': 6, 'P': 5.5, 'F': 0}
+
+# Upper edges of the standard-normal score bands mapped to GRADE_SCALE (highest score -> S)
+GRADE_CUTS = np.array([-2.0, -1.5, -1.0, -0.5, 0.0, 0.4, 0.8, 1.2, 1.7])
+
+TARGET_COLUMN = 'final_cgpa'
+
+PROGRAMS = {'Minor': MINOR, 'Honor': HONOR}
+
+
+class SyntheticStudents:
+    def __init__(self, seed=42):
+        self.rng = np.random.default_rng(seed)
+
+    def features(self, n):
+        """
+        One chunk of model inputs and the mock final CGPA, as a dict of
+        column arrays (FEATURE_COLUMNS + 'final_cgpa')
+        """
+        rng = self.rng
+        columns = {
+            'num_S': rng.integers(0, 10, n),
+            'num_A': rng.integers(0, 10, n),
+            'num_B': rng.integers(0, 10, n),
+            'num_C': rng.integers(0, 8, n),
+            'num_D': rng.integers(0, 5, n),
+            'num_F': rng.integers(0, 3, n),
+            'study_hours_per_week': rng.normal(12, 4, n).clip(2, 25),
+            'participated_in_events': rng.integers(0, 2, n),
+            'project_count': rng.integers(0, 5, n),
+            'internship_experience': (rng.random(n) < 0.4).astype(np.int64),
+            'travel_time_minutes': rng.integers(10, 120, n),
+            'lives_in_pg_or_hostel': rng.integers(0, 2, n),
+            'previous_board_cgpa': rng.normal(8, 0.8, n).clip(5.0, 10.0),
+        }
+
+        # Final CGPA calculation (mock formula)
+        columns[TARGET_COLUMN] = (
+            0.9 * columns['num_S'] +
+            0.6 * columns['num_A'] +
+            0.5 * columns['num_B'] +
+            0.6 * columns['num_C'] -
+            0.9 * columns['num_F'] +
+            0.03 * columns['project_count'] +
+            0.1 * columns['internship_experience'] +
+            0.02 * columns['study_hours_per_week'] +
+            0.02 * columns['participated_in_events'] -
+            0.05 * columns['travel_time_minutes'] +
+            0.15 * columns['previous_board_cgpa']
+        ).clip(5, 10)
+        return columns
+
+    def iter_feature_chunks(self, n_students, chunk_size=100_000):
+        """Yield feature chunks until n_students have been generated"""
+        remaining = n_students
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            yield self.features(n)
+            remaining -= n
+
+    def write_feature_dataset(self, path, n_students, chunk_size=100_000, rebuild=False):
+        """
+        Append n_students synthetic rows to the FeatureDataset at path, one part
+        per chunk, stored as float32 like the real-student dataset.
+        Returns the number of rows written.
+        """
+        dataset = FeatureDataset(path)
+        if rebuild:
+            dataset.clear()
+        written = 0
+        for columns in self.iter_feature_chunks(n_students, chunk_size):
+            dataset.append(
+                {name: np.asarray(values, dtype=np.float32) for name, values in columns.items()},
+                source='synthetic',
+            )
+            written += len(columns[TARGET_COLUMN])
+        return written
+
+    def grades(self, ability, n):
+        """n grades for a student of the given ability (a standard-normal score)"""
+        scores = 0.8 * ability + 0.6 * self.rng.standard_normal(n)
+        return [GRADE_SCALE[len(GRADE_CUTS) - i] for i in np.searchsorted(GRADE_CUTS, scores)]
+
+    def academic_record(self, degree=None, semesters=8, program=None, bucket=None):
+        """
+        One student's history over the first `semesters` semesters of a degree.
+
+        Args:
+            program (str): 'Minor' or 'Honor' to also take the courses of that
+                program's bucket, or None
+            bucket (str): Bucket of the program (random if not given)
+
+        Returns:
+            dict: 'degree', 'program', 'bucket', 'cgpa', 'grade_counts' (by
+                GRADE_BUCKETS letter) and 'semesters', a list of dicts with the
+                Semester field values and 'subjects', a list of (name, credits, grade)
+        """
+        degree = degree or str(self.rng.choice(list(CREDITS)))
+        extra_courses = {}
+        if program is not None:
+            buckets = PROGRAMS[program].get(degree)
+            if not buckets:
+                raise ValueError(f"No {program} program for degree: {degree}")
+            bucket = bucket or str(self.rng.choice(list(buckets)))
+            extra_courses = buckets[bucket]
+        ability = self.rng.standard_normal()
+        history = []
+        grade_counts = {letter: 0 for letter in GRADE_BUCKETS}
+        bucket_of = {grade: letter for letter, grades in GRADE_BUCKETS.items() for grade in grades}
+
+        for semester in list(CREDITS[degree])[:semesters]:
+            slots = list(CREDITS[degree][semester].values())
+            choices = self.rng.random(len(slots))
+            grades = self.grades(ability, len(slots))
+            subjects = []
+            total_credits = earn_credits = complete_courses = 0
+            total_points = 0.0
+            for courses, choice, grade in zip(slots, choices, grades):
+                name, credits = list(courses.items())[int(choice * len(courses))]
+                subjects.append((name, credits, grade))
+                grade_counts[bucket_of[grade]] += 1
+                total_credits += credits
+                total_points += GRADE_POINTS[grade] * credits
+                if grade != 'F':
+                    earn_credits += credits
+                    complete_courses += 1
+            gpa = total_points / total_credits if total_credits else None
+
+            # calculate_minor adds program courses to the semester totals and
+            # keeps the result in minor_gpa; gpa stays the regular SGPA
+            minor_gpa = None
+            # A bucket can repeat a core course of the semester; it is only taken once
+            taken = {name for name, _, _ in subjects}
+            program_courses = [
+                (name, credits) for name, credits in extra_courses.get(semester, {}).items() if name not in taken
+            ]
+            if program_courses:
+                for (name, credits), grade in zip(program_courses, self.grades(ability, len(program_courses))):
+                    subjects.append((name, credits, grade))
+                    grade_counts[bucket_of[grade]] += 1
+                    total_credits += credits
+                    total_points += GRADE_POINTS[grade] * credits
+                minor_gpa = total_points / total_credits if total_credits else None
+
+            history.append({
+                'semester': semester,
+                'subjects': subjects,
+                'total_credits': total_credits,
+                'total_points': total_points,
+                'earn_credits': earn_credits,
+                'complete_courses': complete_courses,
+                'gpa': gpa,
+                'minor_gpa': minor_gpa,
+            })
+
+        gpas = [s['gpa'] for s in history if s['gpa'] is not None]
+        return {
+            'degree': degree,
+            'program': program,
+            'bucket': bucket,
+            'semesters': history,
+            'cgpa': sum(gpas) / len(history) if history else None,
+            'grade_counts': grade_counts,
+        }
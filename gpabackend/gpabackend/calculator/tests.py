@@ -1,3 +1,1192 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from sklearn.ensemble import RandomForestRegressor
+
+from accounts import urls as accounts_urls
+from accounts.models import CustomUser, Notification
+from accounts.otp import issue_otp
+from . import urls as calculator_urls
+from .cgpa_predictor import CGPAPredictor, PredictionCache, cgpa_predictor
+from .forest_eval import FlatForest
+from .model_registry import ModelRegistry
+from .model_search import SEARCH_SPACE, candidates, run_search
+from .benchmarking import import_profile
+from .prediction_service import HEAVY_MODULES
+from .predictor_backends import compile_evaluator, make_estimator
+from .datasets import FeatureDataset
+from .feature_pipeline import build_feature_dataset
+from .feature_store import grade_distributions, get_user_features, stored_grade_distribution
+from .accuracy import score_predictions
+from . import retention
+from .views import save_predictions
+from .retention import compact_predictions
+from .seeding import DEFAULT_PASSWORD, clear_benchmark_data, seed_benchmark_data
+from .http_benchmark import run_benchmark
+from .log import REDACTED, QueueStreamHandler, RedactFilter
+from .metrics import MetricsRegistry, registry as metrics_registry
+from .synthetic import GRADE_POINTS, SyntheticStudents
+from .courses import CREDITS
+from .models import (
+    CGPAPrediction, Grade, ModelAccuracy, PredictionInput, PredictionMonthlySummary, Semester, Subject, TrainingJob,
+    UserFeatures,
+)
+from .training_jobs import claim_next_job, run_pending_jobs
+
+
+SAMPLE_FEATURES = {
+    'num_S': 5,
+    'num_A': 3,
+    'num_B': 7,
+    'num_C': 8,
+    'num_D': 2,
+    'num_F': 1,
+    'study_hours_per_week': 15.0,
+    'participated_in_events': 1,
+    'project_count': 3,
+    'internship_experience': 1,
+    'travel_time_minutes': 45,
+    'lives_in_pg_or_hostel': 0,
+    'previous_board_cgpa': 8.5
+}
+
+
+def fit_small_model():
+    """Fit a small in-memory forest so tests never touch the saved model file"""
+    df = cgpa_predictor.create_synthetic_dataset(n_students=200)
+    model = RandomForestRegressor(n_estimators=10, random_state=0)
+    model.fit(df[cgpa_predictor.feature_columns].values, df['final_cgpa'].values)
+    return model
+
+
+def create_student(email, grades_by_semester, cgpa=None, **extra):
+    """Create a student with one Subject/Grade row per grade in each semester"""
+    user = CustomUser.objects.create_user(
+        email=email, password='pass12345', username=email.split('@')[0],
+        KTUID=email.split('@')[0].upper(), semester='semester_8', degree='B.Tech',
+        cgpa=cgpa, **extra
+    )
+    for number, grades in enumerate(grades_by_semester, start=1):
+        semester = Semester.objects.create(user=user, semester=f'semester_{number}', gpa=cgpa)
+        for index, grade in enumerate(grades):
+            subject = Subject.objects.create(semester=semester, name=f'Subject {index}', credits=3)
+            Grade.objects.create(subject=subject, grade=grade)
+    return user
+
+
+def stored_inputs(**overrides):
+    """Saved PredictionInput for SAMPLE_FEATURES with the given overrides"""
+    inputs = PredictionInput.from_features(dict(SAMPLE_FEATURES, **overrides))
+    inputs.save()
+    return inputs
+
+
+class PredictorTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        cls._settings = override_settings(CGPA_FEATURE_DATASET_DIR=os.path.join(cls._tmpdir.name, 'dataset'))
+        cls._settings.enable()
+        super().setUpClass()
+        cls._saved_state = (cgpa_predictor.model, cgpa_predictor.model_version, cgpa_predictor.registry)
+        cgpa_predictor.registry = ModelRegistry(os.path.join(cls._tmpdir.name, 'registry'))
+        cgpa_predictor.set_model(fit_small_model())
+        cgpa_predictor.save_model()
+
+    @classmethod
+    def tearDownClass(cls):
+        model, version, cgpa_predictor.registry = cls._saved_state
+        cgpa_predictor.set_model(model, version)
+        super().tearDownClass()
+        cls._settings.disable()
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='student@example.com', password='pass12345', username='student',
+            KTUID='TVE21CS001', semester='semester_4', degree='B.Tech'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class PredictManyTests(PredictorTestCase):
+    def test_matches_single_predictions(self):
+        rows = [SAMPLE_FEATURES, dict(SAMPLE_FEATURES, num_F=0, num_S=9)]
+        expected = [cgpa_predictor.predict_cgpa(row) for row in rows]
+        self.assertEqual(cgpa_predictor.predict_many(rows), expected)
+
+    def test_accepts_columnar_input(self):
+        columns = {name: [value, value] for name, value in SAMPLE_FEATURES.items()}
+        expected = cgpa_predictor.predict_cgpa(SAMPLE_FEATURES)
+        self.assertEqual(cgpa_predictor.predict_many(columns), [expected, expected])
+
+    def test_rejects_missing_feature(self):
+        row = dict(SAMPLE_FEATURES)
+        del row['num_S']
+        with self.assertRaises(ValueError):
+            cgpa_predictor.predict_many([SAMPLE_FEATURES, row])
+
+
+class PredictionCacheTests(PredictorTestCase):
+    def test_equivalent_inputs_hit_cache(self):
+        cgpa_predictor.cache.clear()
+        before = cgpa_predictor.cache.stats()
+        first = cgpa_predictor.predict_cgpa(SAMPLE_FEATURES)
+        second = cgpa_predictor.predict_cgpa(dict(SAMPLE_FEATURES, participated_in_events=True))
+        stats = cgpa_predictor.cache.stats()
+        self.assertEqual(first, second)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+
+    def test_model_published_elsewhere_invalidates_cache(self):
+        cgpa_predictor.predict_cgpa(SAMPLE_FEATURES)
+        other = CGPAPredictor()
+        other.registry = ModelRegistry(cgpa_predictor.registry.root)
+        other.set_model(fit_small_model())
+        other.save_model()
+
+        self.assertTrue(cgpa_predictor.refresh_if_stale())
+        self.assertEqual(cgpa_predictor.model_version, other.model_version)
+        self.assertEqual(cgpa_predictor.cache.stats()['size'], 0)
+
+    def test_entries_expire_and_evict(self):
+        cache = PredictionCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        cache.ttl = 0
+        cache.set('d', 4)
+        self.assertIsNone(cache.get('d'))
+
+
+class FlatForestTests(PredictorTestCase):
+    def test_matches_sklearn_predictions(self):
+        df = cgpa_predictor.create_synthetic_dataset(n_students=300)
+        X = df[cgpa_predictor.feature_columns].to_numpy(dtype=float)
+        evaluator = FlatForest.from_sklearn(cgpa_predictor.model)
+        np.testing.assert_allclose(evaluator.predict(X), cgpa_predictor.model.predict(X), atol=1e-9)
+
+    def test_contributions_add_up_to_prediction(self):
+        X = cgpa_predictor.feature_matrix([SAMPLE_FEATURES, dict(SAMPLE_FEATURES, num_F=3, num_S=0)])
+        bias, contributions = cgpa_predictor.evaluator.contributions(X)
+        self.assertEqual(contributions.shape, (2, len(cgpa_predictor.feature_columns)))
+        np.testing.assert_allclose(bias + contributions.sum(axis=1), cgpa_predictor.model.predict(X))
+
+    def test_predict_endpoint_explains_on_request(self):
+        response = self.client.post('/predict_cgpa/', dict(SAMPLE_FEATURES, explain=True), format='json')
+        self.assertEqual(response.status_code, 200)
+        explanation = response.data['explanation']
+        self.assertEqual(set(explanation['contributions']), set(cgpa_predictor.feature_columns))
+        raw = cgpa_predictor.predict_raw([cgpa_predictor.canonical_features(SAMPLE_FEATURES)])[0]
+        total = explanation['base_value'] + sum(explanation['contributions'].values())
+        self.assertAlmostEqual(total, raw, places=2)
+        self.assertIs(cgpa_predictor.explain(SAMPLE_FEATURES), cgpa_predictor.explain(SAMPLE_FEATURES))
+
+        response = self.client.post('/predict_cgpa/', SAMPLE_FEATURES, format='json')
+        self.assertNotIn('explanation', response.data)
+
+    def test_intervals_come_from_tree_outputs(self):
+        rows = [SAMPLE_FEATURES, dict(SAMPLE_FEATURES, num_S=9, num_F=0)]
+        predictions, intervals = cgpa_predictor.predict_many_with_intervals(rows)
+        self.assertEqual(predictions, cgpa_predictor.predict_many(rows))
+        tree_predictions = np.array([
+            tree.predict(cgpa_predictor.feature_matrix(rows)) for tree in cgpa_predictor.model.estimators_
+        ])
+        lower, upper = np.clip(np.percentile(tree_predictions, [5, 95], axis=0), 5.0, 10.0)
+        self.assertEqual([i['lower'] for i in intervals], [round(float(v), 2) for v in lower])
+        self.assertEqual([i['upper'] for i in intervals], [round(float(v), 2) for v in upper])
+
+    def test_interval_is_optional_on_endpoints(self):
+        response = self.client.post('/predict_cgpa/', dict(SAMPLE_FEATURES, interval=True), format='json')
+        interval = response.data['prediction_interval']
+        self.assertLessEqual(interval['lower'], interval['upper'])
+        self.assertEqual(interval['coverage'], 0.9)
+
+        response = self.client.post('/predict_cgpa_batch/', {'rows': [SAMPLE_FEATURES], 'interval': True}, format='json')
+        self.assertEqual(response.data['predictions'][0]['prediction_interval'], interval)
+        response = self.client.post('/predict_cgpa_batch/', {'rows': [SAMPLE_FEATURES]}, format='json')
+        self.assertNotIn('prediction_interval', response.data['predictions'][0])
+
+    def test_boosted_models_have_no_intervals(self):
+        model = make_estimator('gbt', n_estimators=5).fit(np.random.rand(20, 13), np.random.rand(20))
+        with self.assertRaises(ValueError):
+            FlatForest.from_sklearn(model).predict_with_interval(np.random.rand(2, 13))
+
+    def test_interval_request_on_boosted_model_is_rejected_before_saving(self):
+        forest, version = cgpa_predictor.model, cgpa_predictor.model_version
+        self.addCleanup(cgpa_predictor.set_model, forest, version)
+        df = cgpa_predictor.create_synthetic_dataset(n_students=100)
+        cgpa_predictor.set_model(make_estimator('gbt', n_estimators=5).fit(
+            df[cgpa_predictor.feature_columns].values, df['final_cgpa'].values
+        ))
+
+        for path in ('/predict_cgpa/', '/predict_cgpa_from_user_data/'):
+            response = self.client.post(path, dict(SAMPLE_FEATURES, interval=True), format='json')
+            self.assertEqual(response.status_code, 400, path)
+        self.assertFalse(CGPAPrediction.objects.exists())
+
+        response = self.client.post('/predict_cgpa/', SAMPLE_FEATURES, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CGPAPrediction.objects.count(), 1)
+
+    def test_predictor_uses_flat_evaluator(self):
+        self.assertIsInstance(cgpa_predictor.evaluator, FlatForest)
+
+
+class PredictorBackendTests(TestCase):
+    def test_compiled_backends_match_sklearn(self):
+        df = cgpa_predictor.create_synthetic_dataset(n_students=300)
+        X = df[cgpa_predictor.feature_columns].to_numpy(dtype=float)
+        y = df['final_cgpa'].to_numpy()
+        for name in ('linear', 'gbt'):
+            model = make_estimator(name).fit(X, y)
+            evaluator = compile_evaluator(model)
+            self.assertIsNotNone(evaluator, name)
+            np.testing.assert_allclose(evaluator.predict(X), model.predict(X), atol=1e-9, err_msg=name)
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            make_estimator('svm')
+
+
+class ModelRegistryTests(PredictorTestCase):
+    def test_activate_rolls_back_current_pointer(self):
+        registry = cgpa_predictor.registry
+        first = registry.current_version()
+        second = registry.publish(cgpa_predictor.model, {'metrics': {}})
+        self.assertEqual(registry.current_version(), second)
+        registry.activate(first)
+        self.assertEqual(registry.current_version(), first)
+        self.assertIn(second, registry.list_versions())
+        with self.assertRaises(ValueError):
+            registry.activate('missing')
+
+
+class GradeDistributionTests(PredictorTestCase):
+    def test_single_user_in_one_query(self):
+        student = create_student('a@example.com', [['S', 'A+', 'A', 'B+'], ['C', 'P', 'D+', 'F', 'S']])
+        with self.assertNumQueries(1):
+            counts = cgpa_predictor.calculate_grade_distribution(student)
+        self.assertEqual(counts, {'S': 2, 'A': 2, 'B': 1, 'C': 1, 'D': 2, 'F': 1})
+
+    def test_many_users_in_one_query(self):
+        first = create_student('a@example.com', [['S'], ['S', 'B']])
+        second = create_student('b@example.com', [['F']])
+        with self.assertNumQueries(1):
+            counts = cgpa_predictor.calculate_grade_distribution([first.pk, second.pk, self.user.pk])
+        self.assertEqual(counts[first.pk]['S'], 2)
+        self.assertEqual(counts[second.pk]['F'], 1)
+        self.assertEqual(sum(counts[self.user.pk].values()), 0)
+
+    def test_form_data_uses_recorded_grades(self):
+        semester = Semester.objects.create(user=self.user, semester='semester_1')
+        subject = Subject.objects.create(semester=semester, name='Maths', credits=4)
+        Grade.objects.create(subject=subject, grade='A+')
+        response = self.client.get('/get_prediction_form_data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['default_features']['num_A'], 1)
+
+
+class UserFeatureStoreTests(PredictorTestCase):
+    def test_grade_changes_update_counts_incrementally(self):
+        student = create_student('a@example.com', [['S', 'A', 'F']])
+        grade = Grade.objects.get(subject__semester__user=student, grade='F')
+        grade.grade = 'B+'
+        grade.save()
+        Grade.objects.get(subject__semester__user=student, grade='S').delete()
+        counts = stored_grade_distribution(get_user_features(student))
+        self.assertEqual(counts, {'S': 0, 'A': 1, 'B': 1, 'C': 0, 'D': 0, 'F': 0})
+        self.assertEqual(counts, cgpa_predictor.calculate_grade_distribution(student))
+
+    def test_missing_row_is_rebuilt_on_first_read(self):
+        student = create_student('a@example.com', [['S', 'S'], ['A']])
+        UserFeatures.objects.filter(pk=student.pk).delete()
+        features = get_user_features(student)
+        self.assertEqual((features.num_S, features.num_A, features.total_credits), (2, 1, 0))
+
+    def test_form_data_reflects_last_submitted_lifestyle(self):
+        self.client.post('/predict_cgpa/', dict(SAMPLE_FEATURES, study_hours_per_week=22), format='json')
+        with self.assertNumQueries(1):  # the UserFeatures primary-key lookup
+            response = self.client.get('/get_prediction_form_data/')
+        self.assertEqual(response.data['default_features']['study_hours_per_week'], 22)
+
+
+class PredictBatchViewTests(PredictorTestCase):
+    def test_batch_creates_history_rows(self):
+        rows = [SAMPLE_FEATURES, dict(SAMPLE_FEATURES, num_F=3)]
+        response = self.client.post('/predict_cgpa_batch/', {'rows': rows}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        rows = CGPAPrediction.objects.filter(user=self.user, prediction_type='batch')
+        self.assertEqual(rows.count(), 2)
+        self.assertEqual({r.model_version for r in rows}, {cgpa_predictor.model_version})
+
+    def test_history_records_the_version_that_predicted(self):
+        served = cgpa_predictor.current_model()
+        self.addCleanup(cgpa_predictor.set_model, served.model, served.version)
+        predict = cgpa_predictor.predict_cgpa
+
+        def predict_then_swap(*args, **kwargs):
+            prediction = predict(*args, **kwargs)
+            cgpa_predictor.set_model(served.model, 'published-meanwhile')  # hot-swap by another thread
+            return prediction
+
+        with mock.patch.object(cgpa_predictor, 'predict_cgpa', side_effect=predict_then_swap):
+            response = self.client.post('/predict_cgpa/', SAMPLE_FEATURES, format='json')
+        self.assertEqual(response.data['model_version'], served.version)
+        self.assertEqual(CGPAPrediction.objects.get().model_version, served.version)
+
+    def test_identical_inputs_are_stored_once(self):
+        rows = [SAMPLE_FEATURES, dict(SAMPLE_FEATURES, num_S=5.0, participated_in_events=True), dict(SAMPLE_FEATURES, num_F=0)]
+        self.client.post('/predict_cgpa_batch/', {'rows': rows}, format='json')
+        self.client.post('/predict_cgpa/', SAMPLE_FEATURES, format='json')
+        self.assertEqual(CGPAPrediction.objects.count(), 4)
+        self.assertEqual(PredictionInput.objects.count(), 2)
+
+        response = self.client.get('/get_prediction_history/')
+        self.assertEqual(response.data['predictions'][0]['input_features']['num_S'], 5)
+        self.assertIs(response.data['predictions'][0]['input_features']['participated_in_events'], True)
+
+    def test_flags_are_coerced_like_the_stored_features(self):
+        response = self.client.post('/predict_cgpa/', dict(SAMPLE_FEATURES, participated_in_events=2), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(CGPAPrediction.objects.get().inputs.participated_in_events, True)
+
+        response = self.client.post('/predict_cgpa/', dict(SAMPLE_FEATURES, internship_experience='yes'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Feature values must be numbers')
+        self.assertEqual(CGPAPrediction.objects.count(), 1)
+
+    def test_batch_validates_every_row_first(self):
+        rows = [SAMPLE_FEATURES, dict(SAMPLE_FEATURES, study_hours_per_week=40)]
+        response = self.client.post('/predict_cgpa_batch/', {'rows': rows}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Row 1', response.data['error'])
+        self.assertFalse(CGPAPrediction.objects.exists())
+
+
+class PredictionHistoryTests(PredictorTestCase):
+    def test_cursor_pages_cover_history_once(self):
+        inputs = stored_inputs()
+        CGPAPrediction.objects.bulk_create([
+            CGPAPrediction(user=self.user, predicted_cgpa=7.0 + i / 100, inputs=inputs) for i in range(25)
+        ])
+        # Identical timestamps for some rows exercise the id tie-breaker
+        CGPAPrediction.objects.filter(pk__lte=CGPAPrediction.objects.order_by('pk')[5].pk).update(
+            created_at=CGPAPrediction.objects.order_by('pk').first().created_at
+        )
+        expected = list(CGPAPrediction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 10, 'include_total': 'false'}
+            if cursor:
+                params['cursor'] = cursor
+            with self.assertNumQueries(1):
+                response = self.client.get('/get_prediction_history/', params)
+            self.assertNotIn('total_count', response.data)
+            seen += [row['id'] for row in response.data['predictions']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+        response = self.client.get('/get_prediction_history/')
+        self.assertEqual(response.data['total_count'], 25)
+        self.assertEqual(len(response.data['predictions']), 10)
+        self.assertIn('num_S', response.data['predictions'][0]['input_features'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/get_prediction_history/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/get_prediction_history/', {'page_size': 1000})
+        self.assertEqual(response.status_code, 400)
+
+
+class RetentionTests(PredictorTestCase):
+    def create_prediction(self, predicted_cgpa, created_at, scored=True):
+        prediction = CGPAPrediction.objects.create(user=self.user, predicted_cgpa=predicted_cgpa, inputs=stored_inputs())
+        CGPAPrediction.objects.filter(pk=prediction.pk).update(
+            created_at=created_at, scored_at=created_at if scored else None
+        )
+        return prediction
+
+    def test_old_predictions_fold_into_monthly_summaries(self):
+        march = datetime(2025, 3, 10, tzinfo=dt_timezone.utc)
+        for value in (7.0, 8.0, 9.0):
+            self.create_prediction(value, march)
+        self.create_prediction(6.0, datetime(2025, 4, 2, tzinfo=dt_timezone.utc))
+        CGPAPrediction.objects.create(user=self.user, predicted_cgpa=8.5, inputs=stored_inputs())  # recent, kept in full
+
+        self.assertEqual(compact_predictions(retention_days=180, batch_size=2), 4)
+        self.assertEqual(list(CGPAPrediction.objects.values_list('predicted_cgpa', flat=True)), [8.5])
+        self.assertEqual(PredictionInput.objects.count(), 1)  # still used by the recent prediction
+        summary = PredictionMonthlySummary.objects.get(user=self.user, month='2025-03-01')
+        self.assertEqual(summary.prediction_count, 3)
+        self.assertEqual((summary.min_predicted_cgpa, summary.max_predicted_cgpa), (7.0, 9.0))
+        self.assertAlmostEqual(summary.average_predicted_cgpa, 8.0)
+
+        # A later run merges into the existing month
+        self.create_prediction(5.5, march)
+        compact_predictions(retention_days=180)
+        summary.refresh_from_db()
+        self.assertEqual((summary.prediction_count, summary.min_predicted_cgpa), (4, 5.5))
+
+        response = self.client.get('/get_prediction_summaries/')
+        self.assertEqual([row['month'] for row in response.data['summaries']], ['2025-04', '2025-03'])
+        self.assertEqual(response.data['summaries'][1]['average_predicted_cgpa'], 7.38)
+
+    def test_inputs_in_use_again_are_kept(self):
+        old = self.create_prediction(7.0, timezone.now() - timedelta(days=400))
+        real_delete = retention.delete_unused_inputs
+
+        def reused_during_cleanup(digests):
+            # A request stores the same inputs and saves a prediction on them
+            CGPAPrediction.objects.get_or_create(user=self.user, predicted_cgpa=8.0, inputs_id=old.inputs_id)
+            return real_delete(digests)
+
+        with mock.patch.object(retention, 'delete_unused_inputs', side_effect=reused_during_cleanup):
+            self.assertEqual(compact_predictions(retention_days=180), 1)
+        self.assertEqual(list(PredictionInput.objects.values_list('pk', flat=True)), [old.inputs_id])
+        self.assertEqual(CGPAPrediction.objects.get().inputs_id, old.inputs_id)
+
+    def test_inputs_a_batch_could_not_delete_are_retried(self):
+        old = self.create_prediction(7.0, timezone.now() - timedelta(days=400))
+        stored_inputs(num_S=9)  # unused before this run: not the run's business
+        real_delete = retention.delete_unused_inputs
+        calls = []
+
+        def fail_first_cleanup(digests):
+            calls.append(set(digests))
+            return real_delete(digests) if len(calls) > 1 else False  # a concurrent request held the input
+
+        with mock.patch.object(retention, 'delete_unused_inputs', side_effect=fail_first_cleanup):
+            self.assertEqual(compact_predictions(retention_days=180), 1)
+        self.assertEqual(calls, [{old.inputs_id}, {old.inputs_id}])  # the batch, then the retry
+        self.assertEqual(list(PredictionInput.objects.values_list('num_S', flat=True)), [9])
+
+    def test_prediction_save_is_retried_when_compaction_deletes_its_input(self):
+        digest = stored_inputs().digest
+        calls = []
+
+        def build_records(digests):
+            calls.append(digests)
+            if len(calls) == 1:
+                # Compaction deletes the stored input before the prediction refers to it
+                PredictionInput.objects.filter(pk=digest).delete()
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            return [CGPAPrediction(user=self.user, predicted_cgpa=7.5, inputs_id=digests[0])]
+
+        save_predictions([SAMPLE_FEATURES], build_records)
+        self.assertEqual(calls, [[digest], [digest]])
+        self.assertEqual(CGPAPrediction.objects.get().inputs_id, digest)
+        self.assertTrue(PredictionInput.objects.filter(pk=digest).exists())
+
+    def test_unscored_predictions_are_kept_until_they_can_be_scored(self):
+        now = timezone.now()
+        pending = self.create_prediction(7.0, now - timedelta(days=400), scored=False)  # student still studying
+        abandoned = self.create_prediction(6.0, now - timedelta(days=3000), scored=False)
+        self.create_prediction(8.0, now - timedelta(days=400))
+
+        self.assertEqual(compact_predictions(retention_days=180, unscored_retention_days=2190), 2)
+        self.assertEqual(list(CGPAPrediction.objects.values_list('pk', flat=True)), [pending.pk])
+        self.assertFalse(CGPAPrediction.objects.filter(pk=abandoned.pk).exists())
+
+        # Once the student finishes it is scored, then compacted on the next run
+        Semester.objects.create(user=self.user, semester='semester_8', gpa=7.5)
+        CustomUser.objects.filter(pk=self.user.pk).update(cgpa=7.5)
+        self.assertEqual(compact_predictions(retention_days=180), 1)
+        self.assertEqual(ModelAccuracy.objects.get().count, 1)
+
+
+class TrainingJobTests(PredictorTestCase):
+    def test_training_is_queued_and_run_by_worker(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post('/train_prediction_model/')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job']['id']
+        self.assertEqual(TrainingJob.objects.get(pk=job_id).status, TrainingJob.STATUS_QUEUED)
+
+        run_pending_jobs()
+
+        response = self.client.get(f'/training_jobs/{job_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], TrainingJob.STATUS_SUCCEEDED)
+        self.assertIn('r2', response.data['metrics'])
+        self.assertEqual(response.data['model_version'], cgpa_predictor.registry.current_version())
+        metadata = cgpa_predictor.registry.metadata(response.data['model_version'])
+        self.assertEqual(metadata['feature_columns'], cgpa_predictor.feature_columns)
+        self.assertEqual(metadata['training_size'], 400)
+
+    def test_trained_model_is_served_only_once_published(self):
+        served = cgpa_predictor.current_model()
+        self.addCleanup(cgpa_predictor.set_model, served.model, served.version)
+        publish = cgpa_predictor.registry.publish
+        serving_at_publish = []
+
+        def record_then_publish(model, metadata):
+            serving_at_publish.append(cgpa_predictor.current_model())
+            return publish(model, metadata)
+
+        with mock.patch.object(cgpa_predictor.registry, 'publish', side_effect=record_then_publish):
+            cgpa_predictor.train_model()
+        self.assertEqual([active.version for active in serving_at_publish], [served.version])
+        self.assertIsNot(cgpa_predictor.model, served.model)
+        self.assertEqual(cgpa_predictor.model_version, cgpa_predictor.registry.current_version())
+
+    @override_settings(CGPA_TRAINING_JOB_TIMEOUT=600)
+    def test_job_of_a_dead_worker_is_marked_failed(self):
+        now = timezone.now()
+        crashed = TrainingJob.objects.create(status=TrainingJob.STATUS_RUNNING, started_at=now - timedelta(hours=1))
+        searching = TrainingJob.objects.create(
+            status=TrainingJob.STATUS_RUNNING, started_at=now - timedelta(hours=1), search_budget=3600
+        )
+
+        self.assertIsNone(claim_next_job())
+        crashed.refresh_from_db()
+        self.assertEqual(crashed.status, TrainingJob.STATUS_FAILED)
+        self.assertTrue(crashed.error)
+        self.assertIsNotNone(crashed.finished_at)
+        searching.refresh_from_db()
+        self.assertEqual(searching.status, TrainingJob.STATUS_RUNNING)  # still within its search budget
+
+
+class AccuracyTrackingTests(PredictorTestCase):
+    def test_scores_finished_students_incrementally(self):
+        graduate = create_student('a@example.com', [['A']] * 8, cgpa=8.0)
+        CGPAPrediction.objects.create(user=graduate, predicted_cgpa=7.5, model_version='v1', inputs=stored_inputs())
+        CGPAPrediction.objects.create(user=graduate, predicted_cgpa=9.0, model_version='v1', inputs=stored_inputs())
+        CGPAPrediction.objects.create(user=self.user, predicted_cgpa=6.0, model_version='v1', inputs=stored_inputs())  # still studying
+
+        self.assertEqual(score_predictions(batch_size=1), 2)
+        accuracy = ModelAccuracy.objects.get(model_version='v1', cohort='B.Tech')
+        self.assertEqual(accuracy.count, 2)
+        self.assertAlmostEqual(accuracy.mae, 0.75)
+        self.assertAlmostEqual(accuracy.bias, 0.25)
+        self.assertEqual(set(CGPAPrediction.objects.filter(user=graduate).values_list('actual_cgpa', flat=True)), {8.0})
+
+        self.assertEqual(score_predictions(), 0)
+        CGPAPrediction.objects.create(user=graduate, predicted_cgpa=8.0, model_version='v1', inputs=stored_inputs())
+        with self.assertNumQueries(8):  # batch ids, claim, aggregate, get_or_create, increment, next batch + savepoint pair
+            self.assertEqual(score_predictions(), 1)
+        accuracy.refresh_from_db()
+        self.assertEqual(accuracy.count, 3)
+        self.assertAlmostEqual(accuracy.mae, 0.5)
+
+    def test_drift_report_compares_with_training_error(self):
+        graduate = create_student('a@example.com', [['A']] * 8, cgpa=8.0)
+        version = cgpa_predictor.save_model(metrics={'mae': 0.25})
+        CGPAPrediction.objects.create(user=graduate, predicted_cgpa=9.0, model_version=version, inputs=stored_inputs())
+        score_predictions()
+
+        self.assertEqual(self.client.get('/prediction_accuracy/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/prediction_accuracy/')
+        self.assertEqual(response.status_code, 200)
+        entry = response.data['versions'][0]
+        self.assertEqual((entry['model_version'], entry['count'], entry['mae']), (version, 1, 1.0))
+        self.assertEqual(entry['mae_drift'], 0.75)
+        self.assertEqual(entry['cohorts'][0]['cohort'], 'B.Tech')
+
+
+class ModelSearchTests(PredictorTestCase):
+    def test_search_publishes_best_candidate_with_results(self):
+        metrics = cgpa_predictor.search_model(2, backends=['linear', 'gbt'], folds=3, max_workers=2)
+        metadata = cgpa_predictor.registry.metadata(cgpa_predictor.registry.current_version())
+        results = metadata['search']['results']
+        self.assertEqual(len(results) + metadata['search']['skipped'], len(candidates(['linear', 'gbt'])))
+        self.assertEqual(results, sorted(results, key=lambda row: row['mae']))
+        self.assertEqual((metadata['backend'], metadata['params']), (results[0]['backend'], results[0]['params']))
+        self.assertAlmostEqual(metrics['mae'], results[0]['mae'])
+
+    def test_exhausted_budget_skips_remaining_candidates(self):
+        X, y = cgpa_predictor.training_data('synthetic')
+        search = run_search(X, y, budget_seconds=0, max_workers=1)
+        self.assertEqual(search['results'], [])
+        self.assertEqual(search['skipped'], len(candidates()))
+        with self.assertRaises(ValueError):
+            candidates(['unknown'])
+        self.assertEqual(set(SEARCH_SPACE), {'linear', 'gbt', 'forest', 'extra_trees'})
+
+    def test_search_budget_is_validated(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post('/train_prediction_model/', {'search_budget': -5}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/train_prediction_model/', {'search_budget': 30}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['job']['search_budget'], 30)
+
+
+class ImportTimeTests(TestCase):
+    def test_urlconf_does_not_import_prediction_stack(self):
+        modules = import_profile()
+        self.assertIn('calculator.views', modules)
+        self.assertNotIn('calculator.cgpa_predictor', modules)
+        self.assertEqual({name.split('.')[0] for name in modules} & set(HEAVY_MODULES), set())
+
+    def test_only_the_web_entry_point_preloads_the_predictor(self):
+        with tempfile.TemporaryDirectory() as registry_dir, mock.patch.dict(
+            os.environ, CGPA_PRELOAD_PREDICTOR='True', CGPA_MODEL_REGISTRY_DIR=registry_dir
+        ):
+            # As when running migrate or any other management command
+            self.assertNotIn('calculator.cgpa_predictor', import_profile('import django; django.setup()'))
+            self.assertIn('calculator.cgpa_predictor', import_profile('import gpabackend.wsgi'))
+
+
+class SyntheticStudentsTests(TestCase):
+    def test_chunked_dataset_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as path:
+            written = SyntheticStudents(seed=7).write_feature_dataset(path, 2500, chunk_size=1000)
+            dataset = FeatureDataset(path)
+            self.assertEqual((written, dataset.rows, len(dataset.manifest()['parts'])), (2500, 2500, 3))
+            data = dataset.load()
+        first_chunk = SyntheticStudents(seed=7).features(1000)
+        np.testing.assert_allclose(data['final_cgpa'][:1000], first_chunk['final_cgpa'], rtol=1e-6)
+        self.assertTrue(((data['final_cgpa'] >= 5) & (data['final_cgpa'] <= 10)).all())
+
+    def test_academic_record_follows_credits(self):
+        record = SyntheticStudents(seed=1).academic_record('CSE')
+        self.assertEqual(len(record['semesters']), 8)
+        for semester in record['semesters']:
+            slots = list(CREDITS['CSE'][semester['semester']].values())
+            self.assertEqual(len(semester['subjects']), len(slots))
+            for (name, credits, grade), courses in zip(semester['subjects'], slots):
+                self.assertEqual(courses[name], credits)
+            points = sum(GRADE_POINTS[grade] * credits for _, credits, grade in semester['subjects'])
+            self.assertAlmostEqual(semester['gpa'], points / semester['total_credits'])
+        self.assertEqual(sum(record['grade_counts'].values()), sum(len(s['subjects']) for s in record['semesters']))
+
+    def test_command_keeps_out_of_the_training_dataset(self):
+        with tempfile.TemporaryDirectory() as root:
+            training, benchmark = os.path.join(root, 'training'), os.path.join(root, 'benchmark')
+            with override_settings(CGPA_FEATURE_DATASET_DIR=training, CGPA_BENCHMARK_DATASET_DIR=benchmark):
+                call_command('generate_synthetic_dataset', students=10, stdout=io.StringIO())
+                self.assertEqual(FeatureDataset(benchmark).rows, 10)
+                with self.assertRaises(CommandError):
+                    call_command('generate_synthetic_dataset', students=10, path=training, stdout=io.StringIO())
+                self.assertEqual(FeatureDataset(training).rows, 0)
+
+                call_command('generate_synthetic_dataset', students=10, path=training,
+                             into_training_dataset=True, stdout=io.StringIO())
+                self.assertEqual(FeatureDataset(training).rows, 10)
+
+
+
+class SeedBenchmarkDataTests(TestCase):
+    def test_seeds_colleges_with_full_histories(self):
+        created = seed_benchmark_data(
+            colleges=2, faculty_per_college=2, students=12, minor_share=0.5, honor_share=0.25, batch_size=5
+        )
+        self.assertEqual(created, {'colleges': 2, 'faculty': 4, 'students': 12})
+
+        students = CustomUser.objects.filter(is_faculty=False)
+        self.assertEqual(students.count(), 12)
+        self.assertEqual(Semester.objects.count(), 12 * 8)
+        self.assertEqual(Grade.objects.count(), Subject.objects.count())
+        self.assertTrue(Semester.objects.filter(minor_gpa__isnull=False).exists())
+        student = students.first()
+        self.assertTrue(student.check_password('benchmark-password'))
+
+        # Features were rebuilt for every student even though signals were off
+        distributions = grade_distributions(students.values_list('pk', flat=True))
+        for features in UserFeatures.objects.all():
+            self.assertEqual(
+                {bucket: getattr(features, f'num_{bucket}') for bucket in distributions[features.user_id]},
+                distributions[features.user_id],
+            )
+        self.assertEqual(UserFeatures.objects.count(), 12)
+
+        faculty = CustomUser.objects.filter(is_faculty=True, college_code='AAA').first()
+        client = APIClient()
+        client.force_authenticate(faculty)
+        response = client.get('/fetch_students_by_faculty/')
+        self.assertEqual(len(response.data['students']), 6)
+        self.assertTrue(all(row['KTUID'].startswith('AAA') for row in response.data['students']))
+
+        # Signals are reconnected after the load
+        grade = Grade.objects.filter(subject__semester__user=student).exclude(grade='F').first()
+        grade.grade = 'F'
+        grade.save()
+        self.assertEqual(get_user_features(student).num_F, distributions[student.pk]['F'] + 1)
+
+        self.assertEqual(clear_benchmark_data(), 16)
+        self.assertFalse(Subject.objects.exists())
+
+
+class HTTPBenchmarkTests(TransactionTestCase):
+    # Committed data, so the server threads' connections can see it
+    def test_reports_latency_and_queries_per_endpoint(self):
+        seed_benchmark_data(colleges=1, faculty_per_college=1, students=2, batch_size=2)
+        accounts = [('student0@benchmark.test', False), ('faculty0.aaa@benchmark.test', True)]
+
+        result = run_benchmark(
+            accounts, DEFAULT_PASSWORD, clients=2, duration=0.5, workload={'get_subjects': 1, 'summary': 1}
+        )
+
+        endpoints = result['endpoints']
+        self.assertEqual(endpoints['login']['requests'], 2)
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(endpoints['fetch_students_by_faculty']['requests'], 0)
+        summary = endpoints['summary']
+        self.assertEqual(summary['path'], '/Summary/')
+        self.assertGreater(summary['queries_per_request']['mean'], 0)
+        self.assertLessEqual(summary['latency_ms']['p50'], summary['latency_ms']['p99'])
+        self.assertEqual(result['requests'], sum(entry['requests'] for entry in endpoints.values()) - 2)
+
+
+# Most queries each route may issue per request. QueryBudgetTests requests
+# every route in calculator/urls.py and accounts/urls.py for students with
+# 1, 4 and 8 semesters of history: each request must succeed, and the count
+# must be the same for all three and within the budget.
+QUERY_BUDGETS = {
+    # calculator
+    'get_subjects/': 0,
+    'get_user_data/': 3,
+    'calculate_gpa/': 15,
+    'calculate_grade/': 13,
+    'calculate_minor/': 7,
+    'get_minor_subjects/': 0,
+    'check_minor_status/': 0,
+    'Summary/': 5,
+    'export-pdf/': 3,
+    'fetch_students_by_faculty/': 1,
+    # the prediction routes include the savepoint pair of their atomic block
+    'predict_cgpa/': 5,
+    'predict_cgpa_batch/': 4,
+    'predict_cgpa_from_user_data/': 6,
+    'get_prediction_form_data/': 1,
+    'get_prediction_history/': 2,
+    'get_prediction_summaries/': 1,
+    'train_prediction_model/': 1,
+    'training_jobs/<int:job_id>/': 1,
+    'prediction_accuracy/': 1,
+    'metrics': 0,
+    # accounts
+    'api/signup/': 9,
+    'api/login/': 1,
+    'api/faculty/': 2,
+    'api/is_faculty/': 0,
+    'api/is_admin/': 0,
+    'api/increment_semester/': 1,
+    'api/send_notification/': 2,
+    'notifications/<int:notification_id>/read/': 2,
+    'api/notifications/': 1,
+    'check_increment_notification/': 0,
+    'confirm_increment_notification/': 1,
+    'deny_increment_notification/': 1,
+    'update_minor_status/': 1,
+    'update_honor_status/': 1,
+    'api/notifications/<int:notification_id>/read/': 2,
+    'api/verify-otp/': 5,
+    'api/resend-otp/': 3,
+}
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget-tests'},
+}, CGPA_METRICS_TOKEN='query-budget')
+class QueryBudgetTests(PredictorTestCase):
+    HISTORY_SIZES = (1, 4, 8)
+
+    def route_requests(self, student, faculty, admin):
+        """Route -> (requesting user or None, HTTP method, path, data, expected status)"""
+        # Writes target semester_1, which every student has, so only the stored history varies
+        current = 'semester_1'
+        courses = {
+            name: 'A' for slot in CREDITS[student.degree][current].values() for name in list(slot)[:1]
+        }
+        notification = Notification.objects.create(recipient=student, sender=admin, header='Hi', content='Hello')
+        job = TrainingJob.objects.create(requested_by=admin)
+        CGPAPrediction.objects.create(user=student, predicted_cgpa=7.0, inputs=stored_inputs())
+        # Account views expect the bare semester number
+        returning = CustomUser.objects.create_user(
+            email='returning@example.com', password='pass12345', username='returning', semester='3',
+        )
+        verifying, resending = (
+            CustomUser.objects.create_user(email=email, password='pass12345', username=email, is_active=False)
+            for email in ('verifying@example.com', 'resending@example.com')
+        )
+        otp = issue_otp(verifying.email)
+        signup = {
+            'username': 'newstudent', 'email': 'new@example.com', 'password': 'pass12345', 'KTUID': 'NEW21CS001',
+            'semester': 'semester_1', 'degree': 'CSE', 'targeted_cgpa': 8.0,
+        }
+        return {
+            'get_subjects/': (student, 'get', '/get_subjects/', None, 200),
+            'get_user_data/': (student, 'get', '/get_user_data/', None, 200),
+            'calculate_gpa/': (student, 'post', '/calculate_gpa/', {'semester': current, 'grades': courses}, 200),
+            'calculate_grade/': (student, 'post', '/calculate_grade/', {
+                'marks': 120, 'subject': next(iter(courses)), 'semester': current,
+            }, 200),
+            'calculate_minor/': (
+                student, 'post', '/calculate_minor/', {'semester': current, 'minor_grades': {}}, 200
+            ),
+            'get_minor_subjects/': (student, 'get', '/get_minor_subjects/', None, 200),
+            'check_minor_status/': (student, 'get', '/check_minor_status/', None, 200),
+            'Summary/': (student, 'get', '/Summary/', None, 200),
+            'export-pdf/': (student, 'post', '/export-pdf/', {}, 200),
+            'fetch_students_by_faculty/': (faculty, 'get', '/fetch_students_by_faculty/', None, 200),
+            'predict_cgpa/': (student, 'post', '/predict_cgpa/', SAMPLE_FEATURES, 200),
+            'predict_cgpa_batch/': (
+                student, 'post', '/predict_cgpa_batch/', {'rows': [SAMPLE_FEATURES] * 3}, 200
+            ),
+            'predict_cgpa_from_user_data/': (student, 'post', '/predict_cgpa_from_user_data/', {}, 200),
+            'get_prediction_form_data/': (student, 'get', '/get_prediction_form_data/', None, 200),
+            'get_prediction_history/': (student, 'get', '/get_prediction_history/', None, 200),
+            'get_prediction_summaries/': (student, 'get', '/get_prediction_summaries/', None, 200),
+            'train_prediction_model/': (admin, 'post', '/train_prediction_model/', {}, 202),
+            'training_jobs/<int:job_id>/': (admin, 'get', f'/training_jobs/{job.pk}/', None, 200),
+            'prediction_accuracy/': (admin, 'get', '/prediction_accuracy/', None, 200),
+            'metrics': (None, 'get', '/metrics', None, 200),
+            'api/signup/': (None, 'post', '/api/signup/', signup, 201),
+            'api/login/': (
+                None, 'post', '/api/login/', {'email': student.email, 'password': 'benchmark-password'}, 200
+            ),
+            'api/faculty/': (None, 'post', '/api/faculty/', {
+                'username': 'newfaculty', 'email': 'newfaculty@example.com', 'password': 'pass12345',
+                'KTUID': '', 'college_code': 'NEW',
+            }, 201),
+            'api/is_faculty/': (faculty, 'get', '/api/is_faculty/', None, 200),
+            'api/is_admin/': (admin, 'get', '/api/is_admin/', None, 200),
+            'api/increment_semester/': (admin, 'post', '/api/increment_semester/', {}, 200),
+            'api/send_notification/': (
+                admin, 'post', '/api/send_notification/', {'header': 'Hi', 'content': 'Hello'}, 200
+            ),
+            'notifications/<int:notification_id>/read/': (
+                student, 'post', f'/notifications/{notification.pk}/read/', {}, 200
+            ),
+            'api/notifications/': (student, 'get', '/api/notifications/', None, 200),
+            'check_increment_notification/': (student, 'get', '/check_increment_notification/', None, 200),
+            'confirm_increment_notification/': (student, 'post', '/confirm_increment_notification/', {}, 200),
+            'deny_increment_notification/': (returning, 'post', '/deny_increment_notification/', {}, 200),
+            'update_minor_status/': (student, 'post', '/update_minor_status/', {'is_minor': True}, 200),
+            'update_honor_status/': (student, 'post', '/update_honor_status/', {'is_honors': True}, 200),
+            'api/notifications/<int:notification_id>/read/': (
+                student, 'post', f'/api/notifications/{notification.pk}/read/', {}, 200
+            ),
+            'api/verify-otp/': (None, 'post', '/api/verify-otp/', {'email': verifying.email, 'otp': str(otp)}, 200),
+            'api/resend-otp/': (None, 'post', '/api/resend-otp/', {'email': resending.email}, 200),
+        }
+
+    def query_counts(self, semesters):
+        """Queries issued and status returned by each route for a student with the given number of semesters"""
+        counts = {}
+        statuses = {}
+        caches['otp'].clear()  # OTP request throttling
+        with transaction.atomic():
+            seed_benchmark_data(
+                colleges=1, faculty_per_college=1, students=1, semesters=semesters, minor_share=0, honor_share=0
+            )
+            admin = CustomUser.objects.create_user(
+                email='admin@example.com', password='pass12345', username='admin', is_staff=True, is_superuser=True
+            )
+            student = CustomUser.objects.get(email='student0@benchmark.test')
+            faculty = CustomUser.objects.get(email='faculty0.aaa@benchmark.test')
+            for route, (user, method, path, data, expected) in self.route_requests(student, faculty, admin).items():
+                client = APIClient()
+                if user is not None:
+                    client.force_authenticate(CustomUser.objects.get(pk=user.pk))
+                headers = {'HTTP_AUTHORIZATION': 'Bearer query-budget'} if route == 'metrics' else {}
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(client, method)(path, data, format='json', **headers)
+                counts[route] = len(queries)
+                statuses[route] = (response.status_code, expected)
+            transaction.set_rollback(True)
+        return counts, statuses
+
+    def test_every_route_has_a_budget(self):
+        routes = {str(pattern.pattern) for pattern in calculator_urls.urlpatterns + accounts_urls.urlpatterns}
+        self.assertEqual(routes, set(QUERY_BUDGETS))
+
+    def test_query_counts_are_constant_and_within_budget(self):
+        results = {semesters: self.query_counts(semesters) for semesters in self.HISTORY_SIZES}
+        counts = {semesters: result[0] for semesters, result in results.items()}
+        for route, budget in QUERY_BUDGETS.items():
+            with self.subTest(route=route):
+                for _, statuses in results.values():
+                    status_code, expected = statuses[route]
+                    self.assertEqual(status_code, expected, "The route failed, so its queries are not representative")
+                by_size = {semesters: counts[semesters][route] for semesters in self.HISTORY_SIZES}
+                self.assertEqual(len(set(by_size.values())), 1, f"Query count grows with history: {by_size}")
+                self.assertLessEqual(max(by_size.values()), budget)
+
+    def test_missing_grade_does_not_break_history_views(self):
+        student = create_student('nograde@example.com', [['A', 'B']], cgpa=8.0)
+        Grade.objects.filter(subject__name='Subject 1').delete()
+        self.client.force_authenticate(student)
+
+        response = self.client.get('/get_user_data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['grade'] for s in response.data['semesters'][0]['subjects']], ['A', 'N/A'])
+        response = self.client.post('/export-pdf/', {}, format='json')
+        self.assertEqual([s['grade'] for s in response.data['semesters'][0]['subjects']], ['A', 'N/A'])
+
+
+class MetricsTests(PredictorTestCase):
+    def setUp(self):
+        super().setUp()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.metrics_dir = tmpdir.name
+        settings = override_settings(CGPA_METRICS_DIR=self.metrics_dir, CGPA_METRICS_TOKEN='secret')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get_metrics(self):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+
+    def sample(self, body, line_start):
+        """Value of the first exposition line starting with line_start"""
+        for line in body.splitlines():
+            if line.startswith(line_start):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_records_requests_per_view(self):
+        view = 'calculator.views.get_user_data'
+        before = self.get_metrics().content.decode()
+        self.client.get('/get_user_data/')
+        self.client.get('/get_user_data/')
+        self.client.post('/calculate_gpa/', {'semester': 'bad'}, format='json')
+
+        response = self.get_metrics()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        requests = f'gpabackend_http_requests_total{{view="{view}",method="GET",status="200"}}'
+        self.assertEqual(self.sample(body, requests) - self.sample(before, requests), 2)
+        count = f'gpabackend_http_request_duration_seconds_count{{view="{view}"}}'
+        self.assertEqual(self.sample(body, count) - self.sample(before, count), 2)
+        self.assertGreater(self.sample(body, f'gpabackend_db_queries_total{{view="{view}"}}'), 0)
+        self.assertIn('view="calculator.views.calculate_gpa",method="POST",status="400"', body)
+        self.assertIn('gpabackend_prediction_cache_hits_total', body)
+
+    def test_sums_metrics_files_of_other_workers(self):
+        self.client.get('/get_user_data/')
+        metrics_registry.flush(force=True)
+        snapshot = metrics_registry.snapshot()
+        with open(os.path.join(self.metrics_dir, f'metrics-{os.getppid()}-1.json'), 'w') as f:
+            json.dump(snapshot, f)
+
+        totals = metrics_registry.aggregate()
+        view = 'calculator.views.get_user_data'
+        self.assertEqual(totals['processes'], 2)
+        self.assertEqual(
+            totals['views'][view]['requests']['GET 200'], 2 * snapshot['views'][view]['requests']['GET 200']
+        )
+
+    def test_files_of_exited_workers_are_folded_in(self):
+        self.client.get('/get_user_data/')
+        metrics_registry.flush(force=True)
+        snapshot = metrics_registry.snapshot()
+        exited = subprocess.Popen(['true'])
+        exited.wait()  # a pid that is no longer running
+        for name in (f'metrics-{exited.pid}-1.json', f'metrics-{exited.pid}-2.json'):
+            with open(os.path.join(self.metrics_dir, name), 'w') as f:
+                json.dump(snapshot, f)
+        open(os.path.join(self.metrics_dir, f'metrics-{exited.pid}-3.json.tmp'), 'w').close()
+
+        view = 'calculator.views.get_user_data'
+        totals = metrics_registry.aggregate()
+        self.assertEqual(totals['processes'], 1)
+        self.assertEqual(
+            totals['views'][view]['requests']['GET 200'],
+            metrics_registry.snapshot()['views'][view]['requests']['GET 200'] + 2 * snapshot['views'][view]['requests']['GET 200']
+        )
+        self.assertEqual(sorted(os.listdir(self.metrics_dir)), sorted([
+            'exited.json', 'prune.lock', os.path.basename(metrics_registry.path()),
+        ]))
+        self.assertEqual(metrics_registry.prune_exited(), 0)
+        self.assertEqual(metrics_registry.aggregate()['views'], totals['views'])
+
+    def test_token_protects_metrics(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.get_metrics().status_code, 200)
+        with override_settings(CGPA_METRICS_TOKEN=''):
+            self.assertEqual(self.get_metrics().status_code, 404)
+
+    def test_exited_threads_do_not_grow_the_registry(self):
+        registry = MetricsRegistry()
+
+        def handle_request():
+            registry.record('view', 'GET', 200, 0.01, 1, 0.001, 10)
+
+        for _ in range(500):
+            thread = threading.Thread(target=handle_request)
+            thread.start()
+            thread.join()
+        handle_request()
+
+        self.assertLessEqual(len(registry._accumulators), 1)
+        self.assertEqual(registry.snapshot()['views']['view']['requests'], {'GET 200': 501})
+
+
+class LoggingTests(TestCase):
+    def capture(self, name, level=logging.DEBUG):
+        """Route logger name through a redacting QueueStreamHandler; returns a function giving the output"""
+        stream = io.StringIO()
+        handler = QueueStreamHandler(stream)
+        handler.addFilter(RedactFilter())
+        logger = logging.getLogger(name)
+        old_level, old_propagate = logger.level, logger.propagate
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+        def restore():
+            logger.removeHandler(handler)
+            logger.setLevel(old_level)
+            logger.propagate = old_propagate
+            handler.close()
+        self.addCleanup(restore)
+
+        def output():
+            handler.listener.stop()  # drain the queue
+            handler.listener.start()
+            return stream.getvalue()
+        return output
+
+    def test_redacts_secrets_in_arguments_and_text(self):
+        output = self.capture('calculator.tests.redaction')
+        logger = logging.getLogger('calculator.tests.redaction')
+        logger.debug("Request data: %s", {'email': 'a@b.test', 'password': 'hunter2', 'nested': {'otp': '123456'}})
+        logger.debug("Request headers: %s", {'Authorization': 'Bearer abc.def.ghi'})
+        logger.debug("Request body: %s", b'{"email": "a@b.test", "password": "hunter2"}')
+        logger.debug("Token refresh=xyz789 issued")
+
+        text = output()
+        for secret in ('hunter2', '123456', 'abc.def.ghi', 'xyz789'):
+            self.assertNotIn(secret, text)
+        self.assertEqual(text.count('a@b.test'), 2)
+        self.assertEqual(text.count(REDACTED), 5)
+
+    def test_login_debug_logging_hides_password(self):
+        CustomUser.objects.create_user(username='logger', email='logger@example.com', password='s3cret-pass')
+        output = self.capture('accounts.views')
+        response = APIClient().post(
+            '/api/login/', {'email': 'logger@example.com', 'password': 's3cret-pass'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        text = output()
+        self.assertIn('logger@example.com', text)
+        self.assertNotIn('s3cret-pass', text)
+        self.assertNotIn(response.data['access'], text)
+
+    def test_arguments_are_not_formatted_below_the_level(self):
+        output = self.capture('calculator.tests.lazy', level=logging.INFO)
+
+        class Probe:
+            formatted = 0
+
+            def __str__(self):
+                Probe.formatted += 1
+                return 'probe'
+
+        logging.getLogger('calculator.tests.lazy').debug("Response data: %s", Probe())
+        self.assertEqual(Probe.formatted, 0)
+        self.assertEqual(output(), '')
+
+
+class FeaturePipelineTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def create_graduate(self, email, grades_by_semester, cgpa=None):
+        """Student with every semester up to the final one, empty after grades_by_semester"""
+        return create_student(email, grades_by_semester + [[]] * (8 - len(grades_by_semester)), cgpa=cgpa)
+
+    def test_builds_histograms_and_lifestyle_features(self):
+        first = self.create_graduate('a@example.com', [['S', 'A+', 'A'], ['B', 'F']], cgpa=7.5)
+        self.create_graduate('b@example.com', [['P', 'D+', 'C+']], cgpa=6.0)
+        self.create_graduate('c@example.com', [['S']], cgpa=None)  # CGPA unknown: skipped
+        CGPAPrediction.objects.create(
+            user=first, predicted_cgpa=7.0, inputs=stored_inputs(study_hours_per_week=20, project_count=4)
+        )
+
+        with self.assertNumQueries(4):  # student stream + 3 queries for the single chunk
+            written = build_feature_dataset(self.tmpdir.name, chunk_size=10)
+        self.assertEqual(written, 2)
+
+        data = FeatureDataset(self.tmpdir.name).load()
+        self.assertEqual(list(data['user_id']), [first.pk, first.pk + 1])
+        self.assertEqual([data[f][0] for f in ('num_S', 'num_A', 'num_B', 'num_F')], [1, 2, 1, 1])
+        self.assertEqual(data['num_D'][1], 2)
+        self.assertEqual(data['study_hours_per_week'][0], 20)
+        self.assertEqual(data['study_hours_per_week'][1], 12)  # default for students without predictions
+        self.assertAlmostEqual(float(data['final_cgpa'][0]), 7.5)
+
+    def test_incremental_runs_only_add_new_students(self):
+        self.create_graduate('a@example.com', [['S']], cgpa=9.0)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 1)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 0)
+        self.create_graduate('b@example.com', [['A']], cgpa=8.0)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 1)
+        self.assertEqual(FeatureDataset(self.tmpdir.name).rows, 2)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name, rebuild=True), 2)
+
+    def test_incremental_runs_pick_up_changed_students(self):
+        first = self.create_graduate('a@example.com', [['S']], cgpa=9.0)
+        pending = self.create_graduate('b@example.com', [['B']], cgpa=None)
+        self.create_graduate('c@example.com', [['A']], cgpa=8.0)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 2)
+
+        pending.cgpa = 7.0  # finishes, below the highest extracted id
+        pending.save()
+        Semester.objects.filter(user=pending, semester='semester_8').update(gpa=7.0)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 1)
+
+        grade = Grade.objects.get(subject__semester__user=first)
+        grade.grade = 'F'
+        grade.save()  # moves a grade bucket in UserFeatures
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 1)
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 0)
+
+        dataset = FeatureDataset(self.tmpdir.name)
+        self.assertEqual(dataset.rows, 4)
+        data = dataset.load(['user_id', 'num_S', 'num_F', 'final_cgpa'], latest_by='user_id')
+        self.assertEqual(sorted(data['user_id']), [first.pk, pending.pk, pending.pk + 1])
+        latest = {user_id: index for index, user_id in enumerate(data['user_id'])}
+        self.assertEqual((data['num_S'][latest[first.pk]], data['num_F'][latest[first.pk]]), (0, 1))
+        self.assertAlmostEqual(float(data['final_cgpa'][latest[pending.pk]]), 7.0)
+
+    def test_students_still_studying_are_left_out(self):
+        graduate = self.create_graduate('a@example.com', [['S']], cgpa=9.0)
+        create_student('b@example.com', [['A'], ['B']], cgpa=8.0)  # running CGPA after semester 2
+        self.assertEqual(build_feature_dataset(self.tmpdir.name), 1)
+        self.assertEqual(list(FeatureDataset(self.tmpdir.name).load(['user_id'])['user_id']), [graduate.pk])
+
+    def test_training_switches_to_real_dataset(self):
+        self.create_graduate('a@example.com', [['S', 'A']], cgpa=9.0)
+        self.create_graduate('b@example.com', [['B', 'C']], cgpa=7.0)
+        build_feature_dataset(self.tmpdir.name)
+        with override_settings(CGPA_FEATURE_DATASET_DIR=self.tmpdir.name, CGPA_MIN_TRAINING_ROWS=2):
+            self.assertEqual(cgpa_predictor.training_source(), 'dataset')
+            X, y = cgpa_predictor.training_data()
+        self.assertEqual(list(X.columns), cgpa_predictor.feature_columns)
+        self.assertEqual(list(y), [9.0, 7.0])
@@ -0,0 +1,113 @@
+"""
+Background execution of CGPA model training.
+
+Views only enqueue a TrainingJob row; the `run_training_worker` management
+command claims queued jobs and runs them outside the request cycle. The
+trained model is published as a new registry version, and every web worker
+swaps it in on its next prediction.
+
+A job still running CGPA_TRAINING_JOB_TIMEOUT seconds (plus its search
+budget) after it was claimed belongs to a worker that died; it is marked
+failed the next time a worker looks for work.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TrainingJob
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_training_job(user=None, search_budget=None):
+    """
+    Queue a training run and return the created job.
+    With a search_budget (seconds) the worker runs a hyperparameter search instead.
+    """
+    return TrainingJob.objects.create(requested_by=user, search_budget=search_budget)
+
+
+def fail_stale_jobs():
+    """Mark jobs whose worker stopped before finishing them as failed. Returns the number marked."""
+    timeout = getattr(settings, 'CGPA_TRAINING_JOB_TIMEOUT', 7200)
+    now = timezone.now()
+    failed = 0
+    running = TrainingJob.objects.filter(status=TrainingJob.STATUS_RUNNING, started_at__isnull=False)
+    for job_id, started_at, search_budget in running.values_list('id', 'started_at', 'search_budget'):
+        if started_at + timedelta(seconds=timeout + (search_budget or 0)) > now:
+            continue
+        failed += TrainingJob.objects.filter(
+            pk=job_id, status=TrainingJob.STATUS_RUNNING, started_at=started_at
+        ).update(
+            status=TrainingJob.STATUS_FAILED, finished_at=now,
+            error='The training worker stopped before the job finished',
+        )
+    if failed:
+        logger.warning("Marked %s stale training job(s) as failed", failed)
+    return failed
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running.
+    The conditional update makes this safe with several workers polling the table.
+    """
+    fail_stale_jobs()
+    for job_id in TrainingJob.objects.filter(
+        status=TrainingJob.STATUS_QUEUED
+    ).order_by('created_at', 'id').values_list('id', flat=True)[:5]:
+        claimed = TrainingJob.objects.filter(
+            pk=job_id, status=TrainingJob.STATUS_QUEUED
+        ).update(status=TrainingJob.STATUS_RUNNING, started_at=timezone.now())
+        if claimed:
+            return TrainingJob.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Train the model for a claimed job and record the outcome"""
+    from .cgpa_predictor import cgpa_predictor
+
+    try:
+        if job.search_budget:
+            metrics = cgpa_predictor.search_model(job.search_budget)
+        else:
+            metrics = cgpa_predictor.train_model()
+        job.metrics = {name: float(value) for name, value in metrics.items()}
+        job.model_version = cgpa_predictor.model_version
+        job.status = TrainingJob.STATUS_SUCCEEDED
+    except Exception:
+        logger.exception("Training job %s failed", job.pk)
+        job.error = traceback.format_exc()
+        job.status = TrainingJob.STATUS_FAILED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['metrics', 'model_version', 'status', 'error', 'finished_at'])
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """Run queued jobs until the queue is empty or limit jobs have run"""
+    completed = []
+    while limit is None or len(completed) < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        completed.append(run_job(job))
+    return completed
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'search_budget': job.search_budget,
+        'metrics': job.metrics,
+        'model_version': job.model_version or None,
+        'error': job.error or None,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'started_at': job.started_at.strftime('%Y-%m-%d %H:%M:%S') if job.started_at else None,
+        'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None,
+    }
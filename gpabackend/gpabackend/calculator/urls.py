@@ -14,8 +14,13 @@ urlpatterns = [
     path('fetch_students_by_faculty/', views.fetch_students_by_faculty, name='faculty'),  # Add the new endpoint
     # CGPA Prediction endpoints
     path('predict_cgpa/', views.predict_cgpa, name='predict_cgpa'),
+    path('predict_cgpa_batch/', views.predict_cgpa_batch, name='predict_cgpa_batch'),
     path('predict_cgpa_from_user_data/', views.predict_cgpa_from_user_data, name='predict_cgpa_from_user_data'),
     path('get_prediction_form_data/', views.get_prediction_form_data, name='get_prediction_form_data'),
     path('get_prediction_history/', views.get_prediction_history, name='get_prediction_history'),
+    path('get_prediction_summaries/', views.get_prediction_summaries, name='get_prediction_summaries'),
     path('train_prediction_model/', views.train_prediction_model, name='train_prediction_model'),
+    path('training_jobs/<int:job_id>/', views.training_job_status, name='training_job_status'),
+    path('prediction_accuracy/', views.prediction_accuracy, name='prediction_accuracy'),
+    path('metrics', views.metrics, name='metrics'),
 ]   
\ No newline at end of file
@@ -2,16 +2,31 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Semester, Subject, Grade, GradeDetail, CGPAPrediction
+from .models import Semester, Subject, Grade, GradeDetail, CGPAPrediction, PredictionInput, PredictionMonthlySummary, TrainingJob
 from accounts.models import CustomUser
 from .courses import CREDITS
 from .minor import MINOR, HONOR  # Import the credits from minor.py
-from django.db.models import Max, Min, Count, Q  # Add this import
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Min, Count, Q, F  # Add this import
 from django.http import HttpResponse
+from django.conf import settings
 from subprocess import run, PIPE  # To execute Dart script
 import json
+import logging
 from django.http import JsonResponse
-from .cgpa_predictor import cgpa_predictor
+import hmac
+from django.views.decorators.http import require_GET
+from .accuracy import accuracy_report
+from .feature_store import (
+    feature_values, get_user_features, rebuild_user_features, record_lifestyle_features, stored_grade_distribution,
+)
+from .features import FEATURE_COLUMNS, FEATURE_DEFAULTS
+from .metrics import registry as metrics_registry, render_prometheus
+from .pagination import keyset_page
+from .prediction_service import get_predictor
+from .training_jobs import enqueue_training_job, serialize_job
+
+logger = logging.getLogger(__name__)
 
 cgpa=0
 # Grade values mapping
@@ -19,6 +34,134 @@ GRADE_VALUES = {
     'S': 10, 'A+': 9, 'A': 8.5, 'B+': 8, 'B': 7.5, 'C+': 7, 'C': 6.5, 'D+': 6, 'P': 5.5, 'F': 0
 }
 
+# Upper bound on rows accepted by predict_cgpa_batch in one request
+MAX_PREDICTION_BATCH_SIZE = 1000
+
+# Largest page served by get_prediction_history
+MAX_HISTORY_PAGE_SIZE = 100
+
+# Prediction columns returned by get_prediction_history, besides the input features
+HISTORY_FIELDS = ('id', 'predicted_cgpa', 'actual_cgpa', 'created_at', 'prediction_type', 'model_version')
+
+
+def validate_prediction_features(features):
+    """
+    Check prediction inputs against the accepted ranges.
+    Returns an error message, or None when the features are valid.
+    """
+    if not all(isinstance(value, (int, float)) for value in features.values()):
+        return 'Feature values must be numbers'
+    if not (0 <= features['study_hours_per_week'] <= 25):
+        return 'Study hours per week must be between 0 and 25'
+    if not (5.0 <= features['previous_board_cgpa'] <= 10.0):
+        return 'Previous board CGPA must be between 5.0 and 10.0'
+    return None
+
+
+def is_truthy(value):
+    """Interpret a JSON boolean or a flag string such as "1", "true" or "yes" """
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def recorded_grade(subject, default='N/A'):
+    """
+    Grade letter of a subject fetched with its grade (prefetch_related or
+    select_related), or default when none is recorded. Never queries.
+    """
+    try:
+        return subject.grade.grade
+    except Grade.DoesNotExist:
+        return default
+
+
+def save_subject_grades(semester_obj, entries):
+    """
+    Create or update the Subject and Grade rows of a semester from
+    {name: (credits, grade)} with bulk writes, so the query count does not
+    grow with the number of subjects. Bulk writes skip the feature-store
+    signals, so the owner's UserFeatures is rebuilt once at the end.
+    """
+    existing = {
+        subject.name: subject
+        for subject in semester_obj.subjects.select_related('grade').filter(name__in=list(entries))
+    }
+    new_subjects = [
+        Subject(semester=semester_obj, name=name, credits=credits)
+        for name, (credits, _) in entries.items() if name not in existing
+    ]
+    Subject.objects.bulk_create(new_subjects)
+
+    changed_subjects = []
+    new_grades = [Grade(subject=subject, grade=entries[subject.name][1]) for subject in new_subjects]
+    changed_grades = []
+    for name, subject in existing.items():
+        credits, grade = entries[name]
+        if subject.credits != credits:
+            subject.credits = credits
+            changed_subjects.append(subject)
+        try:
+            recorded = subject.grade
+        except Grade.DoesNotExist:
+            new_grades.append(Grade(subject=subject, grade=grade))
+            continue
+        if recorded.grade != grade:
+            recorded.grade = grade
+            changed_grades.append(recorded)
+
+    if changed_subjects:
+        Subject.objects.bulk_update(changed_subjects, ['credits'])
+    Grade.objects.bulk_create(new_grades)
+    if changed_grades:
+        Grade.objects.bulk_update(changed_grades, ['grade'])
+    if new_grades or changed_grades:
+        rebuild_user_features([semester_obj.user_id])
+
+
+def store_prediction_inputs(feature_rows):
+    """
+    Save the distinct input vectors among feature_rows in one INSERT, skipping
+    vectors already stored, and return the PredictionInput digest of each row
+    """
+    inputs = [PredictionInput.from_features(features) for features in feature_rows]
+    PredictionInput.objects.bulk_create({i.digest: i for i in inputs}.values(), ignore_conflicts=True)
+    return [i.digest for i in inputs]
+
+
+def save_predictions(feature_rows, build_records):
+    """
+    Store the input vectors of feature_rows and the CGPAPrediction rows
+    build_records(digests) returns, in one transaction.
+
+    Compaction (retention.py) can delete an already stored vector after the
+    skipped INSERT and before the predictions reference it; the foreign key
+    then fails and the transaction is run once more, inserting it again.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                CGPAPrediction.objects.bulk_create(build_records(store_prediction_inputs(feature_rows)))
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def build_prediction_record(user, inputs_digest, predicted_cgpa, prediction_type, model_version, **extra):
+    """
+    Build an unsaved CGPAPrediction row for stored inputs and a prediction
+    made by model_version (that of the ActiveModel used to predict)
+    """
+    return CGPAPrediction(
+        user=user,
+        predicted_cgpa=predicted_cgpa,
+        inputs_id=inputs_digest,
+        prediction_type=prediction_type,
+        model_version=model_version or '',
+        **extra
+    )
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_subjects(request):
@@ -27,14 +170,14 @@ def get_subjects(request):
     """
     user = request.user
     degree = user.degree
-    print("User degree:", degree)  # Log the user's degree
+    logger.debug("User degree: %s", degree)
     if degree not in CREDITS:
         response_data = {'error': 'Invalid degree'}
-        print("Response data:", response_data)  # Log the response
+        logger.debug("Response data: %s", response_data)
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
     
     response_data = CREDITS[degree]
-    print("Response data:", response_data)  # Log the response
+    logger.debug("Response data: %s", response_data)
     return Response(response_data)
 
 
@@ -55,15 +198,10 @@ def get_user_data(request):
             }
 
             for subject in semester.subjects.all():
-                try:
-                    grade = subject.grade.grade
-                except Grade.DoesNotExist:
-                    grade = None
-
                 semester_info['subjects'].append({
                     'name': subject.name,
                     'credits': subject.credits,
-                    'grade': subject.grade.grade if subject.grade else 'N/A'
+                    'grade': recorded_grade(subject)
                 })
 
             semester_data.append(semester_info)
@@ -81,18 +219,18 @@ def get_user_data(request):
             'cgpa': round(cgpa, 2)
         }
 
-        print("Response data:", response_data)  # Log the response
+        logger.debug("Response data: %s", response_data)
         return Response(response_data, status=status.HTTP_200_OK)
 
     except Exception as e:
-        print("Error in get_user_data:", e)
+        logger.exception("Error in get_user_data: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def calculate_gpa(request):
     try:
-        print("Received request data:", request.data)  # Log the received request data
+        logger.debug("Received request data: %s", request.data)
         data = request.data
         user = request.user
         semester = data.get('semester')
@@ -100,7 +238,7 @@ def calculate_gpa(request):
 
         # Validate semester
         if not semester or not isinstance(semester, str):
-            print("Invalid semester:", semester)  # Log invalid semester
+            logger.debug("Invalid semester: %s", semester)
             return Response(
                 {'error': 'Invalid semester'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -108,7 +246,7 @@ def calculate_gpa(request):
 
         # Validate grades
         if not isinstance(grades, dict):
-            print("Invalid grades format:", grades)  # Log invalid grades
+            logger.debug("Invalid grades format: %s", grades)
             return Response(
                 {'error': 'Invalid grades format'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -142,8 +280,9 @@ def calculate_gpa(request):
         semester_obj.total_points = 0
         semester_obj.earn_credits = 0
 
+        # Validate every subject and grade before writing anything
+        entries = {}
         for subject_name, grade in grades.items():
-            # Validate subject and credits
             credits = None
             for slot, courses in CREDITS[user.degree].get(semester, {}).items():
                 if subject_name.strip() in courses:
@@ -151,7 +290,7 @@ def calculate_gpa(request):
                     break
 
             if credits is None:
-                print(f"Credits not found for subject '{subject_name}' in {semester}")  # Log missing credits
+                logger.debug("Credits not found for subject '%s' in %s", subject_name, semester)
                 return Response(
                     {'error': f'Credits not found for subject "{subject_name}" in {semester}'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -159,40 +298,24 @@ def calculate_gpa(request):
 
             # Validate grade
             if grade not in GRADE_VALUES:
-                print(f"Invalid grade '{grade}' for subject '{subject_name}'")  # Log invalid grade
+                logger.debug("Invalid grade '%s' for subject '%s'", grade, subject_name)
                 return Response(
                     {'error': f'Invalid grade "{grade}" for subject "{subject_name}"'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-
-            subject, _ = Subject.objects.get_or_create(
-                semester=semester_obj,
-                name=subject_name.strip(),
-                defaults={'credits': credits}
-            )
-
-            subject.credits = credits
-            subject.save()
-
-            Grade.objects.update_or_create(
-                subject=subject,
-                defaults={'grade': grade}
-            )
-
-            if grade in GRADE_VALUES:
-                print("Grade:", GRADE_VALUES[grade]) 
-                
-                semester_obj.total_credits += subject.credits
-                gcredit = GRADE_VALUES[grade] * subject.credits
-                semester_obj.total_points += gcredit
-                
-                print(GRADE_VALUES[grade] ,"*", subject.credits,"=",gcredit)  # Log grade and credits
-                if grade != 'F':
-                    semester_obj.earn_credits += subject.credits
-                    semester_obj.complete_courses += 1  # Increment complete courses count
-        print("Total credits:", semester_obj.total_credits)  # Log total credits
-        print("Total points:", semester_obj.total_points)  # Log total points   
-        print("Earned credits:", semester_obj.earn_credits)  # Log earned credits
+            entries[subject_name.strip()] = (credits, grade)
+
+        save_subject_grades(semester_obj, entries)
+
+        for credits, grade in entries.values():
+            semester_obj.total_credits += credits
+            semester_obj.total_points += GRADE_VALUES[grade] * credits
+            if grade != 'F':
+                semester_obj.earn_credits += credits
+                semester_obj.complete_courses += 1  # Increment complete courses count
+        logger.debug("Total credits: %s", semester_obj.total_credits)
+        logger.debug("Total points: %s", semester_obj.total_points)
+        logger.debug("Earned credits: %s", semester_obj.earn_credits)
         if semester_obj.total_credits == 0:
             return Response(
                 {'error': 'No valid grades provided'},
@@ -209,7 +332,7 @@ def calculate_gpa(request):
         try:
             cgpa = sum(s.gpa for s in all_semesters if s.gpa is not None) / len(all_semesters)
         except TypeError as e:
-            print("TypeError in CGPA calculation:", e)
+            logger.warning("TypeError in CGPA calculation: %s", e)
             return Response(
                 {'error': f'TypeError in CGPA calculation: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -217,15 +340,15 @@ def calculate_gpa(request):
 
         user.cgpa = cgpa  # Update the user's CGPA
         user.save()
-        print("CGPA:", user.cgpa)  # Log CGPA
-        print("GPA and CGPA calculated successfully")  # Log successful calculation
+        logger.debug("CGPA: %s", user.cgpa)
+        logger.debug("GPA and CGPA calculated successfully")
         return Response({
             'semester_gpa': round(gpa, 2),
             'cgpa': round(cgpa, 2)
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        print("An error occurred:", e)  # Print the error
+        logger.exception("An error occurred: %s", e)
         return Response(
             {'error': f'An unexpected error occurred: {str(e)}'},
             status=status.HTTP_400_BAD_REQUEST
@@ -235,26 +358,26 @@ def calculate_gpa(request):
 @permission_classes([IsAuthenticated])
 def calculate_grade(request):
     try:
-        print("Request body:", request.data)  # Log request body
+        logger.debug("Request body: %s", request.data)
         marks = request.data.get('marks')
         subject_name = request.data.get('subject')  # Get subject name from request
         semester_name = request.data.get('semester')  # Get semester name from request
 
         if marks is None or not subject_name or not semester_name:
             response_data = {'error': 'Marks, subject, and semester are required'}
-            print("Response body:", response_data)  # Log response body
+            logger.debug("Response body: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             marks = float(marks)
         except ValueError:
             response_data = {'error': 'Invalid marks format'}
-            print("Response body:", response_data)  # Log response body
+            logger.debug("Response body: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         if marks < 0 or marks > 150:
             response_data = {'error': 'Marks should be between 0 and 150'}
-            print("Response body:", response_data)  # Log response body
+            logger.debug("Response body: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         # Determine grade based on marks
@@ -295,12 +418,12 @@ def calculate_grade(request):
                     credits = courses[subject_name.strip()]
                     break
         except Exception as e:
-            print(f"Error while looking up credits: {e}")
+            logger.exception("Error while looking up credits: %s", e)
 
         if credits is None:
             # If credits cannot be determined, return an informative error
             response_data = {'error': f'Credits not found for subject "{subject_name}" in {semester_name}'}
-            print("Response body:", response_data)  # Log response body
+            logger.debug("Response body: %s", response_data)
             return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
         # Ensure subject is created with credits (avoid NOT NULL constraint failures)
@@ -326,7 +449,7 @@ def calculate_grade(request):
                 defaults={'grade': grade}
             )
         except Exception as e:
-            print(f"Warning: failed to update Grade model: {e}")
+            logger.warning("Failed to update Grade model: %s", e)
 
         response_data = {
             'subject': subject_name,
@@ -334,29 +457,29 @@ def calculate_grade(request):
             'marks': marks,
             'grade': grade
         }
-        print("Response body:", response_data)  # Log response body
+        logger.debug("Response body: %s", response_data)
         return Response(response_data, status=status.HTTP_200_OK)
 
     except Exception as e:
         response_data = {'error': str(e)}
-        print("Response body:", response_data)  # Log response body
+        logger.exception("Error in calculate_grade")
         return Response(response_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def calculate_minor(request):
     try:
-        print("Request received for minor calculation")  # Log request received
-        print("Request body:", request.body)  # Log raw request body
+        logger.debug("Request received for minor calculation")
+        logger.debug("Request body: %s", request.body)
         data = request.data
-        print("Received payload:", data)  # Print the received payload
+        logger.debug("Received payload: %s", data)
 
         user = request.user
         semester = data.get('semester')
         minor_grades = data.get('minor_grades', {})
         Bucket = data.get('Bucket', 'Bucket 1')  # Define and get the selected bucket
         Type = data.get('Type', 'Minor')  # Define and get the selected type (Minor or Honor)
-        print("THIS ISSSSS", minor_grades)  # Ensure this line is executed
+        logger.debug("Minor grades: %s", minor_grades)
 
         # Validate semester
         if not semester or not isinstance(semester, str):
@@ -390,37 +513,29 @@ def calculate_minor(request):
             semester_obj.total_credits = 0
         if semester_obj.total_points is None:
             semester_obj.total_points = 0
-        print("semester_obj.total_credits:", semester_obj.total_credits)  # Log total_credits
-        print("semester_obj.total_points:", semester_obj.total_points)  # Log total_points
+        logger.debug("semester_obj.total_credits: %s", semester_obj.total_credits)
+        logger.debug("semester_obj.total_points: %s", semester_obj.total_points)
 
         # Select the correct dictionary based on the type
         selected_dict = MINOR if Type == 'Minor' else HONOR
 
+        entries = {}
         for subject_name, grade in minor_grades.items():
             # Use the original subject name directly
             credits = selected_dict[user.degree].get(Bucket, {}).get(semester, {}).get(subject_name.strip())  # Correct reference to selected_dict
            
             if credits is None:
-                print(f'Credits not found for subject "{subject_name}" in {semester}')  # Log missing credits
+                logger.debug('Credits not found for subject "%s" in %s', subject_name, semester)
                 return Response(
                     {'error': f'Credits not found for subject "{subject_name}" in {semester}'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            entries[subject_name.strip()] = (credits, grade)
 
-            # Save or update the subject and grade
-            subject, _ = Subject.objects.get_or_create(
-                semester=semester_obj,
-                name=subject_name.strip(),
-                defaults={'credits': credits}
-            )
-            subject.credits = credits
-            subject.save()
-
-            Grade.objects.update_or_create(
-                subject=subject,
-                defaults={'grade': grade}
-            )
+        # Save or update the subjects and grades
+        save_subject_grades(semester_obj, entries)
 
+        for credits, grade in entries.values():
             # Calculate additional SGPA
             if grade in GRADE_VALUES:
                 semester_obj.total_credits += credits
@@ -431,19 +546,19 @@ def calculate_minor(request):
                 {'error': 'No valid grades provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        print("semester_obj.total_credits:", semester_obj.total_credits)  # Log total_credits
-        print("semester_obj.total_points:", semester_obj.total_points)  # Log total_points
+        logger.debug("semester_obj.total_credits: %s", semester_obj.total_credits)
+        logger.debug("semester_obj.total_points: %s", semester_obj.total_points)
         # Save updated SGPA for the semester
         acsgpa = semester_obj.total_points / semester_obj.total_credits
         semester_obj.minor_gpa = acsgpa  # Save the minor GPA in the database
         semester_obj.save()  # Persist the changes to the database
-        print("SGPA:", semester_obj.gpa, "Minor GPA:", semester_obj.minor_gpa)  # Log successful SGPA calculation
+        logger.debug("SGPA: %s Minor GPA: %s", semester_obj.gpa, semester_obj.minor_gpa)
 
         all_semesters = Semester.objects.filter(user=user)
         try:
             minor_cgpa = sum(s.gpa for s in all_semesters if s.gpa is not None) / len(all_semesters)
         except TypeError as e:
-            print("TypeError in CGPA calculation:", e)
+            logger.warning("TypeError in CGPA calculation: %s", e)
             return Response(
                 {'error': f'TypeError in CGPA calculation: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -451,11 +566,11 @@ def calculate_minor(request):
 
         # Include updated grades in the response
         updated_grades = {
-            subject.name: subject.grade.grade if subject.grade else None
-            for subject in semester_obj.subjects.all()
+            subject.name: recorded_grade(subject, None)
+            for subject in semester_obj.subjects.select_related('grade')
         }
 
-        print("SGPA and CGPA calculated successfully")  # Log successful calculation
+        logger.debug("SGPA and CGPA calculated successfully")
         return Response({
             'semester_sgpa': round(acsgpa, 2),  # Return the updated SGPA
             'cgpa': round(minor_cgpa, 2),
@@ -463,7 +578,7 @@ def calculate_minor(request):
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
-        print("An error occurred:", e)  # Print the error
+        logger.exception("An error occurred: %s", e)
         return Response(
             {'error': f'An unexpected error occurred: {str(e)}'},
             status=status.HTTP_400_BAD_REQUEST
@@ -494,23 +609,23 @@ def get_minor_subjects(request):
     try:
         user = request.user
         degree = user.degree
-        print("User degree:", degree)  # Log the user's degree
+        logger.debug("User degree: %s", degree)
 
         minor_subjects = MINOR.get(degree, {})
         honor_subjects = HONOR.get(degree, {})
 
         if not minor_subjects and not honor_subjects:
-            print("Invalid degree or no minor/honor subjects available")  # Log the error condition
+            logger.debug("Invalid degree or no minor/honor subjects available")
             return Response({'error': 'Invalid degree or no minor/honor subjects available'}, status=status.HTTP_400_BAD_REQUEST)
 
         response_data = {
             'Minor': minor_subjects,
             'Honor': honor_subjects
         }
-        print("Response data:", response_data)  # Print the response data
+        logger.debug("Response data: %s", response_data)
         return Response(response_data)
     except Exception as e:
-        print("Error in get_minor_subjects:", str(e))  # Log the error
+        logger.exception("Error in get_minor_subjects: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -518,8 +633,8 @@ def get_minor_subjects(request):
 @permission_classes([IsAuthenticated])  # Ensure this line is present
 def summury(request):
     user = request.user
-    print("User:", user)
-    print("User CGPA:", user.cgpa)  # Log the user's CGPA
+    logger.debug("User: %s", user)
+    logger.debug("User CGPA: %s", user.cgpa)
    
 
     # Safely aggregate best and worst semester GPAs
@@ -534,20 +649,20 @@ def summury(request):
     semesters = Semester.objects.filter(user=user)
     total_credits = [semester.total_credits or 0 for semester in semesters]
     earned_credits = [semester.earn_credits or 0 for semester in semesters]
-    print("credits",earned_credits)
+    logger.debug("Earned credits: %s", earned_credits)
     # Calculate yearback required credits
     current_semester = int(user.semester.split('_')[-1])
-    print("Current semester:", current_semester)  # Log current semester
+    logger.debug("Current semester: %s", current_semester)
     yearback_required = 0
 
 
     if current_semester <= 4:
         first_two_semesters_total = sum(total_credits[:2])
-        print(first_two_semesters_total)
+        logger.debug("First two semesters total credits: %s", first_two_semesters_total)
         first_two_semesters_earned = sum(earned_credits[:2])
-        print(first_two_semesters_earned)
+        logger.debug("First two semesters earned credits: %s", first_two_semesters_earned)
         difference = first_two_semesters_total - first_two_semesters_earned
-        print(difference,'diff')
+        logger.debug("Credit difference: %s", difference)
         yearback_required = max(0,  difference-17)
     elif current_semester <= 6:
         first_four_semesters_total = sum(total_credits[:4])
@@ -557,21 +672,21 @@ def summury(request):
 
     # Calculate SGPA required for upcoming semesters to achieve targeted CGPA
     targeted_cgpa = user.targeted_cgpa or 0.0
-    print("Targeted CGPA:", targeted_cgpa)  # Log targeted CGPA
+    logger.debug("Targeted CGPA: %s", targeted_cgpa)
     sgpa_required = None
     total_semesters = 8  # Assuming 8 semesters in total
     if targeted_cgpa and current_semester < total_semesters:
         remaining_semesters = total_semesters - current_semester
-        print("Remaining semesters:", remaining_semesters)  # Log remaining semesters
+        logger.debug("Remaining semesters: %s", remaining_semesters)
         cgpsum = user.cgpa * current_semester  # Use the user's CGPA field
-        print("CGPA sum:", cgpsum)
+        logger.debug("CGPA sum: %s", cgpsum)
         required_cgpa_sum = targeted_cgpa * total_semesters
-        print("Required CGPA sum:", required_cgpa_sum)
+        logger.debug("Required CGPA sum: %s", required_cgpa_sum)
         sgpa_required = (required_cgpa_sum - cgpsum) / remaining_semesters
         sgpa_required = round(sgpa_required, 2)
         if sgpa_required > 10:
             sgpa_required = "not achievable"
-        print("SGPA required:", sgpa_required)  # Log SGPA required
+        logger.debug("SGPA required: %s", sgpa_required)
 
     return Response({
         'best_semester': best_semester,
@@ -589,12 +704,12 @@ def summury(request):
 @permission_classes([IsAuthenticated])
 def export_gpa_data(request):
     try:
-        print("Request Method:", request.method)  # Log the HTTP method
-        print("Request Headers:", request.headers)  # Log the request headers
-        print("Request Body:", request.body.decode('utf-8'))  # Log the raw request body
+        logger.debug("Request Method: %s", request.method)
+        logger.debug("Request Headers: %s", request.headers)
+        logger.debug("Request Body: %s", request.body)
 
         user = request.user
-        print("User:", user)  # Log the user making the request
+        logger.debug("User: %s", user)
 
         # Prepare user data
         user_data = {
@@ -603,7 +718,7 @@ def export_gpa_data(request):
             'current_semester': user.semester,
             'cgpa': user.cgpa,
         }
-        print("User Data:", user_data)  # Log user data
+        logger.debug("User Data: %s", user_data)
 
         # Prepare semester data
         semesters = []
@@ -613,7 +728,7 @@ def export_gpa_data(request):
                 subjects.append({
                     'name': subject.name,
                     'credits': subject.credits,
-                    'grade': subject.grade.grade if subject.grade else 'N/A'
+                    'grade': recorded_grade(subject)
                 })
             semesters.append({
                 'semester': semester.semester,
@@ -624,11 +739,11 @@ def export_gpa_data(request):
             'user': user_data,
             'semesters': semesters
         }
-        print("Response Data:", response_data)  # Log the response data
+        logger.debug("Response Data: %s", response_data)
 
         return Response(response_data, status=status.HTTP_200_OK)
     except Exception as e:
-        print("Error:", str(e))  # Log the error
+        logger.exception("Error: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
@@ -656,7 +771,7 @@ def fetch_students_by_faculty(request):
             for student in students
         ]
         response_data = {'students': student_data}
-        print("Response data:", response_data)  # Log the response
+        logger.debug("Response data: %s", response_data)
         return Response({'students': student_data}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -665,7 +780,9 @@ def fetch_students_by_faculty(request):
 @permission_classes([IsAuthenticated])
 def predict_cgpa(request):
     """
-    Predict CGPA based on user input features
+    Predict CGPA based on user input features.
+    Pass "explain": true to also get each feature's contribution to the prediction,
+    and "interval": true to get the range the forest's trees predict.
     """
     try:
         data = request.data
@@ -673,136 +790,192 @@ def predict_cgpa(request):
         
         # Extract features from request data
         features = {
-            'num_S': data.get('num_S', 0),
-            'num_A': data.get('num_A', 0),
-            'num_B': data.get('num_B', 0),
-            'num_C': data.get('num_C', 0),
-            'num_D': data.get('num_D', 0),
-            'num_F': data.get('num_F', 0),
-            'study_hours_per_week': data.get('study_hours_per_week', 12),
-            'participated_in_events': data.get('participated_in_events', 0),
-            'project_count': data.get('project_count', 0),
-            'internship_experience': data.get('internship_experience', 0),
-            'travel_time_minutes': data.get('travel_time_minutes', 30),
-            'lives_in_pg_or_hostel': data.get('lives_in_pg_or_hostel', 0),
-            'previous_board_cgpa': data.get('previous_board_cgpa', 8.0)
+            name: data.get(name, default)
+            for name, default in FEATURE_DEFAULTS.items()
         }
         
         # Validate input ranges
-        if not (0 <= features['study_hours_per_week'] <= 25):
-            return Response({'error': 'Study hours per week must be between 0 and 25'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        
-        if not (5.0 <= features['previous_board_cgpa'] <= 10.0):
-            return Response({'error': 'Previous board CGPA must be between 5.0 and 10.0'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
+        error = validate_prediction_features(features)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
         
         # Make prediction
         try:
-            predicted_cgpa = cgpa_predictor.predict_cgpa(features)
+            predictor = get_predictor()
+            active = predictor.current_model()
+            predicted_cgpa = predictor.predict_cgpa(features, active)
             
-            # Save prediction history
-            CGPAPrediction.objects.create(
-                user=user,
-                predicted_cgpa=predicted_cgpa,
-                num_S=features['num_S'],
-                num_A=features['num_A'],
-                num_B=features['num_B'],
-                num_C=features['num_C'],
-                num_D=features['num_D'],
-                num_F=features['num_F'],
-                study_hours_per_week=features['study_hours_per_week'],
-                participated_in_events=bool(features['participated_in_events']),
-                project_count=features['project_count'],
-                internship_experience=bool(features['internship_experience']),
-                travel_time_minutes=features['travel_time_minutes'],
-                lives_in_pg_or_hostel=bool(features['lives_in_pg_or_hostel']),
-                previous_board_cgpa=features['previous_board_cgpa'],
-                prediction_type='manual'
-            )
-            
-            return Response({
+            response_data = {
                 'predicted_cgpa': predicted_cgpa,
                 'input_features': features,
+                'model_version': active.version,
                 'message': 'CGPA prediction successful'
-            }, status=status.HTTP_200_OK)
+            }
+            # Before saving, so an unsupported request leaves no history row
+            try:
+                if is_truthy(data.get('explain')):
+                    response_data['explanation'] = predictor.explain(features, active)
+                if is_truthy(data.get('interval')):
+                    response_data['prediction_interval'] = predictor.prediction_interval(features, active)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Save prediction history
+            save_predictions([features], lambda digests: [
+                build_prediction_record(user, digests[0], predicted_cgpa, 'manual', active.version)
+            ])
+            record_lifestyle_features(user, features)
+            return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Prediction error: {e}")
+            logger.exception("Prediction error: %s", e)
             return Response({'error': f'Prediction failed: {str(e)}'}, 
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     except Exception as e:
-        print(f"General error in predict_cgpa: {e}")
+        logger.exception("General error in predict_cgpa: %s", e)
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def predict_cgpa_batch(request):
+    """
+    Predict CGPA for many feature sets in one call.
+    Accepts either {"rows": [{...}, ...]} or a columnar {"columns": {"num_S": [...], ...}}.
+    Pass "interval": true to get a prediction interval for every row.
+    """
+    try:
+        data = request.data
+        user = request.user
+
+        if 'columns' in data:
+            columns = data.get('columns')
+            if not isinstance(columns, dict) or not columns:
+                return Response({'error': 'columns must be a non-empty object of feature lists'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            lengths = {len(v) for v in columns.values() if isinstance(v, list)}
+            if len(lengths) != 1 or not all(isinstance(v, list) for v in columns.values()):
+                return Response({'error': 'All columns must be lists of the same length'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            n_rows = lengths.pop()
+            rows = [
+                {name: values[i] for name, values in columns.items()}
+                for i in range(n_rows)
+            ]
+        else:
+            rows = data.get('rows')
+            if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+                return Response({'error': 'rows must be a list of feature objects'},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+        if not rows:
+            return Response({'error': 'No rows provided'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_PREDICTION_BATCH_SIZE:
+            return Response({'error': f'At most {MAX_PREDICTION_BATCH_SIZE} rows are allowed per batch'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        # Apply defaults and validate every row before predicting anything
+        feature_rows = []
+        for index, row in enumerate(rows):
+            features = {
+                name: row.get(name, default)
+                for name, default in FEATURE_DEFAULTS.items()
+            }
+            error = validate_prediction_features(features)
+            if error:
+                return Response({'error': f'Row {index}: {error}'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            feature_rows.append(features)
+
+        with_intervals = is_truthy(data.get('interval'))
+        predictor = get_predictor()
+        active = predictor.current_model()
+        try:
+            if with_intervals:
+                predictions, intervals = predictor.predict_many_with_intervals(feature_rows, active)
+            else:
+                predictions = predictor.predict_many(feature_rows, active)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Save prediction history in one insert
+        save_predictions(feature_rows, lambda digests: [
+            build_prediction_record(user, inputs_digest, predicted_cgpa, 'batch', active.version)
+            for inputs_digest, predicted_cgpa in zip(digests, predictions)
+        ])
+
+        results = [
+            {'predicted_cgpa': predicted_cgpa, 'input_features': features}
+            for features, predicted_cgpa in zip(feature_rows, predictions)
+        ]
+        if with_intervals:
+            for result, interval in zip(results, intervals):
+                result['prediction_interval'] = interval
+
+        return Response({
+            'predictions': results,
+            'count': len(predictions),
+            'message': 'Batch CGPA prediction successful'
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception("Error in predict_cgpa_batch: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def predict_cgpa_from_user_data(request):
     """
-    Predict CGPA using user's existing academic data combined with additional input
+    Predict CGPA using user's existing academic data combined with additional input.
+    Pass "explain": true to also get each feature's contribution to the prediction,
+    and "interval": true to get the range the forest's trees predict.
     """
     try:
         user = request.user
         data = request.data
         
-        # Get user's existing semester data
-        user_semesters = Semester.objects.filter(user=user)
+        # Stored grade distribution and last-submitted answers, in one lookup
+        stored = get_user_features(user)
+        grade_counts = stored_grade_distribution(stored)
         
-        # Calculate grade distribution from user's data
-        grade_counts = cgpa_predictor.calculate_grade_distribution(user_semesters)
-        
-        # Use provided features or defaults
+        # Use provided features or the stored values
         features = {
-            'num_S': data.get('num_S', grade_counts['S']),
-            'num_A': data.get('num_A', grade_counts['A']),
-            'num_B': data.get('num_B', grade_counts['B']),
-            'num_C': data.get('num_C', grade_counts['C']),
-            'num_D': data.get('num_D', grade_counts['D']),
-            'num_F': data.get('num_F', grade_counts['F']),
-            'study_hours_per_week': data.get('study_hours_per_week', 12),
-            'participated_in_events': data.get('participated_in_events', 0),
-            'project_count': data.get('project_count', 0),
-            'internship_experience': data.get('internship_experience', 0),
-            'travel_time_minutes': data.get('travel_time_minutes', 30),
-            'lives_in_pg_or_hostel': data.get('lives_in_pg_or_hostel', 0),
-            'previous_board_cgpa': data.get('previous_board_cgpa', 8.0)
+            name: data.get(name, default)
+            for name, default in feature_values(stored).items()
         }
         
         # Make prediction
-        predicted_cgpa = cgpa_predictor.predict_cgpa(features)
-        
-        # Save prediction history
-        CGPAPrediction.objects.create(
-            user=user,
-            predicted_cgpa=predicted_cgpa,
-            actual_cgpa=user.cgpa,
-            num_S=features['num_S'],
-            num_A=features['num_A'],
-            num_B=features['num_B'],
-            num_C=features['num_C'],
-            num_D=features['num_D'],
-            num_F=features['num_F'],
-            study_hours_per_week=features['study_hours_per_week'],
-            participated_in_events=bool(features['participated_in_events']),
-            project_count=features['project_count'],
-            internship_experience=bool(features['internship_experience']),
-            travel_time_minutes=features['travel_time_minutes'],
-            lives_in_pg_or_hostel=bool(features['lives_in_pg_or_hostel']),
-            previous_board_cgpa=features['previous_board_cgpa'],
-            prediction_type='from_user_data'
-        )
+        predictor = get_predictor()
+        active = predictor.current_model()
+        predicted_cgpa = predictor.predict_cgpa(features, active)
         
-        return Response({
+        response_data = {
             'predicted_cgpa': predicted_cgpa,
             'current_cgpa': user.cgpa or 0.0,
             'grade_distribution': grade_counts,
             'input_features': features,
             'message': 'CGPA prediction based on user data successful'
-        }, status=status.HTTP_200_OK)
+        }
+        # Before saving, so an unsupported request leaves no history row
+        try:
+            if is_truthy(data.get('explain')):
+                response_data['explanation'] = predictor.explain(features, active)
+            if is_truthy(data.get('interval')):
+                response_data['prediction_interval'] = predictor.prediction_interval(features, active)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Save prediction history
+        save_predictions([features], lambda digests: [
+            build_prediction_record(
+                user, digests[0], predicted_cgpa, 'from_user_data', active.version, actual_cgpa=user.cgpa
+            )
+        ])
+        record_lifestyle_features(user, features)
+        return Response(response_data, status=status.HTTP_200_OK)
     
     except Exception as e:
-        print(f"Error in predict_cgpa_from_user_data: {e}")
+        logger.exception("Error in predict_cgpa_from_user_data: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
@@ -813,10 +986,10 @@ def get_prediction_form_data(request):
     """
     try:
         user = request.user
-        user_semesters = Semester.objects.filter(user=user)
         
-        # Calculate grade distribution from user's data
-        grade_counts = cgpa_predictor.calculate_grade_distribution(user_semesters)
+        # Stored grade distribution and last-submitted answers, in one lookup
+        stored = get_user_features(user)
+        grade_counts = stored_grade_distribution(stored)
         
         # Prepare form data
         form_data = {
@@ -824,34 +997,47 @@ def get_prediction_form_data(request):
             'current_semester': user.semester,
             'degree': user.degree,
             'grade_distribution': grade_counts,
-            'default_features': {
-                'num_S': grade_counts['S'],
-                'num_A': grade_counts['A'],
-                'num_B': grade_counts['B'],
-                'num_C': grade_counts['C'],
-                'num_D': grade_counts['D'],
-                'num_F': grade_counts['F'],
-                'study_hours_per_week': 12,
-                'participated_in_events': 0,
-                'project_count': 0,
-                'internship_experience': 0,
-                'travel_time_minutes': 30,
-                'lives_in_pg_or_hostel': 0,
-                'previous_board_cgpa': 8.0
-            }
+            'total_credits': stored.total_credits,
+            'earned_credits': stored.earned_credits,
+            'latest_sgpa': stored.latest_sgpa,
+            'default_features': feature_values(stored)
         }
         
         return Response(form_data, status=status.HTTP_200_OK)
     
     except Exception as e:
-        print(f"Error in get_prediction_form_data: {e}")
+        logger.exception("Error in get_prediction_form_data: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_prediction_summaries(request):
+    """
+    Get the user's monthly summaries of predictions older than the retention window
+    """
+    summaries = PredictionMonthlySummary.objects.filter(user=request.user).values(
+        'month', 'prediction_count', 'sum_predicted_cgpa', 'min_predicted_cgpa', 'max_predicted_cgpa'
+    )
+    return Response({
+        'summaries': [
+            {
+                'month': row['month'].strftime('%Y-%m'),
+                'prediction_count': row['prediction_count'],
+                'average_predicted_cgpa': round(row['sum_predicted_cgpa'] / row['prediction_count'], 2),
+                'min_predicted_cgpa': row['min_predicted_cgpa'],
+                'max_predicted_cgpa': row['max_predicted_cgpa'],
+            }
+            for row in summaries
+        ]
+    }, status=status.HTTP_200_OK)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def train_prediction_model(request):
     """
-    Train/retrain the CGPA prediction model (admin only)
+    Queue a retraining of the CGPA prediction model (admin only).
+    Training runs in the background worker; poll training_jobs/<id>/ for the result.
+    Pass search_budget (seconds) to run a hyperparameter search instead.
     """
     try:
         user = request.user
@@ -861,58 +1047,122 @@ def train_prediction_model(request):
             return Response({'error': 'Permission denied. Admin access required.'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
-        # Train the model
-        performance_metrics = cgpa_predictor.train_model()
+        search_budget = request.data.get('search_budget')
+        if search_budget is not None:
+            try:
+                search_budget = float(search_budget)
+            except (TypeError, ValueError):
+                search_budget = 0
+            if not 0 < search_budget <= settings.CGPA_SEARCH_MAX_BUDGET:
+                return Response({'error': f'search_budget must be between 0 and {settings.CGPA_SEARCH_MAX_BUDGET} seconds'},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+        # Queue the training run
+        job = enqueue_training_job(user, search_budget=search_budget)
         
         return Response({
-            'message': 'Model training completed successfully',
-            'performance_metrics': performance_metrics
-        }, status=status.HTTP_200_OK)
+            'message': 'Model training queued',
+            'job': serialize_job(job),
+            'status_url': f'/training_jobs/{job.id}/'
+        }, status=status.HTTP_202_ACCEPTED)
     
     except Exception as e:
-        print(f"Error in train_prediction_model: {e}")
+        logger.exception("Error in train_prediction_model: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def training_job_status(request, job_id):
+    """
+    Get the status and metrics of a training job (admin only)
+    """
+    user = request.user
+    if not (user.is_staff or getattr(user, 'is_faculty', False)):
+        return Response({'error': 'Permission denied. Admin access required.'}, 
+                      status=status.HTTP_403_FORBIDDEN)
+
+    job = TrainingJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({'error': 'Training job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(serialize_job(job), status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_prediction_history(request):
     """
-    Get user's CGPA prediction history
+    Get user's CGPA prediction history, newest first.
+    Query parameters: cursor (from next_cursor of the previous page),
+    page_size (default 10) and include_total (default true; false skips the count query).
     """
     try:
         user = request.user
-        predictions = CGPAPrediction.objects.filter(user=user)[:10]  # Last 10 predictions
-        
+        try:
+            page_size = int(request.query_params.get('page_size', 10))
+        except ValueError:
+            page_size = 0
+        if not 1 <= page_size <= MAX_HISTORY_PAGE_SIZE:
+            return Response({'error': f'page_size must be between 1 and {MAX_HISTORY_PAGE_SIZE}'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        predictions = CGPAPrediction.objects.filter(user=user)
+        try:
+            rows, next_cursor = keyset_page(
+                predictions.values(*HISTORY_FIELDS, **{name: F(f'inputs__{name}') for name in FEATURE_COLUMNS}),
+                cursor=request.query_params.get('cursor'),
+                page_size=page_size,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         prediction_data = []
-        for prediction in predictions:
-            prediction_data.append({
-                'id': prediction.id,
-                'predicted_cgpa': prediction.predicted_cgpa,
-                'actual_cgpa': prediction.actual_cgpa,
-                'created_at': prediction.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'prediction_type': prediction.prediction_type,
-                'input_features': {
-                    'num_S': prediction.num_S,
-                    'num_A': prediction.num_A,
-                    'num_B': prediction.num_B,
-                    'num_C': prediction.num_C,
-                    'num_D': prediction.num_D,
-                    'num_F': prediction.num_F,
-                    'study_hours_per_week': prediction.study_hours_per_week,
-                    'participated_in_events': prediction.participated_in_events,
-                    'project_count': prediction.project_count,
-                    'internship_experience': prediction.internship_experience,
-                    'travel_time_minutes': prediction.travel_time_minutes,
-                    'lives_in_pg_or_hostel': prediction.lives_in_pg_or_hostel,
-                    'previous_board_cgpa': prediction.previous_board_cgpa,
-                }
-            })
-        
-        return Response({
+        for row in rows:
+            row['created_at'] = row['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+            row['input_features'] = {name: row.pop(name) for name in FEATURE_COLUMNS}
+            prediction_data.append(row)
+
+        response_data = {
             'predictions': prediction_data,
-            'total_count': CGPAPrediction.objects.filter(user=user).count()
-        }, status=status.HTTP_200_OK)
+            'next_cursor': next_cursor,
+        }
+        if is_truthy(request.query_params.get('include_total', True)):
+            response_data['total_count'] = predictions.count()
+        return Response(response_data, status=status.HTTP_200_OK)
     
     except Exception as e:
-        print(f"Error in get_prediction_history: {e}")
+        logger.exception("Error in get_prediction_history: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def prediction_accuracy(request):
+    """
+    Drift report: live error of each model version on scored predictions,
+    per cohort, against the error measured at training time (admin only)
+    """
+    user = request.user
+    if not (user.is_staff or getattr(user, 'is_faculty', False)):
+        return Response({'error': 'Permission denied. Admin access required.'}, 
+                      status=status.HTTP_403_FORBIDDEN)
+
+    predictor = get_predictor()
+    return Response({
+        'current_version': predictor.registry.current_version(),
+        'versions': accuracy_report(predictor.registry),
+    }, status=status.HTTP_200_OK)
+
+
+@require_GET
+def metrics(request):
+    """
+    Request metrics of every worker in the Prometheus text format. Scrapers
+    must send CGPA_METRICS_TOKEN as a bearer token; without one configured
+    the endpoint is disabled.
+    """
+    token = getattr(settings, 'CGPA_METRICS_TOKEN', '')
+    if not token:
+        return HttpResponse('Not Found', status=404, content_type='text/plain')
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(
+        render_prometheus(metrics_registry.aggregate()), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
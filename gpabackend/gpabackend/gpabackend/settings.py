@@ -1,7 +1,10 @@
 from pathlib import Path
 import os
+import tempfile
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +44,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 MIDDLEWARE = [
+    'calculator.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -152,10 +156,136 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# CGPA prediction cache: maximum entries and per-entry lifetime in seconds
+CGPA_PREDICTION_CACHE_SIZE = int(os.environ.get('CGPA_PREDICTION_CACHE_SIZE', 1024))
+CGPA_PREDICTION_CACHE_TTL = int(os.environ.get('CGPA_PREDICTION_CACHE_TTL', 300))
+
+# Share of the forest's tree predictions covered by the intervals returned on request
+CGPA_PREDICTION_INTERVAL_COVERAGE = float(os.environ.get('CGPA_PREDICTION_INTERVAL_COVERAGE', 0.9))
+
+# CGPA predictions older than this many days are compacted into monthly summaries
+CGPA_PREDICTION_RETENTION_DAYS = int(os.environ.get('CGPA_PREDICTION_RETENTION_DAYS', 180))
+# Unscored predictions (student not finished yet) are kept in full for accuracy
+# tracking until they are this many days old
+CGPA_UNSCORED_PREDICTION_RETENTION_DAYS = int(os.environ.get('CGPA_UNSCORED_PREDICTION_RETENTION_DAYS', 2190))
+
+# Directory holding versioned CGPA model artifacts and the `current` pointer. The
+# web process and run_training_worker must share it: where each Procfile process
+# type runs on its own machine, point it at storage mounted on all of them, or
+# models the worker trains never reach the web process. Required unless DEBUG.
+CGPA_MODEL_REGISTRY_DIR = os.environ.get('CGPA_MODEL_REGISTRY_DIR', '')
+if not CGPA_MODEL_REGISTRY_DIR:
+    if not DEBUG:
+        raise ImproperlyConfigured(
+            'Set CGPA_MODEL_REGISTRY_DIR to a directory shared by the web and training worker processes'
+        )
+    CGPA_MODEL_REGISTRY_DIR = str(BASE_DIR / 'calculator' / 'model_registry')
+
+# Model family used when training the CGPA predictor: 'linear', 'gbt', 'forest' or 'extra_trees'
+CGPA_PREDICTOR_BACKEND = os.environ.get('CGPA_PREDICTOR_BACKEND', 'forest')
+
+# Columnar dataset of real student features, and the number of rows needed
+# before training uses it instead of the synthetic dataset
+CGPA_FEATURE_DATASET_DIR = os.environ.get('CGPA_FEATURE_DATASET_DIR', str(BASE_DIR / 'calculator' / 'feature_dataset'))
+CGPA_MIN_TRAINING_ROWS = int(os.environ.get('CGPA_MIN_TRAINING_ROWS', 200))
+
+# Where generate_synthetic_dataset writes benchmark data, kept apart from the training dataset
+CGPA_BENCHMARK_DATASET_DIR = os.environ.get('CGPA_BENCHMARK_DATASET_DIR', str(BASE_DIR / 'calculator' / 'benchmark_dataset'))
+
+# Import pandas/scikit-learn and load the CGPA model at startup instead of on the
+# first prediction request. Enable for web processes started with gunicorn --preload;
+# only the WSGI/ASGI entry points preload, never management commands.
+CGPA_PRELOAD_PREDICTOR = os.environ.get('CGPA_PRELOAD_PREDICTOR', 'False') == 'True'
+
+# Longest hyperparameter search, in seconds, that can be queued through the API
+CGPA_SEARCH_MAX_BUDGET = float(os.environ.get('CGPA_SEARCH_MAX_BUDGET', 3600))
+
+# Seconds after which a running training job (beyond its search budget) is
+# taken to belong to a dead worker and marked failed
+CGPA_TRAINING_JOB_TIMEOUT = float(os.environ.get('CGPA_TRAINING_JOB_TIMEOUT', 7200))
+
+# Per-process request metrics files, summed across workers by /metrics. Keep one
+# directory per host: files of exited workers are recognised by pid and folded
+# into exited.json, whose totals stay until the directory is cleared.
+CGPA_METRICS_DIR = os.environ.get('CGPA_METRICS_DIR', '')
+CGPA_METRICS_FLUSH_INTERVAL = float(os.environ.get('CGPA_METRICS_FLUSH_INTERVAL', 1.0))
+# Bearer token required to read /metrics; the endpoint answers 404 until one is set
+CGPA_METRICS_TOKEN = os.environ.get('CGPA_METRICS_TOKEN', '')
+
+# Logging. CGPA_LOG_LEVEL is the level of the project's loggers; CGPA_LOG_LEVELS
+# overrides it per module, e.g. "calculator.views=DEBUG,accounts=WARNING".
+# Records are written from a background thread with secrets redacted.
+CGPA_LOG_LEVEL = os.environ.get('CGPA_LOG_LEVEL', 'INFO').upper()
+CGPA_LOG_LEVELS = dict(
+    (name.strip(), level.strip().upper())
+    for name, _, level in (item.partition('=') for item in os.environ.get('CGPA_LOG_LEVELS', '').split(','))
+    if name.strip() and level.strip()
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '%(asctime)s %(levelname)s %(name)s [%(process)d:%(threadName)s] %(message)s',
+        },
+    },
+    'filters': {
+        'redact': {'()': 'calculator.log.RedactFilter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'calculator.log.QueueStreamHandler',
+            'formatter': 'verbose',
+            'filters': ['redact'],
+        },
+    },
+    'loggers': {
+        'calculator': {'handlers': ['console'], 'level': CGPA_LOG_LEVEL, 'propagate': False},
+        'accounts': {'handlers': ['console'], 'level': CGPA_LOG_LEVEL, 'propagate': False},
+    },
+}
+for _name, _level in CGPA_LOG_LEVELS.items():
+    LOGGING['loggers'].setdefault(_name, {})['level'] = _level
+
+# Caches. 'otp' holds one-time passwords and their rate limits (accounts/otp.py)
+# and must be shared by every web worker: file-based by default, or point
+# OTP_CACHE_BACKEND/OTP_CACHE_LOCATION at a cache server. Failed checks are
+# counted in the database, so any shared backend keeps the attempt limit.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'otp': {
+        'BACKEND': os.environ.get('OTP_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('OTP_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'gpabackend-otp-cache')),
+    },
+}
+
+# One-time passwords: cache alias, lifetime in seconds, checks before an OTP is
+# dropped, and (bucket size, seconds to refill one token) for OTP requests and
+# for OTP checks per email and per client IP
+OTP_CACHE = 'otp'
+OTP_TTL = int(os.environ.get('OTP_TTL', 600))
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 5))
+OTP_EMAIL_RATE = (int(os.environ.get('OTP_EMAIL_BURST', 3)), float(os.environ.get('OTP_EMAIL_REFILL_SECONDS', 300)))
+OTP_IP_RATE = (int(os.environ.get('OTP_IP_BURST', 10)), float(os.environ.get('OTP_IP_REFILL_SECONDS', 60)))
+OTP_VERIFY_EMAIL_RATE = (
+    int(os.environ.get('OTP_VERIFY_EMAIL_BURST', 10)), float(os.environ.get('OTP_VERIFY_EMAIL_REFILL_SECONDS', 60))
+)
+OTP_VERIFY_IP_RATE = (
+    int(os.environ.get('OTP_VERIFY_IP_BURST', 30)), float(os.environ.get('OTP_VERIFY_IP_REFILL_SECONDS', 60))
+)
+# Request header a trusted reverse proxy appends the client address to, e.g.
+# HTTP_X_FORWARDED_FOR; per-IP limits use REMOTE_ADDR (the proxy, behind one) when empty
+OTP_CLIENT_IP_HEADER = os.environ.get('OTP_CLIENT_IP_HEADER', '')
+
 # Email configuration
 if DEBUG:
-    # For development - print emails to console instead of sending them
-    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+    # For development - print emails to console instead of sending them, or set
+    # EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend to write them to EMAIL_FILE_PATH
+    EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+    EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
 else:
     # For production - use SMTP
     EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -166,3 +296,14 @@ else:
     EMAIL_HOST_PASSWORD = 'acryzayk'  # Replace with your Gmail app password
 DEFAULT_FROM_EMAIL = 'mail4@gmail.com'
 EMAIL_USE_LOCALTIME = True
+
+# Outbox worker (run_email_worker): emails sent per connection, tries before an
+# email is marked failed, retry delay in seconds (doubled per failed attempt, up
+# to the maximum) and seconds after which an email claimed by a dead worker is retried
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = float(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', 30))
+EMAIL_OUTBOX_MAX_RETRY_DELAY = float(os.environ.get('EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600))
+EMAIL_OUTBOX_CLAIM_TIMEOUT = float(os.environ.get('EMAIL_OUTBOX_CLAIM_TIMEOUT', 300))
+# Days sent and failed outbox rows are kept before the worker deletes them
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', 30))
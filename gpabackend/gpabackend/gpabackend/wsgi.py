@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gpabackend.settings')
 
 application = get_wsgi_application()
+
+# Load the CGPA prediction stack before the first request when CGPA_PRELOAD_PREDICTOR
+# is set; only here, so management commands such as migrate stay light
+from calculator.prediction_service import preload_for_serving  # noqa: E402
+
+preload_for_serving()